@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+"""Throughput and latency benchmarks of the order placer.
+
+Every case runs in a fresh process against a seeded loopback stand-in exchange
+(`MockBnceRestServer`) served by this process, so the measured cpu time and
+peak rss are the client's only. Rate limits are lifted to measure the placer's
+own overhead rather than binance's limits. Results are written as json, pass a
+previous result file with `--baseline` to compare.
+
+    $ python benchmarks/bench.py --rows 1000 100000 1000000 --out bench.json
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from decimal import Decimal
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+from time import perf_counter_ns, process_time_ns
+
+from order_placer.cex.binance.enums import BnceOrderSide, BnceOrderTimeInForce, BnceOrderType
+from order_placer.cex.binance.mock_rest_server import MockBnceRestServer
+from order_placer.cex.binance.order import BnceSpotLimitOrderPlacer
+from order_placer.cex.binance.rest_endpoint import BnceRestEndpointV3
+from order_placer.cex.core.throttler import AsyncThrottler
+from order_placer.core.metrics import LatencyHistogram
+from order_placer.core.retry import RetryPolicy
+
+CASES = ("sign", "throttler", "dry_run", "execute")
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+_UNLIMITED_RATE_LIMITS = [
+    {"rateLimitType": limit_type, "interval": "SECOND", "intervalNum": 1, "limit": 10**9}
+    for limit_type in ("REQUEST_WEIGHT", "ORDERS", "RAW_REQUESTS")
+]
+# symbol: (price range, quantity range, price decimals, quantity decimals)
+_PAIRS = {
+    "JTOUSDT": ((1.5, 3.5), (4.0, 10.0), 4, 3),
+    "ETHBTC": ((0.05, 0.06), (0.1, 2.0), 5, 4),
+}
+
+
+def _accounts(naccounts: int) -> dict:
+    return {
+        i: {"api_key": f"{i}api", "secret_key": f"{i}secret", "px_prec": 4, "qty_prec": 3}
+        for i in range(1, naccounts + 1)
+    }
+
+
+def generate_orders(rows: int, naccounts: int, seed: int) -> str:
+    """Write (once) a deterministic orders file, returns its filepath"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    fp = os.path.join(DATA_DIR, f"orders_{rows}_{naccounts}_{seed}.csv")
+    if os.path.exists(fp):
+        return fp
+    rng = random.Random(seed)
+    pairs = list(_PAIRS.items())
+    with open(f"{fp}.tmp", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Pair", "Direction", "Price", "Quantity", "Account", "Value"])
+        for _ in range(rows):
+            pair, ((px_lo, px_hi), (qty_lo, qty_hi), px_dp, qty_dp) = rng.choice(pairs)
+            price = round(rng.uniform(px_lo, px_hi), px_dp)
+            qty = round(rng.uniform(qty_lo, qty_hi), qty_dp)
+            writer.writerow(
+                [
+                    pair,
+                    rng.choice(("BUY", "SELL")),
+                    f"{price:.{px_dp}f}",
+                    f"{qty:.{qty_dp}f}",
+                    rng.randint(1, naccounts),
+                    f"{price * qty:.2f}",
+                ]
+            )
+    os.replace(f"{fp}.tmp", fp)
+    return fp
+
+
+def _init_worker():
+    os.environ["APP_ENV"] = "local"
+    logging.basicConfig(level=logging.ERROR)
+
+
+def _measure(nops: int, run) -> dict:
+    """Run `run()` and report throughput, cpu time and peak rss of this process"""
+    start_cpu_ns = process_time_ns()
+    start_ns = perf_counter_ns()
+    extra = run() or {}
+    elapsed_ns = perf_counter_ns() - start_ns
+    cpu_ns = process_time_ns() - start_cpu_ns
+    return {
+        "ops": nops,
+        "elapsed_s": elapsed_ns / 1e9,
+        "ops_per_s": nops / (elapsed_ns / 1e9),
+        "cpu_us_per_op": cpu_ns / 1000 / max(nops, 1),
+        # kilobytes on linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        **extra,
+    }
+
+
+def _tail(histogram: LatencyHistogram) -> dict:
+    return {
+        "p50_us": histogram.percentile(50),
+        "p99_us": histogram.percentile(99),
+        "p999_us": histogram.percentile(99.9),
+        "max_us": histogram.max_us,
+    }
+
+
+def _bench_sign(params: dict) -> dict:
+    """Payload encoding, timestamping and signing of one order"""
+    endpoint = BnceRestEndpointV3(None, "1api", "1secret")
+    histogram = LatencyHistogram()
+    price, qty = Decimal("2.0001"), Decimal("3.722")
+
+    def run():
+        for i in range(params["rows"]):
+            start_ns = perf_counter_ns()
+            endpoint._signed_url(
+                "/api/v3/order",
+                endpoint.prepare_order(
+                    "JTOUSDT",
+                    qty,
+                    price,
+                    BnceOrderSide.BUY,
+                    BnceOrderType.LIMIT,
+                    BnceOrderTimeInForce.GOOD_TILL_CANCEL,
+                    f"bench-{i}",
+                ),
+            )
+            histogram.record((perf_counter_ns() - start_ns) // 1000)
+        return _tail(histogram)
+
+    return _measure(params["rows"], run)
+
+
+def _bench_throttler(params: dict) -> dict:
+    """Uncontended `AsyncThrottler.acquire`, the cost paid by every request"""
+    rows = params["rows"]
+    throttler = AsyncThrottler(rows, rows)
+    histogram = LatencyHistogram()
+
+    async def _run():
+        for _ in range(rows):
+            start_ns = perf_counter_ns()
+            await throttler.acquire()
+            histogram.record((perf_counter_ns() - start_ns) // 1000)
+        return _tail(histogram)
+
+    return _measure(rows, lambda: asyncio.run(_run()))
+
+
+def _make_placer(params: dict) -> BnceSpotLimitOrderPlacer:
+    return BnceSpotLimitOrderPlacer(
+        _accounts(params["accounts"]),
+        params["orders_fp"],
+        inflight_window=params["window"],
+        exchange_info_ttl_s=0,
+        retry_policy=RetryPolicy(seed=params["seed"]),
+        rate_limits=_UNLIMITED_RATE_LIMITS,
+        local_exchange_url=params["url"],
+    )
+
+
+def _bench_dry_run(params: dict) -> dict:
+    async def _run():
+        async with _make_placer(params) as app:
+            await app.dry_run()
+
+    return _measure(params["rows"], lambda: asyncio.run(_run()))
+
+
+def _bench_execute(params: dict) -> dict:
+    async def _run():
+        async with _make_placer(params) as app:
+            result = await app.execute()
+        return {
+            "placed": result.placed,
+            "failed": result.failed,
+            **{
+                k: v
+                for k, v in result.latency.summary()["total"]["all"].items()
+                if k != "count"
+            },
+        }
+
+    return _measure(params["rows"], lambda: asyncio.run(_run()))
+
+
+_BENCHES = {
+    "sign": _bench_sign,
+    "throttler": _bench_throttler,
+    "dry_run": _bench_dry_run,
+    "execute": _bench_execute,
+}
+
+
+def _case_params(args: argparse.Namespace) -> list[dict]:
+    """Parameter matrix, each case only varies the parameters it depends on"""
+    params = []
+    for case in args.cases:
+        for rows in args.rows:
+            if case in ("sign", "throttler"):
+                params.append({"case": case, "rows": rows})
+                continue
+            for accounts in args.accounts:
+                windows = args.window if case == "execute" else [args.window[0]]
+                failure_rates = args.failure_rate if case == "execute" else [0.0]
+                for window, failure_rate in itertools.product(windows, failure_rates):
+                    params.append(
+                        {
+                            "case": case,
+                            "rows": rows,
+                            "accounts": accounts,
+                            "window": window,
+                            "failure_rate": failure_rate,
+                        }
+                    )
+    return params
+
+
+def _case_key(params: dict) -> str:
+    return ",".join(f"{k}={v}" for k, v in params.items())
+
+
+async def _run_cases(args: argparse.Namespace) -> list[dict]:
+    loop = asyncio.get_running_loop()
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for params in _case_params(args):
+        run_params = dict(params, seed=args.seed)
+        server = None
+        if params["case"] in ("dry_run", "execute"):
+            run_params["orders_fp"] = generate_orders(
+                params["rows"], params["accounts"], args.seed
+            )
+            # fresh exchange per case, orders and counters start empty
+            server = MockBnceRestServer(
+                rate_limits=_UNLIMITED_RATE_LIMITS,
+                latency_median_s=args.latency_ms / 1000,
+                latency_sigma=args.latency_sigma,
+                error_rate=params["failure_rate"],
+                secret_keys={
+                    meta["api_key"]: meta["secret_key"]
+                    for meta in _accounts(params["accounts"]).values()
+                },
+                seed=args.seed,
+            )
+            await server.start()
+            run_params["url"] = server.url
+        try:
+            # one process per case so peak rss is the case's own
+            with ProcessPoolExecutor(1, mp_context=ctx, initializer=_init_worker) as pool:
+                result = await loop.run_in_executor(
+                    pool, _BENCHES[params["case"]], run_params
+                )
+        finally:
+            if server is not None:
+                await server.stop()
+        results.append({"params": params, "metrics": result})
+        print(
+            f"{_case_key(params)}: {result['ops_per_s']:.0f} ops/s, "
+            f"{result['cpu_us_per_op']:.1f} cpu us/op, "
+            f"p99 {result.get('p99_us')} us, peak rss {result['peak_rss_kb']} kb"
+        )
+    return results
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(results: list[dict], baseline_fp: str):
+    """Print relative change of the cases also found in `baseline_fp`"""
+    with open(baseline_fp, "r") as f:
+        baseline = {
+            _case_key(r["params"]): r["metrics"] for r in json.load(f)["results"]
+        }
+    for result in results:
+        key = _case_key(result["params"])
+        if key not in baseline:
+            continue
+        before, after = baseline[key], result["metrics"]
+        print(
+            f"{key}: ops/s {after['ops_per_s'] / before['ops_per_s'] - 1:+.1%}, "
+            f"cpu us/op {after['cpu_us_per_op'] / before['cpu_us_per_op'] - 1:+.1%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="order placer benchmarks")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--rows", nargs="+", type=int, default=[1000, 100000, 1000000])
+    parser.add_argument("--accounts", nargs="+", type=int, default=[3])
+    parser.add_argument(
+        "--window", nargs="+", type=int, default=[45], help="in-flight orders per account"
+    )
+    parser.add_argument("--failure-rate", nargs="+", type=float, default=[0.0])
+    parser.add_argument(
+        "--latency-ms", default=0.0, type=float, help="median exchange latency"
+    )
+    parser.add_argument(
+        "--latency-sigma", default=0.5, type=float, help="log normal latency spread"
+    )
+    parser.add_argument("--seed", default=42, type=int)
+    parser.add_argument("--out", default="bench.json", help="json results filepath")
+    parser.add_argument("--baseline", default=None, help="previous results to compare")
+    args = parser.parse_args()
+
+    results = asyncio.run(_run_cases(args))
+    with open(args.out, "w") as f:
+        json.dump(
+            {
+                "timestamp": int(time.time()),
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "seed": args.seed,
+                "latency_ms": args.latency_ms,
+                "latency_sigma": args.latency_sigma,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    if args.baseline:
+        _compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import asyncio
+from collections import deque
+from email.utils import parsedate_to_datetime
+import logging
+import math
+import time
+from typing import Callable
+
+import aiohttp
+
+# /api/v3/time requests of a sync, the one with the shortest round trip is kept
+_SYNC_SAMPLES = 5
+# offset samples jitter is computed over
+_JITTER_SAMPLES = 50
+# Date headers are checked at most this often, parsing one costs microseconds
+_DATE_CHECK_NS = 1_000_000_000
+# Date headers have second resolution, offsets off by less than this are kept
+_DATE_MARGIN_NS = 50_000_000
+# errors of a single time request, the sync goes on with the next one
+_SYNC_EXCEPTIONS = (
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    ConnectionError,
+    ValueError,
+)
+# binance rejects larger recvWindow values
+_MAX_RECV_WINDOW_MS = 60000
+
+
+def log_clock_summary(summary: dict):
+    """Log a `BnceServerClock.summary`"""
+    logging.info(
+        f"Server clock {summary['offset_ms']:+} ms from local, jitter"
+        f" {summary['jitter_ms']} ms over {summary['syncs']} syncs,"
+        f" {summary['corrections']} corrections from Date headers"
+    )
+
+
+def clock_to_prometheus(summaries: list[dict], prefix: str = "order_placer") -> str:
+    """Prometheus text exposition format of `BnceServerClock.summary` of each
+    process, labelled by process index"""
+    lines = []
+    for metric, key, help_text in (
+        ("server_clock_offset_seconds", "offset_ms", "Server time ahead of local time."),
+        ("server_clock_jitter_seconds", "jitter_ms", "Deviation of server time samples."),
+        ("server_clock_rtt_seconds", "rtt_ms", "Round trip of the kept time sample."),
+    ):
+        name = f"{prefix}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for i, summary in enumerate(summaries):
+            if summary[key] is not None:
+                lines.append(f'{name}{{process="{i}"}} {summary[key] / 1e3}')
+    name = f"{prefix}_server_clock_corrections_total"
+    lines.append(f"# HELP {name} Estimates corrected per Date headers.")
+    lines.append(f"# TYPE {name} counter")
+    for i, summary in enumerate(summaries):
+        lines.append(f'{name}{{process="{i}"}} {summary["corrections"]}')
+    return "\n".join(lines) + "\n"
+
+
+class BnceServerClock:
+    """Binance server time, interpolated with the monotonic clock.
+
+    Server time is the monotonic clock plus an offset. The offset is estimated
+    by `sync` from /api/v3/time, taking the sample with the shortest round
+    trip and assuming the server stamped it halfway. Until the first sync,
+    the offset follows the local wall clock. The estimate is checked against
+    the Date header of responses (`observe_date`). An offset that is off by
+    more than a second is moved to the nearest consistent value and a resync
+    is requested. Wall clock steps (eg. ntp) do not move the estimate.
+
+    `start` syncs once, then keeps syncing every `refresh_s` in the
+    background, or right away after `resync` (eg. on a -1021). Signed
+    requests are stamped with `stamp` once they leave the rate limiter,
+    allowed `recv_window_ms` to reach the exchange. `monotonic_ns` and
+    `time_ns` stand in for the local clocks, eg. on a virtual loop.
+    """
+
+    def __init__(
+        self,
+        recv_window_ms: int = 5000,
+        refresh_s: float = 60,
+        monotonic_ns: Callable[[], int] = time.monotonic_ns,
+        time_ns: Callable[[], int] = time.time_ns,
+    ) -> None:
+        if not 0 < recv_window_ms <= _MAX_RECV_WINDOW_MS:
+            raise ValueError(
+                f"recv window must be between 1 and {_MAX_RECV_WINDOW_MS} ms"
+            )
+        self.recv_window_ms = recv_window_ms
+        self._refresh_s = refresh_s
+        self._monotonic_ns = monotonic_ns
+        self._time_ns = time_ns
+        self._offset_ns = time_ns() - monotonic_ns()
+        self._rtt_ns: int | None = None
+        self._samples: deque[int] = deque(maxlen=_JITTER_SAMPLES)
+        self._syncs = 0
+        self._corrections = 0
+        self._checked_ns = 0
+        self._stale: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def now_ms(self) -> int:
+        """Estimated server time in milliseconds"""
+        return (self._monotonic_ns() + self._offset_ns) // 1_000_000
+
+    def stamp(self) -> str:
+        """recvWindow and timestamp params of a signed request"""
+        return f"recvWindow={self.recv_window_ms}&timestamp={self.now_ms()}"
+
+    @property
+    def offset_ms(self) -> float:
+        """Server time ahead of the local wall clock"""
+        local_offset_ns = self._time_ns() - self._monotonic_ns()
+        return (self._offset_ns - local_offset_ns) / 1e6
+
+    @property
+    def jitter_ms(self) -> float:
+        """Standard deviation of recent offset samples"""
+        if len(self._samples) < 2:
+            return 0.0
+        mean = sum(self._samples) / len(self._samples)
+        var = sum((s - mean) ** 2 for s in self._samples) / (len(self._samples) - 1)
+        return math.sqrt(var) / 1e6
+
+    def summary(self) -> dict:
+        return {
+            "offset_ms": round(self.offset_ms, 3),
+            "jitter_ms": round(self.jitter_ms, 3),
+            "rtt_ms": None if self._rtt_ns is None else self._rtt_ns / 1e6,
+            "syncs": self._syncs,
+            "corrections": self._corrections,
+            "recv_window_ms": self.recv_window_ms,
+        }
+
+    async def _sample(self, endpoint) -> tuple[int, int] | None:
+        """Round trip and offset of one /api/v3/time request, timed from when
+        it left the rate limiter"""
+        try:
+            sent_ns, res = await endpoint.get_server_time()
+            received_ns = self._monotonic_ns()
+            data = await res.json()
+        except _SYNC_EXCEPTIONS as e:
+            logging.warning(f"Failed to retrieve server time. {type(e).__name__}: {e}")
+            return None
+        if not res.ok or not isinstance(data, dict) or "serverTime" not in data:
+            logging.warning(f"Failed to retrieve server time. status: {res.status}")
+            return None
+        # serverTime is truncated to the millisecond, stamped within the round trip
+        offset_ns = (
+            data["serverTime"] * 1_000_000 + 500_000 - (sent_ns + received_ns) // 2
+        )
+        return received_ns - sent_ns, offset_ns
+
+    async def sync(self, endpoint) -> bool:
+        """Estimate the offset from /api/v3/time of `endpoint`, False if no
+        sample could be taken. Samples are taken at once, a sync costs about
+        one round trip"""
+        samples = [
+            sample
+            for sample in await asyncio.gather(
+                *(self._sample(endpoint) for _ in range(_SYNC_SAMPLES))
+            )
+            if sample is not None
+        ]
+        if not samples:
+            return False
+        self._samples.extend(offset_ns for _, offset_ns in samples)
+        self._rtt_ns, self._offset_ns = min(samples)
+        self._syncs += 1
+        logging.debug(
+            f"Synced server clock, {self.offset_ms:+.3f} ms from local,"
+            f" round trip {self._rtt_ns / 1e6:.3f} ms"
+        )
+        return True
+
+    def observe_date(self, date: str | None, sent_ns: int):
+        """Check the estimate against the Date header of a response to a
+        request sent at `sent_ns` (`monotonic_ns`)"""
+        received_ns = self._monotonic_ns()
+        if date is None or received_ns - self._checked_ns < _DATE_CHECK_NS:
+            return
+        self._checked_ns = received_ns
+        try:
+            date_ns = int(parsedate_to_datetime(date).timestamp()) * 1_000_000_000
+        except (TypeError, ValueError):
+            return
+        # the server stamped within the round trip, during the second of Date
+        low = date_ns - received_ns - _DATE_MARGIN_NS
+        high = date_ns + 1_000_000_000 - sent_ns + _DATE_MARGIN_NS
+        if low <= self._offset_ns <= high:
+            return
+        self._offset_ns = min(max(self._offset_ns, low), high)
+        self._corrections += 1
+        logging.warning(
+            f"Server clock estimate off per Date header, now {self.offset_ms:+.3f} ms"
+            " from local"
+        )
+        self.resync()
+
+    def resync(self):
+        """Sync again without waiting for the next refresh"""
+        if self._stale is not None:
+            self._stale.set()
+
+    async def start(self, endpoint):
+        """Sync with `endpoint`, then keep syncing in the background. Does
+        nothing if already started"""
+        if self._task is not None:
+            return
+        await self.sync(endpoint)
+        self._stale = asyncio.Event()
+        self._task = asyncio.create_task(self._refresh(endpoint))
+
+    async def _refresh(self, endpoint):
+        while True:
+            try:
+                await asyncio.wait_for(self._stale.wait(), self._refresh_s)
+            except asyncio.TimeoutError:
+                pass
+            self._stale.clear()
+            try:
+                await self.sync(endpoint)
+            except Exception:
+                # the estimate is kept, the next refresh tries again
+                logging.exception("Failed to sync server clock")
+
+    async def stop(self):
+        """Stop syncing. Errors of background syncs are only logged, an error
+        is raised only if the refresh loop itself failed"""
+        if self._task is not None:
+            task = self._task
+            self._task = None
+            self._stale = None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -16,3 +16,18 @@ class BnceOrderTimeInForce(str, Enum):
     """Only GTC is supported"""
 
     GOOD_TILL_CANCEL = "GTC"
+
+
+class BnceOrderRespType(str, Enum):
+    """Detail of order placement responses (newOrderRespType)"""
+
+    ACK = "ACK"
+    RESULT = "RESULT"
+    FULL = "FULL"
+
+
+class BnceTransport(str, Enum):
+    """Transport used to reach the exchange"""
+
+    REST = "rest"
+    WEBSOCKET = "ws"
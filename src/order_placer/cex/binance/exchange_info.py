@@ -0,0 +1,107 @@
+from decimal import Decimal
+import json
+import logging
+import os
+import tempfile
+import time
+
+import aiohttp
+
+
+class BnceSymbolFilters:
+    """PRICE_FILTER, LOT_SIZE and NOTIONAL limits of a single symbol"""
+
+    __slots__ = (
+        "symbol",
+        "trading",
+        "tick_size",
+        "step_size",
+        "min_price",
+        "max_price",
+        "min_qty",
+        "max_qty",
+        "min_notional",
+    )
+
+    def __init__(self, info: dict) -> None:
+        filters = {f["filterType"]: f for f in info.get("filters", [])}
+        price_filter = filters.get("PRICE_FILTER", {})
+        lot_size = filters.get("LOT_SIZE", {})
+        notional = filters.get("NOTIONAL", filters.get("MIN_NOTIONAL", {}))
+
+        self.symbol: str = info["symbol"]
+        self.trading: bool = info.get("status", "TRADING") == "TRADING"
+        self.tick_size = Decimal(price_filter.get("tickSize", "0"))
+        self.step_size = Decimal(lot_size.get("stepSize", "0"))
+        self.min_price = Decimal(price_filter.get("minPrice", "0"))
+        self.max_price = Decimal(price_filter.get("maxPrice", "0"))
+        self.min_qty = Decimal(lot_size.get("minQty", "0"))
+        self.max_qty = Decimal(lot_size.get("maxQty", "0"))
+        self.min_notional = Decimal(notional.get("minNotional", "0"))
+
+
+class BnceExchangeInfoCache:
+    """On disk cache of /api/v3/exchangeInfo with a per symbol filter index.
+
+    The heavy endpoint is only requested when the cached file is older than
+    `ttl_s`. Without `fp` it is only kept in memory. Filters in memory expire
+    as the file does, so a long running process picks up new ones.
+    """
+
+    def __init__(self, fp: str | None, ttl_s: float = 3600) -> None:
+        self._fp = fp
+        self._ttl_s = ttl_s
+        self._symbols: dict[str, BnceSymbolFilters] | None = None
+        # wall time the filters in memory were retrieved at
+        self._retrieved_s = 0.0
+
+    def _read(self) -> tuple[dict, float] | None:
+        """Cached data and its modification time, None if stale or missing"""
+        if self._fp is None:
+            return None
+        try:
+            mtime = os.path.getmtime(self._fp)
+            if time.time() - mtime > self._ttl_s:
+                return None
+            with open(self._fp, "r") as f:
+                return json.load(f), mtime
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, data: dict):
+        """Write atomically so concurrent runs never read a partial file"""
+        dirname = os.path.dirname(self._fp) or "."
+        os.makedirs(dirname, exist_ok=True)
+        fd, tmp_fp = tempfile.mkstemp(dir=dirname, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_fp, self._fp)
+
+    async def get_symbols(self, endpoint) -> dict[str, BnceSymbolFilters]:
+        """Returns filters by symbol, from cache if fresh else from `endpoint`"""
+        if (
+            self._symbols is not None
+            and time.time() - self._retrieved_s <= self._ttl_s
+        ):
+            return self._symbols
+
+        cached = self._read()
+        if cached is None:
+            logging.info("Retrieving exchange info")
+            resp: aiohttp.ClientResponse = await endpoint.get_symbols()
+            resp.raise_for_status()
+            data = await resp.json()
+            self._retrieved_s = time.time()
+            try:
+                if self._fp is not None:
+                    self._write(data)
+            except OSError as e:
+                logging.warning(f"Unable to cache exchange info at {self._fp}. {e}")
+        else:
+            data, self._retrieved_s = cached
+            logging.info(f"Using cached exchange info {self._fp}")
+
+        self._symbols = {
+            info["symbol"]: BnceSymbolFilters(info) for info in data["symbols"]
+        }
+        return self._symbols
@@ -0,0 +1,72 @@
+from decimal import ROUND_CEILING, Decimal, InvalidOperation
+
+from order_placer.cex.binance.exchange_info import BnceSymbolFilters
+
+
+def split_decimal(value: str) -> tuple[int, int] | None:
+    """Mantissa and number of decimals of a positive decimal string, None if
+    not a positive number"""
+    int_part, _, frac = value.partition(".")
+    if (int_part.isdigit() or not int_part) and (frac.isdigit() or not frac):
+        if int_part or frac:
+            mantissa = int(int_part + frac)
+            return (mantissa, len(frac)) if mantissa else None
+        return None
+    try:
+        d = Decimal(value)
+    except InvalidOperation:
+        return None
+    if not d.is_finite() or d <= 0:
+        return None
+    exp = d.as_tuple().exponent
+    if exp >= 0:
+        return int(d), 0
+    return int(d.scaleb(-exp)), -exp
+
+
+def decimal_places(d: Decimal) -> int:
+    """Decimals of `d` without trailing zeros"""
+    return max(0, -d.normalize().as_tuple().exponent)
+
+
+def _scaled(d: Decimal, scale: int) -> int:
+    """`d` * 10**`scale`, exact when `d` has at most `scale` decimals"""
+    return int(d.scaleb(scale))
+
+
+class BnceSymbolLimits:
+    """Filters of a symbol as integers at the price and quantity scales"""
+
+    __slots__ = (
+        "trading",
+        "tick",
+        "step",
+        "min_price",
+        "max_price",
+        "min_qty",
+        "max_qty",
+        "min_notional",
+    )
+
+    def __init__(self, filters: BnceSymbolFilters, price_scale: int, qty_scale: int):
+        self.trading = filters.trading
+        self.tick = _scaled(filters.tick_size, price_scale)
+        self.step = _scaled(filters.step_size, qty_scale)
+        self.min_price = _scaled(filters.min_price, price_scale)
+        self.max_price = _scaled(filters.max_price, price_scale)
+        self.min_qty = _scaled(filters.min_qty, qty_scale)
+        self.max_qty = _scaled(filters.max_qty, qty_scale)
+        # price * qty is at the sum of both scales and an integer
+        self.min_notional = int(
+            filters.min_notional.scaleb(price_scale + qty_scale).to_integral_value(
+                ROUND_CEILING
+            )
+        )
+
+
+def format_fixed(value: int, scale: int) -> str:
+    """Decimal string of fixed point `value` with `scale` decimals"""
+    if scale == 0:
+        return str(value)
+    digits = str(value).rjust(scale + 1, "0")
+    return f"{digits[:-scale]}.{digits[-scale:]}"
@@ -1,15 +1,28 @@
 import asyncio
 from decimal import Decimal
+import hashlib
+import hmac
 import random
 import time
+from time import perf_counter_ns
+from typing import Iterable
 import uuid
 
 import aiohttp
 
-from order_placer.cex.binance.enums import BnceOrderSide, BnceOrderType, BnceOrderTimeInForce
+from order_placer.cex.binance.enums import (
+    BnceOrderRespType,
+    BnceOrderSide,
+    BnceOrderTimeInForce,
+    BnceOrderType,
+)
 from order_placer.cex.core.throttler import AsyncThrottler
+from order_placer.core.metrics import LatencyScope
 from order_placer.core.mock import MockClientResponse
 
+# fields of ACK order responses
+_ACK_FIELDS = ("symbol", "orderId", "orderListId", "clientOrderId", "transactTime")
+
 _VALID_API_SECRET_KEY_PAIR = {
     ("1api", "1secret"),
     ("2api", "2secret"),
@@ -17,6 +30,114 @@ _VALID_API_SECRET_KEY_PAIR = {
 }
 
 
+def mock_signature(query_string: str, secret_key: str) -> str:
+    """Signature binance expects of a signed request, checked by the mock servers"""
+    return hmac.new(
+        secret_key.encode("utf-8"), query_string.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def mock_exchange_info() -> dict:
+    """/api/v3/exchangeInfo response served by mocks"""
+    return {
+        "timezone": "UTC",
+        "serverTime": int(time.time() * 1000),
+        "rateLimits": [],
+        "exchangeFilters": [],
+        "symbols": [
+            {
+                "symbol": "ETHBTC",
+                "status": "TRADING",
+                "baseAsset": "ETH",
+                "quoteAsset": "BTC",
+                "filters": [
+                    {
+                        "filterType": "PRICE_FILTER",
+                        "minPrice": "0.00001000",
+                        "maxPrice": "922327.00000000",
+                        "tickSize": "0.00001000",
+                    },
+                    {
+                        "filterType": "LOT_SIZE",
+                        "minQty": "0.00010000",
+                        "maxQty": "100000.00000000",
+                        "stepSize": "0.00010000",
+                    },
+                    {"filterType": "NOTIONAL", "minNotional": "0.00010000"},
+                ],
+            },
+            {
+                "symbol": "JTOUSDT",
+                "status": "TRADING",
+                "baseAsset": "JTO",
+                "quoteAsset": "USDT",
+                "filters": [
+                    {
+                        "filterType": "PRICE_FILTER",
+                        "minPrice": "0.00010000",
+                        "maxPrice": "1000.00000000",
+                        "tickSize": "0.00010000",
+                    },
+                    {
+                        "filterType": "LOT_SIZE",
+                        "minQty": "0.00100000",
+                        "maxQty": "92141578.00000000",
+                        "stepSize": "0.00100000",
+                    },
+                    {"filterType": "NOTIONAL", "minNotional": "5.00000000"},
+                ],
+            },
+        ],
+    }
+
+
+def mock_all_orders(
+    orders: Iterable[dict],
+    symbol: str,
+    start_time_ms: int | None = None,
+    order_id: int | None = None,
+    limit: int = 500,
+) -> list[dict]:
+    """/api/v3/allOrders response served by mocks, orders of `symbol` from
+    `order_id` (else placed since `start_time_ms`) by order id"""
+    selected = sorted(
+        (
+            order
+            for order in orders
+            if order["symbol"] == symbol
+            and (order_id is None or order["orderId"] >= order_id)
+            and (
+                order_id is not None
+                or start_time_ms is None
+                or order["transactTime"] >= start_time_ms
+            )
+        ),
+        key=lambda order: order["orderId"],
+    )
+    return selected[: min(limit, 1000)]
+
+
+def mock_order_response(order: dict, resp_type: str | None) -> dict:
+    """POST /api/v3/order response of `order` per newOrderRespType, FULL by
+    default like binance limit orders"""
+    if resp_type == "ACK":
+        return {name: order[name] for name in _ACK_FIELDS}
+    if resp_type == "RESULT":
+        return dict(order)
+    return {**order, "fills": []}
+
+
+def mock_cancel_open_orders(orders: Iterable[dict], symbol: str) -> list[dict]:
+    """Cancel open `orders` of `symbol`, returns them like DELETE
+    /api/v3/openOrders"""
+    cancelled = []
+    for order in orders:
+        if order["symbol"] == symbol and order["status"] == "NEW":
+            order["status"] = "CANCELED"
+            cancelled.append(order)
+    return cancelled
+
+
 class MockBnceRestEndpointV3:
     def __init__(
         self,
@@ -24,12 +145,15 @@ class MockBnceRestEndpointV3:
         api_key: str | None = None,
         secret_key: str | None = None,
         mock_failure_rate: float = 0.0,
+        latency: LatencyScope | None = None,
     ):
         self._api_key = api_key
         self._secret_key = secret_key
         self._throttler = AsyncThrottler(50, 5)
         self._order_counter = 0
         self._mock_failure_rate = mock_failure_rate
+        self._orders: dict[str, dict] = {}  # by client order id
+        self._latency = latency
 
     async def get_symbols(self) -> aiohttp.ClientResponse:
         await self._throttler.acquire()
@@ -37,26 +161,13 @@ class MockBnceRestEndpointV3:
             "GET",
             "/api/v3/exchangeInfo",
             200,
-            {
-                "timezone": "UTC",
-                "serverTime": int(time.time() * 1000),
-                "rateLimits": [],
-                "exchangeFilters": [],
-                "symbols": [
-                    {
-                        "symbol": "ETHBTC",
-                        "status": "TRADING",
-                        "baseAsset": "ETH",
-                        "quoteAsset": "BTC",
-                    },
-                    {
-                        "symbol": "JTOUSDT",
-                        "status": "TRADING",
-                        "baseAsset": "JTO",
-                        "quoteAsset": "USDT",
-                    },
-                ],
-            },
+            mock_exchange_info(),
+        )
+
+    async def get_server_time(self) -> tuple[int, aiohttp.ClientResponse]:
+        await self._throttler.acquire()
+        return time.monotonic_ns(), MockClientResponse(
+            "GET", "/api/v3/time", 200, {"serverTime": int(time.time() * 1000)}
         )
 
     async def get_account_info(self) -> aiohttp.ClientResponse:
@@ -65,34 +176,149 @@ class MockBnceRestEndpointV3:
             return MockClientResponse("GET", "/api/v3/account", 200, {})
         return MockClientResponse("GET", "/api/v3/account", 401, None, "Unauthorized")
 
+    def prepare_order(
+        self,
+        symbol: str,
+        qty: Decimal | str,
+        price: Decimal | str,
+        side: BnceOrderSide | None = None,
+        type: BnceOrderType | None = None,
+        time_in_force: BnceOrderTimeInForce | None = None,
+        client_order_id: str | None = None,
+        resp_type: BnceOrderRespType | None = None,
+    ) -> tuple:
+        return (
+            symbol, qty, price, side, type, time_in_force, client_order_id, resp_type
+        )
+
+    async def post_prepared_order(self, prepared: tuple) -> aiohttp.ClientResponse:
+        return await self.post_order(*prepared)
+
     async def post_order(
         self,
         symbol: str,
-        qty: Decimal,
-        price: Decimal,
+        qty: Decimal | str,
+        price: Decimal | str,
         side: BnceOrderSide | None = None,
         type: BnceOrderType | None = None,
         time_in_force: BnceOrderTimeInForce | None = None,
+        client_order_id: str | None = None,
+        resp_type: BnceOrderRespType | None = None,
     ) -> aiohttp.ClientResponse:
         self._order_counter += 1
         cnt = self._order_counter
+        client_order_id = client_order_id or uuid.uuid1().hex
+        start_ns = perf_counter_ns()
         await self._throttler.acquire()
+        acquired_ns = perf_counter_ns()
         # simulate delay of between (200ms to 500ms)
         await asyncio.sleep(random.uniform(0.2, 0.5))
+        if self._latency is not None:
+            self._latency.record("throttle", acquired_ns - start_ns)
+            self._latency.record("round_trip", perf_counter_ns() - acquired_ns)
+        if client_order_id in self._orders:
+            return MockClientResponse(
+                "POST",
+                "/api/v3/order",
+                400,
+                {"code": -2010, "msg": "Duplicate order sent."},
+            )
         # if mock fail rate is set check if fail
         if random.random() < self._mock_failure_rate:
+            # like binance 5xx the outcome is unknown, half of them are placed
+            if random.random() < 0.5:
+                self._orders[client_order_id] = self._order_resp(
+                    symbol, cnt, client_order_id, side, qty, price
+                )
             return MockClientResponse(
                 "POST", "/api/v3/order", 500, None, reason="Internal server error."
             )
+        self._orders[client_order_id] = self._order_resp(
+            symbol, cnt, client_order_id, side, qty, price
+        )
         return MockClientResponse(
             "POST",
             "/api/v3/order",
             200,
-            {
-                "symbol": symbol,
-                "orderId": cnt,
-                "orderListId": -1,
-                "clientOrderId": uuid.uuid1(),
-                "transactTime": int(time.time() * 1000),
-            },
+            mock_order_response(
+                self._orders[client_order_id],
+                resp_type.value if resp_type is not None else None,
+            ),
+        )
+
+    async def get_order(
+        self, symbol: str, client_order_id: str
+    ) -> aiohttp.ClientResponse:
+        await self._throttler.acquire()
+        if client_order_id in self._orders:
+            return MockClientResponse(
+                "GET", "/api/v3/order", 200, self._orders[client_order_id]
+            )
+        return MockClientResponse(
+            "GET",
+            "/api/v3/order",
+            400,
+            {"code": -2013, "msg": "Order does not exist."},
         )
+
+    async def get_open_orders(self, symbol: str) -> aiohttp.ClientResponse:
+        await self._throttler.acquire()
+        return MockClientResponse(
+            "GET",
+            "/api/v3/openOrders",
+            200,
+            [
+                order
+                for order in self._orders.values()
+                if order["symbol"] == symbol and order["status"] == "NEW"
+            ],
+        )
+
+    async def get_all_orders(
+        self,
+        symbol: str,
+        start_time_ms: int | None = None,
+        order_id: int | None = None,
+        limit: int = 1000,
+    ) -> aiohttp.ClientResponse:
+        await self._throttler.acquire()
+        return MockClientResponse(
+            "GET",
+            "/api/v3/allOrders",
+            200,
+            mock_all_orders(
+                self._orders.values(), symbol, start_time_ms, order_id, limit
+            ),
+        )
+
+    async def cancel_open_orders(self, symbol: str) -> aiohttp.ClientResponse:
+        cancelled = mock_cancel_open_orders(self._orders.values(), symbol)
+        if not cancelled:
+            return MockClientResponse(
+                "DELETE",
+                "/api/v3/openOrders",
+                400,
+                {"code": -2011, "msg": "Unknown order sent."},
+            )
+        return MockClientResponse("DELETE", "/api/v3/openOrders", 200, cancelled)
+
+    def _order_resp(
+        self,
+        symbol: str,
+        order_id: int,
+        client_order_id: str,
+        side: BnceOrderSide,
+        qty: Decimal | str,
+        price: Decimal | str,
+    ) -> dict:
+        return {
+            "symbol": symbol,
+            "orderId": order_id,
+            "orderListId": -1,
+            "clientOrderId": client_order_id,
+            "transactTime": int(time.time() * 1000),
+            "price": str(price),
+            "origQty": str(qty),
+            "side": side.value,
+            "status": "NEW",
+        }
@@ -0,0 +1,388 @@
+import asyncio
+import math
+import random
+import time
+import urllib.parse
+import uuid
+
+from aiohttp import web
+
+from order_placer.cex.binance.mock import (
+    _VALID_API_SECRET_KEY_PAIR,
+    mock_all_orders,
+    mock_cancel_open_orders,
+    mock_exchange_info,
+    mock_order_response,
+    mock_signature,
+)
+from order_placer.cex.binance.rate_limits import (
+    BNCE_DEFAULT_RATE_LIMITS,
+    BNCE_ENDPOINT_WEIGHTS,
+    RateLimitScope,
+    _DEFAULT_ENDPOINT_WEIGHT,
+    _RATE_LIMIT_SCOPE,
+    _bucket_name,
+)
+
+_SECRET_KEYS = dict(_VALID_API_SECRET_KEY_PAIR)
+_INTERVAL_S = {"SECOND": 1, "MINUTE": 60, "HOUR": 60 * 60, "DAY": 60 * 60 * 24}
+# used weight/count response header of each rate limit type
+_HEADER_PREFIX = {
+    "REQUEST_WEIGHT": "X-MBX-USED-WEIGHT-",
+    "ORDERS": "X-MBX-ORDER-COUNT-",
+}
+
+
+class _FixedWindowCounter:
+    """Binance style fixed window usage counter"""
+
+    __slots__ = ("limit", "interval_s", "window", "used")
+
+    def __init__(self, limit: int, interval_s: int) -> None:
+        self.limit = limit
+        self.interval_s = interval_s
+        self.window = 0
+        self.used = 0
+
+    def _roll(self, now: float):
+        window = int(now // self.interval_s)
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+    def add(self, weight: int, now: float) -> int:
+        self._roll(now)
+        self.used += weight
+        return self.used
+
+    def retry_after_s(self, now: float) -> int:
+        return math.ceil((self.window + 1) * self.interval_s - now)
+
+
+class MockBnceRateLimits:
+    """Exchange side accounting of `rate_limits` (exchangeInfo format) with
+    fixed windows, ip scoped limits by client address and order limits by api
+    key. Requests past a limit get a 429 with Retry-After, a client that keeps
+    sending `ban_after` of them is banned (418) for `ban_s`."""
+
+    def __init__(
+        self,
+        rate_limits: list[dict] | None = None,
+        ban_after: int = 10,
+        ban_s: int = 120,
+    ) -> None:
+        self._rate_limits = rate_limits or BNCE_DEFAULT_RATE_LIMITS
+        self._ban_after = ban_after
+        self._ban_s = ban_s
+        self._counters: dict[tuple, _FixedWindowCounter] = {}
+        self._violations: dict[str, int] = {}  # requests past 429 by ip
+        self._banned_until: dict[str, float] = {}
+
+    def count(
+        self, ip: str, api_key: str | None, endpoint: str, now: float
+    ) -> tuple[dict, tuple[int, int, str] | None]:
+        """Add weight of `endpoint` at epoch time `now`, returns usage headers
+        and (status, code, msg) of the error if a limit is exceeded"""
+        if self._banned_until.get(ip, 0) > now:
+            retry_after = math.ceil(self._banned_until[ip] - now)
+            return {"Retry-After": str(retry_after)}, (418, -1003, "IP banned.")
+
+        weights = BNCE_ENDPOINT_WEIGHTS.get(endpoint, _DEFAULT_ENDPOINT_WEIGHT)
+        headers = {}
+        retry_after = 0
+        for rate_limit in self._rate_limits:
+            limit_type = rate_limit["rateLimitType"]
+            if limit_type not in weights:
+                continue
+            scope = _RATE_LIMIT_SCOPE.get(limit_type)
+            key = (ip if scope == RateLimitScope.IP else api_key, _bucket_name(rate_limit))
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = _FixedWindowCounter(
+                    rate_limit["limit"],
+                    rate_limit["intervalNum"] * _INTERVAL_S[rate_limit["interval"]],
+                )
+            used = counter.add(weights[limit_type], now)
+            if limit_type in _HEADER_PREFIX:
+                suffix = _bucket_name(rate_limit).rsplit("_", 1)[1]
+                headers[_HEADER_PREFIX[limit_type] + suffix] = str(used)
+            if used > counter.limit:
+                retry_after = max(retry_after, counter.retry_after_s(now))
+
+        if retry_after:
+            self._violations[ip] = self._violations.get(ip, 0) + 1
+            if self._violations[ip] > self._ban_after:
+                self._banned_until[ip] = now + self._ban_s
+                self._violations[ip] = 0
+                headers["Retry-After"] = str(self._ban_s)
+                return headers, (418, -1003, "IP banned.")
+            headers["Retry-After"] = str(retry_after)
+            return headers, (429, -1003, "Too many requests.")
+        return headers, None
+
+
+class MockBnceRestServer:
+    """Loopback stand-in for the binance spot rest api, no network required.
+
+    Serves /api/v3/order (POST, GET), /api/v3/openOrders (GET, DELETE),
+    /api/v3/allOrders, /api/v3/account, /api/v3/ping, /api/v3/time and
+    /api/v3/exchangeInfo on http://{host}:{port} so the real `BnceRestEndpointV3` (signing, url
+    building, session and connection pool) can be exercised end to end. Signatures, api keys and recvWindow are
+    verified against `secret_keys` (by api key), the mock key pairs by default.
+    `rate_limits` (exchangeInfo format) are enforced by `MockBnceRateLimits`
+    with `ban_after` and `ban_s`. Every response carries the
+    X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* headers.
+
+    Latency is log normal around `latency_median_s`. `error_rate` of orders fail
+    with a 5xx whose outcome is unknown, like binance half of them are placed.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rate_limits: list[dict] | None = None,
+        latency_median_s: float = 0.0,
+        latency_sigma: float = 0.0,
+        error_rate: float = 0.0,
+        ban_after: int = 10,
+        ban_s: int = 120,
+        secret_keys: dict[str, str] | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._rate_limits = rate_limits or BNCE_DEFAULT_RATE_LIMITS
+        self._latency_median_s = latency_median_s
+        self._latency_sigma = latency_sigma
+        self._error_rate = error_rate
+        self._limits = MockBnceRateLimits(self._rate_limits, ban_after, ban_s)
+        self._secret_keys = secret_keys or _SECRET_KEYS
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+
+        self._order_counter = 0
+        self._orders: dict[str, dict[str, dict]] = {}  # by api key, client order id
+
+        self._app = web.Application()
+        self._app.router.add_get("/api/v3/ping", self._ping)
+        self._app.router.add_get("/api/v3/time", self._time)
+        self._app.router.add_get("/api/v3/exchangeInfo", self._exchange_info)
+        self._app.router.add_get("/api/v3/account", self._account)
+        self._app.router.add_post("/api/v3/order", self._post_order)
+        self._app.router.add_get("/api/v3/order", self._get_order)
+        self._app.router.add_get("/api/v3/openOrders", self._open_orders)
+        self._app.router.add_delete("/api/v3/openOrders", self._cancel_open_orders)
+        self._app.router.add_get("/api/v3/allOrders", self._all_orders)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._host}:{self._port}"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def start(self):
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        # resolve port when bound to 0
+        self._port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _count(
+        self, request: web.Request, api_key: str | None, endpoint: str
+    ) -> tuple[dict, web.Response | None]:
+        """Add weight of `endpoint`, returns usage headers and a 429/418 response
+        if a limit is exceeded"""
+        headers, error = self._limits.count(
+            request.remote, api_key, endpoint, time.time()
+        )
+        if error is not None:
+            return headers, _error(*error, headers)
+        return headers, None
+
+    def _authorize(
+        self, request: web.Request, endpoint: str
+    ) -> tuple[str | None, dict, dict, web.Response | None]:
+        """Verify and count a signed request, returns api key, params, usage
+        headers and an error response if it must be rejected"""
+        api_key, params, error = self._verify(request)
+        headers, limit_error = self._count(request, api_key, endpoint)
+        if limit_error is not None:
+            return api_key, params, headers, limit_error
+        if error is not None:
+            error.headers.update(headers)
+        return api_key, params, headers, error
+
+    def _verify(self, request: web.Request) -> tuple[str | None, dict, web.Response | None]:
+        """Returns api key, params and an error response if the signature,
+        api key or timestamp is invalid"""
+        api_key = request.headers.get("X-MBX-APIKEY")
+        secret_key = self._secret_keys.get(api_key)
+        query_string = request.query_string
+        params = dict(urllib.parse.parse_qsl(query_string))
+        if secret_key is None:
+            return api_key, params, _error(
+                401, -2015, "Invalid API-key, IP, or permissions for action."
+            )
+        payload, _, signature = query_string.rpartition("&signature=")
+        if not payload or signature != mock_signature(payload, secret_key):
+            return api_key, params, _error(
+                400, -1022, "Signature for this request is not valid."
+            )
+        recv_window = int(params.get("recvWindow", 5000))
+        timestamp = int(params.get("timestamp", 0))
+        now_ms = int(time.time() * 1000)
+        if timestamp > now_ms + 1000 or now_ms - timestamp > recv_window:
+            return api_key, params, _error(
+                400, -1021, "Timestamp for this request is outside of the recvWindow."
+            )
+        return api_key, params, None
+
+    async def _delay(self):
+        if self._latency_median_s:
+            await asyncio.sleep(
+                self._latency_median_s
+                * math.exp(self._latency_sigma * self._random.gauss(0, 1))
+            )
+
+    async def _ping(self, request: web.Request) -> web.Response:
+        headers, error = self._count(request, None, "GET /api/v3/ping")
+        if error is not None:
+            return error
+        await self._delay()
+        return web.json_response({}, headers=headers)
+
+    async def _time(self, request: web.Request) -> web.Response:
+        headers, error = self._count(request, None, "GET /api/v3/time")
+        if error is not None:
+            return error
+        await self._delay()
+        return web.json_response(
+            {"serverTime": int(time.time() * 1000)}, headers=headers
+        )
+
+    async def _exchange_info(self, request: web.Request) -> web.Response:
+        headers, error = self._count(request, None, "GET /api/v3/exchangeInfo")
+        if error is not None:
+            return error
+        await self._delay()
+        data = mock_exchange_info()
+        data["rateLimits"] = self._rate_limits
+        return web.json_response(data, headers=headers)
+
+    async def _account(self, request: web.Request) -> web.Response:
+        api_key, _, headers, error = self._authorize(request, "GET /api/v3/account")
+        if error is not None:
+            return error
+        await self._delay()
+        return web.json_response({"balances": []}, headers=headers)
+
+    async def _post_order(self, request: web.Request) -> web.Response:
+        api_key, params, headers, error = self._authorize(request, "POST /api/v3/order")
+        if error is not None:
+            return error
+        await self._delay()
+
+        orders = self._orders.setdefault(api_key, {})
+        client_order_id = params.get("newClientOrderId") or uuid.uuid4().hex
+        if client_order_id in orders:
+            return _error(400, -2010, "Duplicate order sent.", headers)
+        self._order_counter += 1
+        order = {
+            "symbol": params.get("symbol"),
+            "orderId": self._order_counter,
+            "orderListId": -1,
+            "clientOrderId": client_order_id,
+            "transactTime": int(time.time() * 1000),
+            "price": params.get("price"),
+            "origQty": params.get("quantity"),
+            "side": params.get("side"),
+            "type": params.get("type"),
+            "timeInForce": params.get("timeInForce"),
+            "status": "NEW",
+        }
+        if self._random.random() < self._error_rate:
+            if self._random.random() < 0.5:
+                orders[client_order_id] = order
+            return _error(503, -1007, "Timeout waiting for response from backend server.")
+        orders[client_order_id] = order
+        return web.json_response(
+            mock_order_response(order, params.get("newOrderRespType")), headers=headers
+        )
+
+    async def _get_order(self, request: web.Request) -> web.Response:
+        api_key, params, headers, error = self._authorize(request, "GET /api/v3/order")
+        if error is not None:
+            return error
+        await self._delay()
+        order = self._orders.get(api_key, {}).get(params.get("origClientOrderId"))
+        if order is None:
+            return _error(400, -2013, "Order does not exist.", headers)
+        return web.json_response(order, headers=headers)
+
+    async def _open_orders(self, request: web.Request) -> web.Response:
+        api_key, params, headers, error = self._authorize(request, "GET /api/v3/openOrders")
+        if error is not None:
+            return error
+        await self._delay()
+        symbol = params.get("symbol")
+        return web.json_response(
+            [
+                order
+                for order in self._orders.get(api_key, {}).values()
+                if order["status"] == "NEW" and symbol in (None, order["symbol"])
+            ],
+            headers=headers,
+        )
+
+    async def _cancel_open_orders(self, request: web.Request) -> web.Response:
+        api_key, params, headers, error = self._authorize(
+            request, "DELETE /api/v3/openOrders"
+        )
+        if error is not None:
+            return error
+        await self._delay()
+        if "symbol" not in params:
+            return _error(400, -1102, "Mandatory parameter 'symbol' was not sent.", headers)
+        cancelled = mock_cancel_open_orders(
+            self._orders.get(api_key, {}).values(), params["symbol"]
+        )
+        if not cancelled:
+            return _error(400, -2011, "Unknown order sent.", headers)
+        return web.json_response(cancelled, headers=headers)
+
+    async def _all_orders(self, request: web.Request) -> web.Response:
+        api_key, params, headers, error = self._authorize(request, "GET /api/v3/allOrders")
+        if error is not None:
+            return error
+        await self._delay()
+        if "symbol" not in params:
+            return _error(400, -1102, "Mandatory parameter 'symbol' was not sent.", headers)
+        return web.json_response(
+            mock_all_orders(
+                self._orders.get(api_key, {}).values(),
+                params["symbol"],
+                int(params["startTime"]) if "startTime" in params else None,
+                int(params["orderId"]) if "orderId" in params else None,
+                int(params.get("limit", 500)),
+            ),
+            headers=headers,
+        )
+
+
+def _error(
+    status: int, code: int, msg: str, headers: dict | None = None
+) -> web.Response:
+    return web.json_response({"code": code, "msg": msg}, status=status, headers=headers)
+
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import random
+import time
+import urllib.parse
+import uuid
+
+from aiohttp import WSMsgType, web
+
+from order_placer.cex.binance.mock import (
+    _VALID_API_SECRET_KEY_PAIR,
+    mock_all_orders,
+    mock_cancel_open_orders,
+    mock_exchange_info,
+    mock_order_response,
+    mock_signature,
+)
+
+_SECRET_KEYS = dict(_VALID_API_SECRET_KEY_PAIR)
+
+
+class MockBnceWsServer:
+    """Local stand-in for the binance websocket api, no network required.
+
+    Serves `order.place`, `order.status`, `openOrders.status`,
+    `openOrders.cancelAll`, `allOrders`, `account.status` and `exchangeInfo` on
+    ws://{host}:{port}/ws-api/v3, verifies signatures against the mock key pairs
+    and replies out of order after a random delay in `latency_s`.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        mock_failure_rate: float = 0.0,
+        latency_s: tuple[float, float] = (0.0, 0.0),
+        seed: int | None = None,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._mock_failure_rate = mock_failure_rate
+        self._latency_s = latency_s
+        self._random = random.Random(seed)
+        self._order_counter = 0
+        self._orders: dict[str, dict[str, dict]] = {}  # by api key, client order id
+        self._runner: web.AppRunner | None = None
+
+        self._app = web.Application()
+        self._app.router.add_get("/ws-api/v3", self._handle)
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self._host}:{self._port}/ws-api/v3"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def start(self):
+        self._runner = web.AppRunner(self._app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        # resolve port when bound to 0
+        self._port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        replies = set()
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            reply = asyncio.create_task(self._reply(ws, json.loads(msg.data)))
+            replies.add(reply)
+            reply.add_done_callback(replies.discard)
+        for reply in replies:
+            reply.cancel()
+        return ws
+
+    async def _reply(self, ws: web.WebSocketResponse, req: dict):
+        await asyncio.sleep(self._random.uniform(*self._latency_s))
+        resp = {"id": req["id"], "rateLimits": []}
+        resp.update(self._dispatch(req["method"], req.get("params", {})))
+        if not ws.closed:
+            await ws.send_str(json.dumps(resp))
+
+    def _dispatch(self, method: str, params: dict) -> dict:
+        if method == "exchangeInfo":
+            return {"status": 200, "result": mock_exchange_info()}
+        if method == "time":
+            return {"status": 200, "result": {"serverTime": int(time.time() * 1000)}}
+        if method not in (
+            "order.place",
+            "order.status",
+            "openOrders.status",
+            "openOrders.cancelAll",
+            "allOrders",
+            "account.status",
+        ):
+            return _error(400, -1100, f"Unknown method {method}")
+
+        error = self._verify_signature(params)
+        if error:
+            return error
+        if method == "account.status":
+            return {"status": 200, "result": {}}
+        orders = self._orders.setdefault(params["apiKey"], {})
+        if method == "order.status":
+            order = orders.get(params["origClientOrderId"])
+            if order is None:
+                return _error(400, -2013, "Order does not exist.")
+            return {"status": 200, "result": order}
+        if method == "openOrders.status":
+            return {
+                "status": 200,
+                "result": [
+                    order
+                    for order in orders.values()
+                    if order["status"] == "NEW"
+                    and params.get("symbol") in (None, order["symbol"])
+                ],
+            }
+        if method == "openOrders.cancelAll":
+            cancelled = mock_cancel_open_orders(orders.values(), params["symbol"])
+            if not cancelled:
+                return _error(400, -2011, "Unknown order sent.")
+            return {"status": 200, "result": cancelled}
+        if method == "allOrders":
+            return {
+                "status": 200,
+                "result": mock_all_orders(
+                    orders.values(),
+                    params["symbol"],
+                    params.get("startTime"),
+                    params.get("orderId"),
+                    params.get("limit", 500),
+                ),
+            }
+
+        client_order_id = params.get("newClientOrderId", uuid.uuid4().hex)
+        if client_order_id in orders:
+            return _error(400, -2010, "Duplicate order sent.")
+        self._order_counter += 1
+        order = {
+            "symbol": params["symbol"],
+            "orderId": self._order_counter,
+            "orderListId": -1,
+            "clientOrderId": client_order_id,
+            "transactTime": int(time.time() * 1000),
+            "price": params["price"],
+            "origQty": params["quantity"],
+            "side": params["side"],
+            "status": "NEW",
+        }
+        if self._random.random() < self._mock_failure_rate:
+            # like binance 5xx the outcome is unknown, half of them are placed
+            if self._random.random() < 0.5:
+                orders[client_order_id] = order
+            return _error(500, -1001, "Internal error; unable to process your request.")
+        orders[client_order_id] = order
+        return {
+            "status": 200,
+            "result": mock_order_response(order, params.get("newOrderRespType")),
+        }
+
+    def _verify_signature(self, params: dict) -> dict | None:
+        params = dict(params)
+        signature = params.pop("signature", None)
+        secret_key = _SECRET_KEYS.get(params.get("apiKey"))
+        if secret_key is None:
+            return _error(401, -2015, "Invalid API-key, IP, or permissions for action.")
+        query_string = urllib.parse.urlencode(sorted(params.items()), True)
+        if signature != mock_signature(query_string, secret_key):
+            return _error(400, -1022, "Signature for this request is not valid.")
+        return None
+
+
+def _error(status: int, code: int, msg: str) -> dict:
+    return {"status": status, "error": {"code": code, "msg": msg}}
@@ -1,67 +1,669 @@
 import asyncio
-import csv
-from decimal import Decimal
+import hashlib
 import logging
 import os
 from time import perf_counter_ns
+from typing import Callable
+import uuid
 
 import aiohttp
 
+from order_placer.cex.binance.clock import BnceServerClock, log_clock_summary
+from order_placer.cex.binance.enums import BnceOrderRespType, BnceTransport
+from order_placer.cex.binance.exchange_info import BnceExchangeInfoCache
 from order_placer.cex.binance.mock import MockBnceRestEndpointV3
+from order_placer.cex.binance.mock_rest_server import MockBnceRestServer
+from order_placer.cex.binance.mock_ws_server import MockBnceWsServer
+from order_placer.cex.binance.order_source import OrderSource, open_order_source
+from order_placer.cex.binance.order_store import (
+    BnceInvalidRow,
+    BnceOrder,
+    BnceOrderParser,
+)
+from order_placer.cex.binance.reconcile import (
+    BnceOrderReconciler,
+    BnceReconciliation,
+)
+from order_placer.cex.binance.rate_limits import (
+    BNCE_DEFAULT_RATE_LIMITS,
+    BnceRateLimiter,
+    RateLimitScope,
+    make_buckets,
+)
+from order_placer.cex.binance.response import BnceOrderAck, read_order_response
 from order_placer.cex.binance.rest_endpoint import (
     BnceRestEndpointV3,
-    BnceOrderSide,
     BnceOrderType,
     BnceOrderTimeInForce,
+    _get_timestamp_ms,
 )
-
+from order_placer.cex.binance.validation import validate_order_columns
+from order_placer.cex.binance.ws_endpoint import (
+    BNCE_WS_API_ENDPOINT,
+    BNCE_WS_API_TESTNET,
+    BnceWsEndpointV3,
+)
+from order_placer.cex.core.adaptive import AimdController, Outcome
+from order_placer.cex.core.connection import WarmUpResult, make_session, warm_up
+from order_placer.cex.core.throttler import AsyncThrottler
+from order_placer.core.journal import JournalState, OrderJournal
+from order_placer.core.log import SAMPLED
+from order_placer.core.metrics import (
+    ALL_LABEL,
+    LatencyRecorder,
+    LatencyScope,
+    make_trace_config,
+)
+from order_placer.core.retry import RetryPolicy
+from order_placer.core.scheduler import FairScheduler
 
 
 BNCE_REST_ENDPOINT = "https://api.binance.com"
 BNCE_TESTNET = "https://testnet.binance.vision"
 BNCE_MOCK_ENDPOINT = "https://mock.binance.com"
-SYMBOL_SCALE = {"JTOUSDT": 8}  # obtained from /exchangeInfo
+EXCHANGE_INFO_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "order_placer")
+
+# page size of allOrders in reconciliation, the most binance allows
+_ALL_ORDERS_LIMIT = 1000
+# allOrders are retrieved from this long before execution started, for clock skew
+_RECONCILE_MARGIN_MS = 5000
+# ip weight orders leave unused, so cancels of the kill switch go out right away
+_CANCEL_RESERVED_WEIGHT = 50
+# invalid rows logged when validation fails execution
+_MAX_INVALID_LOGGED = 20
+# rest connections warmed up by default, enough for the dns answer, tls session
+# and first orders, the rest of the pool opens as orders need it
+_WARMUP_CONNECTIONS = 8
+
+# outcome of a single order request
+_PLACED = 0
+_RETRY = 1  # not placed, sending again may succeed
+_UNKNOWN = 2  # may or may not be placed, resolved by querying the order
+_FATAL = 3
+
+# errors raised while a request is on the wire, outcome is unknown
+_TRANSIENT_EXCEPTIONS = (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError)
+
+
+class BnceOrderError(Exception):
+    """Order could not be placed"""
+
+
+class BnceCancelResult:
+    """Outcome of cancelling open orders of every account and symbol, see
+    `BnceSpotLimitOrderPlacer.cancel_all`"""
+
+    __slots__ = ("cancelled", "failed", "flat_ns")
+
+    def __init__(self) -> None:
+        self.cancelled: dict[int, int] = {}  # orders cancelled by account
+        self.failed: dict[int, list[str]] = {}  # symbols left open by account
+        # from the abort until the last symbol of the account was cancelled
+        self.flat_ns: dict[int, int] = {}
+
+    def merge(self, other: "BnceCancelResult"):
+        self.cancelled.update(other.cancelled)
+        self.failed.update(other.failed)
+        self.flat_ns.update(other.flat_ns)
+
+    def log(self):
+        for acc_id in sorted(self.flat_ns):
+            if acc_id in self.failed:
+                logging.error(
+                    f"Account {acc_id} not flat, failed to cancel open orders of"
+                    f" {self.failed[acc_id]}"
+                )
+            else:
+                logging.info(
+                    f"Account {acc_id} flat in {self.flat_ns[acc_id] / 1000000} ms,"
+                    f" cancelled {self.cancelled.get(acc_id, 0)} orders"
+                )
+
+
+class BnceExecutionResult:
+    """Outcome of `BnceSpotLimitOrderPlacer.execute`"""
+
+    __slots__ = (
+        "placed",
+        "failed",
+        "skipped",
+        "norders",
+        "elapsed_ns",
+        "latency",
+        "warmup",
+        "concurrency",
+        "reconciliation",
+        "cancelled",
+        "clock",
+    )
+
+    def __init__(
+        self,
+        placed: int = 0,
+        failed: int = 0,
+        skipped: int = 0,
+        norders: int = 0,
+        elapsed_ns: int = 0,
+        latency: LatencyRecorder | None = None,
+        warmup: WarmUpResult | None = None,
+        concurrency: list[dict] | None = None,
+        reconciliation: BnceReconciliation | None = None,
+        cancelled: BnceCancelResult | None = None,
+        clock: list[dict] | None = None,
+    ) -> None:
+        self.placed = placed
+        self.failed = failed
+        self.skipped = skipped
+        self.norders = norders
+        self.elapsed_ns = elapsed_ns
+        self.latency = latency or LatencyRecorder()
+        self.warmup = warmup or WarmUpResult()
+        # `AimdController.summary` of each process with adaptive concurrency
+        self.concurrency = concurrency or []
+        # None if orders were not reconciled with the exchange
+        self.reconciliation = reconciliation
+        # None unless execution was aborted
+        self.cancelled = cancelled
+        # `BnceServerClock.summary` of each process
+        self.clock = clock or []
+
+    def merge(self, other: "BnceExecutionResult"):
+        """Add counts of `other`, elapsed time is the longest of both"""
+        self.placed += other.placed
+        self.failed += other.failed
+        self.skipped += other.skipped
+        self.norders += other.norders
+        self.elapsed_ns = max(self.elapsed_ns, other.elapsed_ns)
+        self.latency.merge(other.latency)
+        self.warmup.merge(other.warmup)
+        self.concurrency.extend(other.concurrency)
+        self.clock.extend(other.clock)
+        if other.reconciliation is not None:
+            if self.reconciliation is None:
+                self.reconciliation = BnceReconciliation()
+            self.reconciliation.merge(other.reconciliation)
+        if other.cancelled is not None:
+            if self.cancelled is None:
+                self.cancelled = BnceCancelResult()
+            self.cancelled.merge(other.cancelled)
+
+    def log(self):
+        if self.cancelled is not None:
+            logging.warning("Execution aborted, open orders were cancelled")
+            self.cancelled.log()
+        if self.warmup.opened or self.warmup.failed:
+            logging.info(
+                f"Warmed up {self.warmup.opened}/{self.warmup.opened + self.warmup.failed}"
+                f" connections in {self.warmup.elapsed_ns / 1000000} ms."
+            )
+        logging.info(
+            f"Placed {self.placed}/{self.norders} orders in {self.elapsed_ns / 1000000} ms."
+        )
+        if self.skipped:
+            logging.info(f"Skipped {self.skipped} orders already placed in journal")
+        if self.failed:
+            logging.error(f"Failed to place {self.failed} orders")
+        for stage, by_label in self.latency.summary().items():
+            logging.info(f"Latency {stage}: {by_label['all']}")
+        for summary in self.clock:
+            log_clock_summary(summary)
+        for summary in self.concurrency:
+            logging.info(
+                f"Concurrency of accounts {summary['accounts']} ended at limit"
+                f" {summary['limit']}, rate scale {summary['rate_scale']}."
+                f" decisions: {summary['decisions_by_reason']}"
+            )
+        if self.reconciliation is not None:
+            self.reconciliation.log()
+
+
+def _client_order_id_prefix(key: str | None) -> str:
+    """Derived from the key of the order source so reruns of the same file send
+    the same ids, random for sources without a key"""
+    if key is None:
+        return "op" + uuid.uuid4().hex[:16] + "-"
+    return "op" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:16] + "-"
+
+
+def _classify(status: int, data: BnceOrderAck | dict | None) -> int:
+    """Classify an order response
+    https://github.com/binance/binance-spot-api-docs/blob/master/errors.md"""
+    code = data.get("code") if isinstance(data, dict) else None
+    if status < 300 and code is None:
+        return _PLACED
+    if code == -2010 and "Duplicate" in data.get("msg", ""):
+        # client order id already used, a previous attempt went through
+        return _UNKNOWN
+    if status >= 500 or code in (-1001, -1006, -1007):
+        return _UNKNOWN
+    if status == 429 or code in (-1003, -1021):
+        return _RETRY
+    return _FATAL
+
+
+def _load_outcome(status: int | None) -> Outcome:
+    """Load feedback of an order attempt, `status` is None if it raised"""
+    if status is None or status >= 500:
+        return Outcome.ERROR
+    if status in (418, 429):
+        return Outcome.OVERLOADED
+    return Outcome.OK
 
 
 class BnceSpotLimitOrderPlacer:
     def __init__(
-        self, account_metadata: dict, orders_fp: str, mock_failure_rate: float = 0.0
+        self,
+        account_metadata: dict,
+        orders_fp: str | OrderSource | None,
+        mock_failure_rate: float = 0.0,
+        inflight_window: int = 45,
+        transport: BnceTransport = BnceTransport.REST,
+        exchange_info_ttl_s: float = 3600,
+        retry_policy: RetryPolicy | None = None,
+        journal_fp: str | None = None,
+        resume: bool = False,
+        ip_buckets: dict[str, AsyncThrottler] | None = None,
+        account_filter: frozenset[int] | None = None,
+        trace_connections: bool = False,
+        rate_limits: list[dict] | None = None,
+        local_exchange_url: str | None = None,
+        lookahead: int = 10000,
+        account_weights: dict[int, float] | None = None,
+        priority_column: str | None = None,
+        pool_size: int | None = None,
+        warmup_connections: int | None = None,
+        dns_ttl_s: float | None = 300,
+        keepalive_s: float = 60,
+        adaptive: bool = False,
+        max_inflight_window: int | None = None,
+        reconcile: bool = True,
+        order_resp_type: BnceOrderRespType = BnceOrderRespType.ACK,
+        validate: bool = False,
+        recv_window_ms: int = 5000,
+        clock_refresh_s: float = 60,
+        clock: BnceServerClock | None = None,
+        endpoint_factory: Callable | None = None,
     ) -> None:
+        """`ip_buckets` replaces the ip scoped rate limit buckets, eg. with ones
+        shared across processes. Rows of accounts outside `account_filter` are
+        skipped in execution. `trace_connections` records dns, connect and
+        connection pool wait times of orders. `rate_limits` (exchangeInfo
+        format) replaces the default binance limits. In the local env,
+        `local_exchange_url` points at an already running stand-in exchange
+        instead of starting one. Execution reads up to `lookahead` orders ahead
+        of the senders. Among them orders with the highest numeric
+        `priority_column` of the orders file (eg. "Value") go first, otherwise
+        accounts are served in proportion to `account_weights` (1 by default).
+        The rest session pools up to `pool_size` connections (by default one
+        per sender, `inflight_window` per account), dns answers are cached
+        `dns_ttl_s` and idle connections kept open `keepalive_s`. Before the
+        first order `warmup_connections` of them (8 by default, 0 disables
+        it) are opened and verified with pings, websocket connections
+        of all accounts are opened instead. With `adaptive`, an
+        `AimdController` moves the in-flight window between 1 and
+        `max_inflight_window` (4 * `inflight_window` by default) and scales the
+        rate limits down from the exchange's ones on 429, 418, errors or rising
+        latency. With `reconcile`, orders are diffed against the exchange once
+        execution is done. Orders are placed with `order_resp_type` responses,
+        only their order id, client order id and status are kept. Orders are
+        read from `orders_fp`, a path opened with `open_order_source` or an
+        `OrderSource`. With `validate`, every row is parsed and checked before
+        the first order is sent, otherwise orders are sent as rows are read.
+        Signed requests carry server time, estimated by a `BnceServerClock`
+        synced every `clock_refresh_s`, and `recv_window_ms`, unless `clock`
+        is given. With `endpoint_factory`, endpoints are
+        `endpoint_factory(api_key, secret_key, rate_limiter, latency)` (eg.
+        simulated ones) and no session is opened nor exchange info cached."""
+        if inflight_window < 1:
+            raise ValueError("inflight window must be at least 1")
+        self._adaptive = adaptive
+        self._max_inflight_window = inflight_window
+        if adaptive:
+            self._max_inflight_window = max_inflight_window or 4 * inflight_window
+        if self._max_inflight_window < inflight_window:
+            raise ValueError("max inflight window must be at least the inflight window")
+        self._concurrency: AimdController | None = None
+        self._reconcile = reconcile
+        self._order_resp_type = order_resp_type
+        self._validate = validate
+        self._clock = clock or BnceServerClock(recv_window_ms, clock_refresh_s)
+        self._endpoint_factory = endpoint_factory
+        self._naccounts = max(
+            sum(
+                1
+                for acc_id in account_metadata
+                if account_filter is None or acc_id in account_filter
+            ),
+            1,
+        )
+        self._pool_size = pool_size or self._max_inflight_window * self._naccounts
+        self._warmup_connections = (
+            min(self._pool_size, _WARMUP_CONNECTIONS)
+            if warmup_connections is None
+            else warmup_connections
+        )
+        self._dns_ttl_s = dns_ttl_s
+        self._keepalive_s = keepalive_s
         self._account = account_metadata
         self._orders_fp = orders_fp
         self._mock_failure_rate = mock_failure_rate
+        self._inflight_window = inflight_window
         self._endpoint_url = None
         self._env = os.environ.get("APP_ENV")
         self._sess = None
+        self._rate_limits = rate_limits or BNCE_DEFAULT_RATE_LIMITS
+        # ip scoped limits are shared by all accounts, order limits are per account
+        self._ip_buckets = ip_buckets or make_buckets(
+            self._rate_limits, RateLimitScope.IP
+        )
+        for bucket in self._ip_buckets.values():
+            bucket.reserve(_CANCEL_RESERVED_WEIGHT)
+        self._aborted = asyncio.Event()
+        self._abort_ns: int | None = None
+        # connections are warmed up once, the first execution of a long lived
+        # placer pays for them
+        self._warm = False
+        self._account_filter = account_filter
+        self._rate_limiters: dict[str | None, BnceRateLimiter] = {}
+        self._transport = transport
+        # websocket endpoints hold a connection each and are reused per api key
+        self._ws_endpoints: dict[str | None, BnceWsEndpointV3] = {}
+        self._ws_sess = None
+        self._ws_url = None
+        self._mock_ws_server = None
+        self._mock_rest_server = None
+        self._local_exchange_url = local_exchange_url
+        self._lookahead = lookahead
+        self._account_weights = account_weights
+        self._priority_column = priority_column
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._journal_fp = journal_fp
+        self._resume = resume
+        # per order latency by stage, labelled by account id
+        self._latency = LatencyRecorder()
+        self._latency_labels = {
+            meta.get("api_key"): str(acc_id) for acc_id, meta in account_metadata.items()
+        }
+        self._exchange_info = BnceExchangeInfoCache(
+            None
+            if endpoint_factory is not None
+            else os.path.join(
+                EXCHANGE_INFO_CACHE_DIR, f"exchange_info_{self._env or 'prod'}.json"
+            ),
+            exchange_info_ttl_s,
+        )
 
+        self._trace_configs = [make_trace_config()] if trace_connections else None
+        if endpoint_factory is not None:
+            # endpoints of the factory need no session
+            return
         if self._env == "dev":
-            self._sess = aiohttp.ClientSession(BNCE_TESTNET)
+            self._sess = self._make_session(BNCE_TESTNET)
         elif self._env == "test":
-            self._sess = aiohttp.ClientSession(BNCE_MOCK_ENDPOINT)
-        else:
-            self._sess = aiohttp.ClientSession(BNCE_REST_ENDPOINT)
+            self._sess = self._make_session(BNCE_MOCK_ENDPOINT)
+        elif self._env != "local":
+            # local session is created once the loopback server has a port
+            self._sess = self._make_session(BNCE_REST_ENDPOINT)
 
     async def __aenter__(self):
+        if self._endpoint_factory is not None:
+            return self
+        if self._env == "local":
+            # real rest endpoint against a loopback stand-in of the exchange
+            if self._local_exchange_url is None:
+                self._mock_rest_server = MockBnceRestServer(
+                    rate_limits=self._rate_limits,
+                    latency_median_s=0.02,
+                    latency_sigma=0.5,
+                    error_rate=self._mock_failure_rate,
+                )
+                await self._mock_rest_server.start()
+                self._local_exchange_url = self._mock_rest_server.url
+            self._sess = self._make_session(self._local_exchange_url)
+        if self._transport == BnceTransport.WEBSOCKET:
+            # websocket urls are absolute, the rest session has a base url
+            self._ws_sess = aiohttp.ClientSession()
+            if self._env == "dev":
+                self._ws_url = BNCE_WS_API_TESTNET
+            elif self._env in ("test", "local"):
+                self._mock_ws_server = MockBnceWsServer(
+                    mock_failure_rate=self._mock_failure_rate, latency_s=(0.2, 0.5)
+                )
+                await self._mock_ws_server.start()
+                self._ws_url = self._mock_ws_server.url
+            else:
+                self._ws_url = BNCE_WS_API_ENDPOINT
         return self
 
     async def __aexit__(self, *args):
-        await self._sess.close()
+        try:
+            # raises only if the clock refresh loop itself failed
+            await self._clock.stop()
+        finally:
+            for endpoint in self._ws_endpoints.values():
+                await endpoint.close()
+            if self._ws_sess is not None:
+                await self._ws_sess.close()
+            if self._mock_ws_server is not None:
+                await self._mock_ws_server.stop()
+            if self._sess is not None:
+                await self._sess.close()
+            if self._mock_rest_server is not None:
+                await self._mock_rest_server.stop()
+
+    def _make_session(self, base_url: str) -> aiohttp.ClientSession:
+        return make_session(
+            base_url,
+            self._pool_size,
+            self._dns_ttl_s,
+            self._keepalive_s,
+            self._trace_configs,
+        )
+
+    def _get_rate_limiter(self, api_key: str | None) -> BnceRateLimiter:
+        if api_key not in self._rate_limiters:
+            self._rate_limiters[api_key] = BnceRateLimiter.from_rate_limits(
+                self._rate_limits, self._ip_buckets
+            )
+        return self._rate_limiters[api_key]
 
     def _make_endpoint(
         self, api_key: str | None = None, secret_key: str | None = None
-    ) -> BnceRestEndpointV3 | MockBnceRestEndpointV3:
-        """Returns Mock endpoint if env is 'test' else real endpoint"""
+    ) -> BnceRestEndpointV3 | BnceWsEndpointV3 | MockBnceRestEndpointV3:
+        """Returns websocket endpoint if transport is websocket, Mock endpoint if
+        env is 'test' else real endpoint"""
+        latency = None
+        if api_key in self._latency_labels:
+            latency = self._latency.scope(
+                self._latency_labels[api_key],
+                self._on_latency if self._concurrency is not None else None,
+            )
+        if self._endpoint_factory is not None:
+            return self._endpoint_factory(
+                api_key, secret_key, self._get_rate_limiter(api_key), latency
+            )
+        if self._transport == BnceTransport.WEBSOCKET:
+            if api_key not in self._ws_endpoints:
+                self._ws_endpoints[api_key] = BnceWsEndpointV3(
+                    self._ws_sess,
+                    self._ws_url,
+                    api_key,
+                    secret_key,
+                    rate_limiter=self._get_rate_limiter(api_key),
+                    latency=latency,
+                    clock=self._clock,
+                )
+            return self._ws_endpoints[api_key]
         if self._env == "test":
             return MockBnceRestEndpointV3(
-                self._sess, api_key, secret_key, self._mock_failure_rate
+                self._sess, api_key, secret_key, self._mock_failure_rate, latency
+            )
+        return BnceRestEndpointV3(
+            self._sess,
+            api_key,
+            secret_key,
+            rate_limiter=self._get_rate_limiter(api_key),
+            latency=latency,
+            clock=self._clock,
+        )
+
+    @property
+    def clock(self) -> BnceServerClock:
+        return self._clock
+
+    def abort(self):
+        """Stop a running `execute`, which then cancels the open orders of
+        every account and symbol it sent orders of. Safe to call from a signal
+        handler of the loop"""
+        if self._abort_ns is None:
+            logging.warning("Aborting execution")
+            self._abort_ns = perf_counter_ns()
+            self._aborted.set()
+
+    def _source(self, orders_fp: str | OrderSource | None) -> OrderSource:
+        orders_fp = orders_fp or self._orders_fp
+        if isinstance(orders_fp, OrderSource):
+            return orders_fp
+        return open_order_source(orders_fp, self._priority_column)
+
+    def _order_pairs(self, source: OrderSource) -> set[tuple[int, str]]:
+        """(account, symbol) of every row of `source`, rows without a valid
+        account are skipped"""
+        pairs = {
+            (int(row[5]), row[1])
+            for chunk in source.chunks()
+            for row in chunk
+            if str(row[5]).isdigit()
+        }
+        return {
+            (acc_id, symbol)
+            for acc_id, symbol in pairs
+            if acc_id in self._account
+            and (self._account_filter is None or acc_id in self._account_filter)
+        }
+
+    async def cancel_all(
+        self, orders_fp: str | OrderSource | None = None
+    ) -> BnceCancelResult:
+        """Cancel open orders of every account and symbol in `orders_fp`,
+        `self._orders_fp` by default"""
+        start_ns = perf_counter_ns()
+        endpoints = {
+            acc_id: self._make_endpoint(
+                self._account[acc_id]["api_key"], self._account[acc_id]["secret_key"]
+            )
+            for acc_id in self._account
+        }
+        result = await self._cancel_open_orders(
+            self._order_pairs(self._source(orders_fp)), endpoints, start_ns
+        )
+        result.log()
+        return result
+
+    async def _cancel_open_orders(
+        self, pairs: set[tuple[int, str]], endpoints: dict, start_ns: int
+    ) -> BnceCancelResult:
+        """One DELETE /api/v3/openOrders per account and symbol, all at once
+        over the endpoints (and warm connections) given. They go ahead of
+        queued requests and may use the weight orders leave reserved"""
+        result = BnceCancelResult()
+
+        async def _cancel(acc_id: int, symbol: str):
+            try:
+                res = await endpoints[acc_id].cancel_open_orders(symbol)
+                data = await _read_json(res)
+            except _TRANSIENT_EXCEPTIONS as e:
+                data = f"{type(e).__name__}: {e}"
+                res = None
+            if res is not None and res.ok and isinstance(data, list):
+                result.cancelled[acc_id] = result.cancelled.get(acc_id, 0) + len(data)
+            elif not (isinstance(data, dict) and data.get("code") == -2011):
+                # -2011 unknown order, there were no open orders
+                result.failed.setdefault(acc_id, []).append(symbol)
+                logging.error(
+                    f"Failed to cancel open orders of account {acc_id} {symbol}."
+                    f" status: {res.status if res is not None else None}, error: {data}"
+                )
+            result.flat_ns[acc_id] = max(
+                result.flat_ns.get(acc_id, 0), perf_counter_ns() - start_ns
             )
-        return BnceRestEndpointV3(self._sess, api_key, secret_key)
 
-    async def execute(self):
-        """Place orders in `self._orders_fp`"""
+        await asyncio.gather(*(_cancel(acc_id, symbol) for acc_id, symbol in pairs))
+        return result
+
+    def _on_latency(self, stage: str, value_ns: int):
+        if stage == "round_trip":
+            self._concurrency.record_latency(value_ns)
+
+    def _set_concurrency(
+        self, scheduler: FairScheduler, limit: int, rate_scale: float
+    ):
+        scheduler.set_max_inflight(limit)
+        for rate_limiter in self._rate_limiters.values():
+            rate_limiter.set_rate_scale(rate_scale)
+
+    async def execute(
+        self,
+        orders_fp: str | OrderSource | None = None,
+        client_order_id_prefix: str | None = None,
+        journal_fp: str | None = None,
+        on_order: Callable[
+            [BnceOrder | BnceInvalidRow, BnceOrderAck | None, str | None], None
+        ]
+        | None = None,
+    ) -> BnceExecutionResult:
+        """Place orders of `orders_fp`, `self._orders_fp` by default
+
+        Rows are read from the source a chunk at a time into a `FairScheduler` holding up to
+        `self._lookahead` orders, drained by a fixed pool of
+        `self._inflight_window` sender tasks per account. Senders are not bound
+        to an account, each takes the next order of the account whose rate
+        limiter can send first, highest `self._priority_column` first, else the
+        account served least relative to its `self._account_weights`. An
+        account holds at most `self._inflight_window` orders in flight, moved
+        within `self._max_inflight_window` by an `AimdController` if adaptive.
+        The reader is blocked (backpressure) while the scheduler is full, so memory
+        stays flat regardless of the file size. Invalid rows fail on their own
+        as they are read. With `self._validate`, rows are all parsed (once)
+        before the first order is sent and execution raises ValueError if any
+        is invalid.
+
+        Client order ids are `client_order_id_prefix` + row index, the prefix
+        is derived from the key of the source by default. When `journal_fp` (by
+        default `self._journal_fp`) is set, intent, ack and failure of every
+        row are journaled. With `self._resume`, rows acked in the journal are
+        skipped. `on_order` is called with every order once it is placed (with
+        the exchange response) or failed (with the error), invalid rows as a
+        `BnceInvalidRow`.
+
+        Sessions, endpoints, rate limiters and exchange info are kept between
+        executions, so a placer can execute batch after batch warm.
+
+        With `self._reconcile`, the orders of every account and symbol are
+        then retrieved in bulk and diffed against the outcomes recorded here,
+        see `_reconcile_orders`. Should a reader or sender raise, sending
+        stops and the error is raised once reconciled, open orders are not
+        cancelled unless `abort` is called.
+        """
         start_time_ns = perf_counter_ns()
+        start_time_ms = _get_timestamp_ms()
         logging.info("Starting order execution")
+        source = self._source(orders_fp)
+        if journal_fp is None:
+            journal_fp = self._journal_fp
+        self._aborted = asyncio.Event()
+        self._abort_ns = None
         account_ids = list(self._account.keys())
+        if self._adaptive:
+            # created ahead of the endpoints, their latency feeds it
+            self._concurrency = AimdController(
+                self._inflight_window,
+                max_limit=self._max_inflight_window,
+                fanout=self._naccounts,
+                on_change=lambda limit, rate_scale: self._set_concurrency(
+                    scheduler, limit, rate_scale
+                ),
+            )
         endpoints = {
             i: self._make_endpoint(
                 self._account[i]["api_key"],
@@ -69,167 +671,493 @@ class BnceSpotLimitOrderPlacer:
             )
             for i in account_ids
         }
-        order_tasks = set()
-        orders = []
-
-        # prepare tasks for concurrent request.
-        with open(self._orders_fp, "r") as f:
-            reader = csv.DictReader(f, delimiter=",")
-            for idx, row in enumerate(reader):
-                if row["Direction"].lower() == "buy":
-                    side = BnceOrderSide.BUY
-                elif row["Direction"].lower() == "sell":
-                    side = BnceOrderSide.SELL
-                else:
-                    raise ValueError(f"Invalid direction detected: {row['Direction']}")
-                q = Decimal(10) ** -SYMBOL_SCALE[row["Pair"]]
-                row["Quantity"] = Decimal(row["Quantity"]).quantize(q)
-                row["Price"] = (Decimal(row["Price"]).quantize(q),)
-                orders.append(row)
-                order_tasks.add(
-                    asyncio.create_task(
-                        endpoints[int(row["Account"])].post_order(
-                            symbol=row["Pair"],
-                            qty=row["Quantity"],
-                            price=row["Price"],
-                            side=side,
-                            type=BnceOrderType.LIMIT,
-                            time_in_force=BnceOrderTimeInForce.GOOD_TILL_CANCEL,
-                        ),
-                        name=idx,
-                    )
+        latencies = {i: self._latency.scope(str(i)) for i in account_ids}
+        order_wait_s = {
+            i: self._get_rate_limiter(self._account[i]["api_key"]).wait_time_s
+            for i in account_ids
+        }
+        scheduler = FairScheduler(
+            account_ids,
+            self._lookahead,
+            self._inflight_window,
+            self._account_weights,
+            lambda acc_id: order_wait_s[acc_id]("POST /api/v3/order"),
+        )
+        nplaced = 0
+        nfailed = 0
+        norders = 0
+        nskipped = 0
+        client_order_id_prefix = client_order_id_prefix or _client_order_id_prefix(
+            source.key
+        )
+        reconciler = BnceOrderReconciler(client_order_id_prefix)
+        # (account, symbol) of every order sent, open orders are cancelled on abort
+        touched: set[tuple[int, str]] = set()
+        journal = None
+        if journal_fp is not None:
+            journal = OrderJournal(journal_fp, client_order_id_prefix, self._resume)
+        # the clock is synced once per placer, alongside exchange info, then
+        # refreshed in the background
+        _, symbols = await asyncio.gather(
+            self._clock.start(self._make_endpoint()),
+            self._exchange_info.get_symbols(self._make_endpoint()),
+        )
+        # rate limit windows start with the exchange's
+        for rate_limiter in self._rate_limiters.values():
+            rate_limiter.align(self._clock.now_ms() / 1000)
+        parser = BnceOrderParser(symbols)
+
+        def _accept(row: tuple) -> tuple[BnceOrder, float] | None:
+            """Order and priority of a row, None if it is not executed here.
+            Raises ValueError if the row is not a valid order"""
+            nonlocal nskipped
+            idx, pair, direction, price, qty, account, priority = row
+            try:
+                acc_id = int(account)
+            except ValueError:
+                acc_id = None
+            if self._account_filter is not None and acc_id not in self._account_filter:
+                return None
+            if journal is not None and journal.state(idx) == JournalState.ACKED:
+                nskipped += 1
+                reconciler.skipped(idx)
+                return None
+            if isinstance(priority, ValueError):
+                # a row the source could not read
+                raise priority
+            if acc_id not in self._account:
+                raise ValueError(f"Invalid account detected: {account}")
+            order = parser.parse(idx, pair, direction, price, qty, acc_id)
+            try:
+                return order, float(priority or 0)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid priority: {priority}") from None
+
+        def _parse_all() -> list[tuple[BnceOrder, float]]:
+            """Every order of the source, raises ValueError listing invalid rows"""
+            orders = []
+            invalid = []
+            for chunk in source.chunks():
+                for row in chunk:
+                    try:
+                        item = _accept(row)
+                    except ValueError as e:
+                        invalid.append(f"row {row[0] + 1}: {e}")
+                        continue
+                    if item is not None:
+                        orders.append(item)
+            if invalid:
+                for error in invalid[:_MAX_INVALID_LOGGED]:
+                    logging.error(f"Invalid order, {error}")
+                raise ValueError(f"{len(invalid)} invalid orders, none were sent")
+            logging.info(f"Validated {len(orders)} orders")
+            return orders
+
+        parsed = None
+        if self._validate:
+            # on a worker thread, the source may block (stdin)
+            parsed = await asyncio.to_thread(_parse_all)
+        warmup = await self._warm_up(
+            [
+                endpoints[i]
+                for i in account_ids
+                if self._account_filter is None or i in self._account_filter
+            ]
+        )
+
+        def _reject(row: tuple, error: ValueError):
+            """Fail an invalid row without stopping the rows around it"""
+            nonlocal norders, nfailed
+            invalid = BnceInvalidRow(row[0], row[5], row[1])
+            norders += 1
+            nfailed += 1
+            if journal is not None:
+                journal.record(invalid.idx, JournalState.FAILED)
+            logging.error("Invalid order %s. %s", invalid, error)
+            if on_order is not None:
+                on_order(invalid, None, str(error))
+
+        async def _read_orders():
+            """Parse rows a chunk at a time, as the source reads them, and feed
+            them to the scheduler"""
+            nonlocal norders
+            if parsed is not None:
+                for order, priority in parsed:
+                    await scheduler.put(order.account, order, priority)
+                    norders += 1
+            else:
+                async for chunk in source.chunks_async():
+                    for row in chunk:
+                        try:
+                            item = _accept(row)
+                        except ValueError as e:
+                            _reject(row, e)
+                            continue
+                        if item is not None:
+                            await scheduler.put(item[0].account, *item)
+                            norders += 1
+            scheduler.close()
+
+        async def _send_orders():
+            """Send orders one at a time until the scheduler is drained"""
+            while (item := await scheduler.get()) is not None:
+                acc_id, order = item
+                try:
+                    await _send_order(acc_id, order)
+                finally:
+                    scheduler.done(acc_id)
+
+        async def _send_order(acc_id: int, order: BnceOrder):
+            nonlocal nplaced, nfailed
+            endpoint = endpoints[acc_id]
+            latency = latencies[acc_id]
+            idx = order.idx
+            client_order_id = f"{client_order_id_prefix}{idx}"
+            touched.add((acc_id, order.symbol))
+            # decimal strings are only built now, retries reuse the payload
+            prepared = endpoint.prepare_order(
+                symbol=order.symbol,
+                qty=order.qty_str(),
+                price=order.price_str(),
+                side=order.side,
+                type=BnceOrderType.LIMIT,
+                time_in_force=BnceOrderTimeInForce.GOOD_TILL_CANCEL,
+                client_order_id=client_order_id,
+                resp_type=self._order_resp_type,
+            )
+            if journal is not None:
+                journal.record(idx, JournalState.INTENT)
+            try:
+                data = await self._place_order(
+                    endpoint,
+                    order.symbol,
+                    client_order_id,
+                    prepared,
+                    latency,
                 )
+            except BnceOrderError as e:
+                # fatal errors only fail this order
+                nfailed += 1
+                if journal is not None:
+                    journal.record(idx, JournalState.FAILED)
+                logging.error("Failed to place order %s. %s", order, e)
+                if on_order is not None:
+                    on_order(order, None, str(e))
+            else:
+                if journal is not None:
+                    journal.record(idx, JournalState.ACKED)
+                # a 2xx body that is not json leaves the order id unknown
+                reconciler.placed(order, data.order_id if data is not None else None)
+                nplaced += 1
+                logging.info("Placed order: %s. resp: %s", order, data, extra=SAMPLED)
+                if on_order is not None:
+                    on_order(order, data, None)
 
-        successful_orders: list[
-            (int, dict)
-        ] = []  # list of (order idx, exchange response)
+        # task count is fixed: one reader plus `window` senders per account,
+        # the most the adaptive window may reach
+        tasks = {asyncio.create_task(_read_orders())}
+        for _ in range(self._max_inflight_window * len(account_ids)):
+            tasks.add(asyncio.create_task(_send_orders()))
 
         # start sending orders concurrently
+        stop_time_ns = None
+        reconciliation = None
+        cancelled = None
+        error = None
+        aborted = asyncio.create_task(self._aborted.wait())
         try:
-            while order_tasks:
-                done, order_tasks = await asyncio.wait(
-                    order_tasks, return_when=asyncio.FIRST_COMPLETED
+            while tasks and not aborted.done() and error is None:
+                done, tasks = await asyncio.wait(
+                    tasks | {aborted}, return_when=asyncio.FIRST_COMPLETED
                 )
+                tasks.discard(aborted)
                 for task in done:
-                    res: aiohttp.ClientResponse
-                    try:
-                        res = task.result()
-                    except Exception as e:
-                        # non http errors. all pending tasks are cancelled
-                        # TODO use task.name as idx to retrieve original params from orders list and display
-                        logging.exception(
-                            f" Exception encountered while sending order {orders[int(task.get_name())]}. {e}"
-                        )
-                        raise e
-                    else:
-                        # status 200
-                        if res.ok:
-                            data = await res.json()
-                            if "code" in data:
-                                # sometimes exchange error is present despite status 200
-                                # https://github.com/binance/binance-spot-api-docs/blob/master/errors.md
-                                logging.exception(
-                                    f"Exchange error, cancelling pending tasks. code: {data['code']}, msg: {data['msg']}"
-                                )
-                                raise Exception("Exchange error: error: {data}")
-                            else:
-                                # success
-                                successful_orders.append(data)
-                                logging.info(
-                                    f"Placed order: {orders[int(task.get_name())]}. resp: {data}"
-                                )
-                        else:
-                            # cancel on http errors
-                            error = await res.json()
-                            logging.exception(
-                                f" Http error encountered while placing order. status: {res.status}, reason: {res.reason}, error: {error}, order: {orders[int(task.get_name())]}"
-                            )
-                            res.raise_for_status()
-        finally:
+                    if task is not aborted and task.exception() is not None:
+                        error = task.exception()
+            if error is not None or self._abort_ns is not None:
+                # stop sending, orders still in flight may land after their
+                # symbol was cancelled
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            if error is not None:
+                # orders resting on the exchange, including ones of earlier
+                # runs, are left to an explicit abort or cancel-all
+                logging.error(f"Execution failed. {type(error).__name__}: {error}")
+            if self._abort_ns is not None:
+                cancelled = await self._cancel_open_orders(
+                    touched, endpoints, self._abort_ns
+                )
+            # reconciliation is not part of execution time
             stop_time_ns = perf_counter_ns()
-            logging.info(
-                f"Placed {len(successful_orders)}/{len(orders)} orders in {(stop_time_ns - start_time_ns) / 1000000} ms."
+            if self._reconcile:
+                reconciliation = await self._reconcile_orders(
+                    reconciler,
+                    touched,
+                    endpoints,
+                    start_time_ms - _RECONCILE_MARGIN_MS,
+                )
+        finally:
+            aborted.cancel()
+            for task in tasks:
+                task.cancel()
+            if journal is not None:
+                await asyncio.to_thread(journal.close)
+            if stop_time_ns is None:
+                stop_time_ns = perf_counter_ns()
+            result = BnceExecutionResult(
+                nplaced,
+                nfailed,
+                nskipped,
+                norders,
+                # warm up is not part of execution time either
+                stop_time_ns - start_time_ns - warmup.elapsed_ns,
+                self._latency,
+                warmup,
+                reconciliation=reconciliation,
+                cancelled=cancelled,
+                clock=[self._clock.summary()],
             )
-            # TODO make request to endpoint to validate placed orders
+            if self._concurrency is not None:
+                summary = self._concurrency.summary()
+                summary["accounts"] = [
+                    i
+                    for i in account_ids
+                    if self._account_filter is None or i in self._account_filter
+                ]
+                result.concurrency.append(summary)
+            result.log()
+        if error is not None:
+            raise error
+        return result
+
+    async def _reconcile_orders(
+        self,
+        reconciler: BnceOrderReconciler,
+        pairs: set[tuple[int, str]],
+        endpoints: dict,
+        start_time_ms: int,
+    ) -> BnceReconciliation:
+        """One openOrders request and allOrders pages (orders placed since
+        `start_time_ms`) per account and symbol of `pairs`, through the rate
+        limiters like orders, instead of one request per order. Pairs that
+        could not be retrieved are reported as unchecked."""
+        logging.info(f"Reconciling orders of {len(pairs)} account and symbol pairs")
+        exchange_orders: dict[tuple[int, str], list[dict]] = {}
+        open_orders: dict[tuple[int, str], list[dict]] = {}
+        unchecked = set()
+
+        async def _read_list(res) -> list[dict]:
+            data = await _read_json(res)
+            if not res.ok or not isinstance(data, list):
+                raise BnceOrderError(
+                    f"status: {res.status}, reason: {res.reason}, error: {data}"
+                )
+            return data
+
+        async def _retrieve(pair: tuple[int, str]):
+            account, symbol = pair
+            endpoint = endpoints[account]
+            try:
+                open_orders[pair] = await _read_list(
+                    await endpoint.get_open_orders(symbol)
+                )
+                orders = []
+                order_id = None
+                while True:
+                    page = await _read_list(
+                        await endpoint.get_all_orders(
+                            symbol, start_time_ms, order_id, _ALL_ORDERS_LIMIT
+                        )
+                    )
+                    orders.extend(page)
+                    if len(page) < _ALL_ORDERS_LIMIT:
+                        break
+                    order_id = page[-1]["orderId"] + 1
+                exchange_orders[pair] = orders
+            except (BnceOrderError, *_TRANSIENT_EXCEPTIONS) as e:
+                unchecked.add(pair)
+                logging.error(
+                    f"Failed to retrieve orders of account {account} {symbol}. {e}"
+                )
+
+        await asyncio.gather(*(_retrieve(pair) for pair in pairs))
+        return reconciler.reconcile(exchange_orders, open_orders, unchecked)
+
+    async def _warm_up(self, endpoints: list) -> WarmUpResult:
+        """Open connections ahead of the first order, one per websocket
+        endpoint or `self._warmup_connections` pinged rest connections. Time
+        per connection is recorded in the `warmup` stage, apart from orders"""
+        if self._warm or not self._warmup_connections or not endpoints:
+            return WarmUpResult()
+        if self._endpoint_factory is not None or (
+            self._env == "test" and self._transport == BnceTransport.REST
+        ):
+            # mock endpoint, no connections to open
+            return WarmUpResult()
+
+        def _record(elapsed_ns: int):
+            self._latency.record("warmup", ALL_LABEL, elapsed_ns)
+
+        if self._transport == BnceTransport.WEBSOCKET:
+            pending = iter(endpoints)
+            result = await warm_up(
+                lambda: next(pending).connect(), len(endpoints), _record
+            )
+        else:
+            endpoint = endpoints[0]
+
+            async def _ping() -> bool:
+                res = await endpoint.ping()
+                # reading the body releases the connection back to the pool
+                await _read_json(res)
+                return res.ok
+
+            result = await warm_up(_ping, self._warmup_connections, _record)
+        if result.failed:
+            logging.warning(f"Failed to open {result.failed} connections in warm up")
+        self._warm = True
+        return result
+
+    async def _place_order(
+        self,
+        endpoint,
+        symbol: str,
+        client_order_id: str,
+        prepared,
+        latency: LatencyScope | None = None,
+    ) -> BnceOrderAck:
+        """Send a prepared order, retrying transient failures with jittered backoff.
+
+        Retries go through the endpoint's throttler again. Outcomes that may or
+        may not have placed the order are resolved by querying `client_order_id`
+        before sending again. Raises `BnceOrderError` if the order could not be
+        placed.
+        """
+        start_ns = perf_counter_ns()
+        error = None
+        for attempt in range(self._retry_policy.max_attempts):
+            if attempt:
+                await asyncio.sleep(self._retry_policy.backoff_s(attempt - 1))
+            try:
+                res: aiohttp.ClientResponse = await endpoint.post_prepared_order(
+                    prepared
+                )
+                parse_start_ns = perf_counter_ns()
+                data = await read_order_response(res)
+                if latency is not None:
+                    latency.record("parse", perf_counter_ns() - parse_start_ns)
+            except _TRANSIENT_EXCEPTIONS as e:
+                outcome = _UNKNOWN
+                error = f"{type(e).__name__}: {e}"
+                if self._concurrency is not None:
+                    self._concurrency.record_outcome(_load_outcome(None))
+            else:
+                outcome = _classify(res.status, data)
+                if outcome != _PLACED:
+                    error = f"status: {res.status}, reason: {res.reason}, error: {data}"
+                    if isinstance(data, dict) and data.get("code") == -1021:
+                        # retried with the next timestamp, which should be synced
+                        self._clock.resync()
+                if self._concurrency is not None:
+                    self._concurrency.record_outcome(_load_outcome(res.status))
+
+            if outcome == _PLACED:
+                if latency is not None:
+                    latency.record("total", perf_counter_ns() - start_ns)
+                return data
+            if outcome == _FATAL:
+                raise BnceOrderError(error)
+            if outcome == _UNKNOWN:
+                data = await self._query_order(endpoint, symbol, client_order_id)
+                if data is not None:
+                    if latency is not None:
+                        latency.record("total", perf_counter_ns() - start_ns)
+                    return data
+            logging.warning(
+                "Retrying order %s, attempt %d failed. %s",
+                client_order_id,
+                attempt + 1,
+                error,
+            )
+        raise BnceOrderError(
+            f"Gave up after {self._retry_policy.max_attempts} attempts. {error}"
+        )
+
+    async def _query_order(
+        self, endpoint, symbol: str, client_order_id: str
+    ) -> BnceOrderAck | None:
+        """Returns the order if the exchange knows `client_order_id`, else None"""
+        try:
+            res = await endpoint.get_order(symbol, client_order_id)
+            data = await read_order_response(res)
+        except _TRANSIENT_EXCEPTIONS:
+            return None
+        if _classify(res.status, data) == _PLACED:
+            return data
+        return None
 
     async def dry_run(self):
-        """Performs validation of credentials in `self._account` and orders in `self._orders_fp` and"""
+        """Performs validation of credentials in `self._account` and orders of `self._orders_fp` and"""
         logging.info("Starting dry run.")
         invalid_credentials = []
 
-        async with aiohttp.ClientSession() as sess:
-            # validate credentials, retrieve account balance
-            logging.info("Validating credentials")
-            cred_tasks = []
-            acc_idx = []
-
-            for acc_id, acc_info in self._account.items():
-                endpoint = self._make_endpoint(
-                    api_key=acc_info["api_key"],
-                    secret_key=acc_info["secret_key"],
-                )
-                cred_tasks.append(endpoint.get_account_info())
-                acc_idx.append(acc_id)
-
-            cred_resp = await asyncio.gather(*cred_tasks)
-            for i, resp in enumerate(cred_resp):
-                if resp.status in (401, 403):
-                    logging.error(
-                        f"Invalid credentials for account id: {acc_idx[i]} status: {resp.status} reason: {resp.reason}"
-                    )
-                    invalid_credentials.append(acc_idx[i])
-                    continue
-                else:
-                    resp.raise_for_status()
+        # validate credentials, retrieve account balance
+        logging.info("Validating credentials")
+        await self._clock.start(self._make_endpoint())
+        cred_tasks = []
+        acc_idx = []
+
+        for acc_id, acc_info in self._account.items():
+            endpoint = self._make_endpoint(
+                api_key=acc_info["api_key"],
+                secret_key=acc_info["secret_key"],
+            )
+            cred_tasks.append(endpoint.get_account_info())
+            acc_idx.append(acc_id)
 
-            if invalid_credentials:
-                raise ValueError(
-                    f"Invalid credentials detected for accounts: {invalid_credentials}"
+        cred_resp = await asyncio.gather(*cred_tasks)
+        for i, resp in enumerate(cred_resp):
+            if resp.status in (401, 403):
+                logging.error(
+                    f"Invalid credentials for account id: {acc_idx[i]} status: {resp.status} reason: {resp.reason}"
                 )
-            logging.info(
-                f"Successfully validated credentials from accounts: {list(self._account.keys())}"
+                invalid_credentials.append(acc_idx[i])
+                continue
+            else:
+                resp.raise_for_status()
+
+        if invalid_credentials:
+            raise ValueError(
+                f"Invalid credentials detected for accounts: {invalid_credentials}"
             )
+        logging.info(
+            f"Successfully validated credentials from accounts: {list(self._account.keys())}"
+        )
+        log_clock_summary(self._clock.summary())
 
-            #  retrieve valid spot instruments
-            logging.info("Retrieving valid spot symbols")
-            endpoint = self._make_endpoint()
-            resp = await endpoint.get_symbols()
-            resp.raise_for_status()
-            data = await resp.json()
-            spot_instruments = set((rec["symbol"] for rec in data["symbols"]))
+        #  retrieve valid spot instruments and their filters
+        logging.info("Retrieving valid spot symbols")
+        symbols = await self._exchange_info.get_symbols(self._make_endpoint())
 
         # validate orders
         logging.info("Validating Orders")
-        invalid_orders = []
-
-        with open(self._orders_fp, "r") as f:
-            reader = csv.DictReader(f, delimiter=",")
-            norders = 0
-            for i, row in enumerate(reader):
-                norders += 1
-                errors = []
-
-                # check symbol in valid symbols
-                if row["Pair"] not in spot_instruments:
-                    errors.append("Invalid Pair")
-                # check direction is valid
-                if row["Direction"].lower() not in ("buy", "sell"):
-                    errors.append("Invalid Direction")
-                # check price and quantity are present
-                if (
-                    row["Price"] is None
-                    or row["Quantity"] is None
-                    or Decimal(row["Price"]) <= Decimal(0)
-                    or Decimal(row["Quantity"]) <= Decimal(0)
-                ):
-                    errors.append("Invalid price or quantity")
-
-                if errors:
-                    invalid_orders.append((i, row, errors))
-
-            if invalid_orders:
-                logging.error("Invalid orders detected:")
-                for i, row, errors in invalid_orders:
-                    logging.error(f"row number: {i + 1}, row: {row}, errors: {errors}")
-            else:
-                logging.info(f"Succesfully validated {norders} orders")
+        columns = self._source(None).columns()
+        invalid_orders = validate_order_columns(columns, symbols, set(self._account))
+
+        if invalid_orders:
+            logging.error("Invalid orders detected:")
+            for i, errors in invalid_orders.items():
+                logging.error(
+                    f"row number: {i + 1}, row: {columns.row(i)}, errors: {errors}"
+                )
+        else:
+            logging.info(f"Succesfully validated {len(columns)} orders")
+
+
+async def _read_json(res: aiohttp.ClientResponse) -> dict | None:
+    """Error bodies are not always json (eg. 5xx from a proxy)"""
+    try:
+        return await res.json()
+    except (aiohttp.ContentTypeError, ValueError):
+        return None
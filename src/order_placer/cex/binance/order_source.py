@@ -0,0 +1,418 @@
+import abc
+import asyncio
+import csv
+import io
+import mmap
+import os
+import struct
+import sys
+from typing import AsyncIterator, Iterable, Iterator
+
+from order_placer.cex.binance.fixed_point import format_fixed, split_decimal
+from order_placer.cex.binance.response import loads
+from order_placer.cex.binance.validation import (
+    ORDER_COLUMNS,
+    BnceOrderColumns,
+    uniform_fields,
+)
+
+# (row index, pair, direction, price, quantity, account, priority). Price and
+# quantity are decimal strings or (mantissa, decimals) of a binary source.
+# Values are handed out as read, they are parsed (and may fail) with the row.
+# A row that could not be read holds the ValueError it fails with as priority
+OrderRow = tuple
+
+# rows handed out at once, sources are read one chunk ahead of the scheduler
+_CHUNK_ROWS = 4096
+# bytes of a memory mapped csv split into lines at once
+_CHUNK_BYTES = 1 << 20
+
+_BINARY_MAGIC = b"OPO1"
+_SYMBOL_COUNT = struct.Struct("<H")
+# symbol id, side (0 buy, 1 sell), price and quantity decimals, price and
+# quantity mantissas, account, priority
+_BINARY_RECORD = struct.Struct("<HBbbqqId")
+_SIDE_NAMES = ("BUY", "SELL")
+_SIDE_IDS = {"buy": 0, "sell": 1}
+
+
+def file_key(fp: str) -> str:
+    """Identity of a file, rewriting it changes client order ids"""
+    stat = os.stat(fp)
+    return f"{os.path.basename(fp)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class OrderSource(abc.ABC):
+    """Rows of orders read incrementally, in chunks, so orders can be sent
+    while the rest of the input is still being read.
+
+    `key` identifies the input for client order ids and the journal, None if
+    the input can not be read twice (eg. stdin without a key). Row indices
+    count rows with values, blank lines are skipped.
+    """
+
+    # reading may block (eg. a pipe), chunks are read on a worker thread
+    blocking = False
+
+    def __init__(self, key: str | None) -> None:
+        self.key = key
+
+    @abc.abstractmethod
+    def chunks(self) -> Iterator[list[OrderRow]]:
+        """Rows in row order, up to `_CHUNK_ROWS` at a time"""
+
+    async def chunks_async(self) -> AsyncIterator[list[OrderRow]]:
+        chunks = self.chunks()
+        while True:
+            if self.blocking:
+                chunk = await asyncio.to_thread(next, chunks, None)
+            else:
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def columns(self) -> BnceOrderColumns:
+        """Every row at once as `BnceOrderColumns`, for validation"""
+        lists = {name: [] for name in ORDER_COLUMNS}
+        targets = [lists[name] for name in ORDER_COLUMNS]
+        for chunk in self.chunks():
+            for row in chunk:
+                for target, value in zip(targets, row[1:6]):
+                    if isinstance(value, tuple):
+                        value = format_fixed(*value)
+                    target.append(str(value))
+        return BnceOrderColumns(lists=lists)
+
+
+def _header_cols(header: list[str], priority_column: str | None) -> list[int]:
+    cols = [header.index(name) for name in ORDER_COLUMNS]
+    if priority_column is not None:
+        cols.append(header.index(priority_column))
+    return cols
+
+
+class CsvOrderSource(OrderSource):
+    """Orders csv file, memory mapped and read a chunk of lines at a time.
+
+    Chunks of plain lines (no quotes, blank or short lines) are split in one
+    go, values of a column are every `width`-th field, like
+    `BnceOrderColumns.read` does, other chunks line by line. From the first
+    chunk with a quote on, the file is read with `csv.reader`, quoted fields
+    may hold commas and newlines. Short rows have empty values, the
+    `priority_column` (eg. "Value") value is the priority.
+    """
+
+    def __init__(self, fp: str, priority_column: str | None = None) -> None:
+        super().__init__(file_key(fp))
+        self._fp = fp
+        self._priority_column = priority_column
+
+    def _rows(self, fields_iter: Iterable[list[str]], cols: list[int], start: int):
+        """Rows of `fields_iter` in chunks, numbered from `start`"""
+        width = max(cols) + 1
+        has_priority = len(cols) > 5
+        pair_i, direction_i, price_i, qty_i, account_i = cols[:5]
+        idx = start
+        rows = []
+        for fields in fields_iter:
+            if not fields:
+                continue
+            if len(fields) < width:
+                fields = fields + [""] * (width - len(fields))
+            rows.append(
+                (
+                    idx,
+                    fields[pair_i],
+                    fields[direction_i],
+                    fields[price_i],
+                    fields[qty_i],
+                    fields[account_i],
+                    fields[cols[5]] if has_priority else 0,
+                )
+            )
+            idx += 1
+            if len(rows) >= _CHUNK_ROWS:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    def _split_rows(self, text: str, cols: list[int], width: int, start: int):
+        """Rows of plain lines `text`, numbered from `start`"""
+        values = text.replace("\n", ",").split(",")
+        nrows = len(values) // width
+        columns = [values[i::width] for i in cols[:5]]
+        if len(cols) > 5:
+            priorities = values[cols[5] :: width]
+        else:
+            priorities = [0] * nrows
+        rows = list(zip(range(start, start + nrows), *columns, priorities))
+        for i in range(0, nrows, _CHUNK_ROWS):
+            yield rows[i : i + _CHUNK_ROWS]
+
+    def chunks(self) -> Iterator[list[OrderRow]]:
+        with open(self._fp, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                header_end = mm.find(b"\n")
+                if header_end == -1:
+                    header_end = size
+                header = next(
+                    csv.reader([mm[:header_end].decode("utf-8").rstrip("\r")])
+                )
+                cols = _header_cols(header, self._priority_column)
+                width = len(header)
+                idx = 0
+                pos = header_end + 1
+                while pos < size:
+                    end = min(pos + _CHUNK_BYTES, size)
+                    if end < size:
+                        # whole lines only, a line longer than a chunk is taken whole
+                        line_end = mm.rfind(b"\n", pos, end)
+                        if line_end == -1:
+                            line_end = mm.find(b"\n", end)
+                        end = size if line_end == -1 else line_end
+                    if mm.find(b'"', pos, end) != -1:
+                        # pos starts a line, no quote was open before it
+                        yield from self._csv_chunks(cols, pos, idx)
+                        return
+                    text = mm[pos:end].decode("utf-8")
+                    pos = end + 1
+                    if "\r" in text:
+                        text = text.replace("\r", "")
+                    text = text.rstrip("\n")
+                    if not text:
+                        continue
+                    if "\n\n" not in text and uniform_fields(text, width):
+                        chunks = self._split_rows(text, cols, width, idx)
+                    else:
+                        chunks = self._rows(
+                            (line.split(",") for line in text.split("\n") if line),
+                            cols,
+                            idx,
+                        )
+                    for rows in chunks:
+                        idx += len(rows)
+                        yield rows
+
+    def _csv_chunks(
+        self, cols: list[int], offset: int, start: int
+    ) -> Iterator[list[OrderRow]]:
+        """Rows from byte `offset` on with `csv.reader`, numbered from `start`"""
+        with open(self._fp, "rb") as f:
+            f.seek(offset)
+            text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+            yield from self._rows(csv.reader(text, delimiter=","), cols, start)
+
+    def columns(self) -> BnceOrderColumns:
+        # whole file parsing, vectorized with numpy
+        return BnceOrderColumns.read(self._fp)
+
+
+class NdjsonOrderSource(OrderSource):
+    """One json object per line with Pair, Direction, Price, Quantity and
+    Account keys (and `priority_column`), from a file or a stream such as
+    stdin. Prices and quantities should be strings, numbers are taken as
+    printed by python. A stream is parsed as it is written, rows are handed
+    out whenever the writer pauses. Lines that are not such an object are
+    handed out as unreadable rows"""
+
+    def __init__(
+        self,
+        fp: str | None = None,
+        stream: io.IOBase | None = None,
+        priority_column: str | None = None,
+        key: str | None = None,
+    ) -> None:
+        if (fp is None) == (stream is None):
+            raise ValueError("either a filepath or a stream is required")
+        super().__init__(key if fp is None else key or file_key(fp))
+        self._fp = fp
+        self._stream = stream
+        self._priority_column = priority_column
+        self.blocking = stream is not None
+
+    def _parse(self, batches: Iterable[list[bytes]]) -> Iterator[list[OrderRow]]:
+        priority_column = self._priority_column
+        idx = 0
+        rows = []
+        for lines in batches:
+            for line in lines:
+                if not line.strip():
+                    continue
+                order = None
+                try:
+                    order = loads(line)
+                    rows.append(
+                        (
+                            idx,
+                            order["Pair"],
+                            order["Direction"],
+                            str(order["Price"]),
+                            str(order["Quantity"]),
+                            order["Account"],
+                            order.get(priority_column) if priority_column else 0,
+                        )
+                    )
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    # the line fails on its own, as an invalid row
+                    rows.append(_unreadable_row(idx, order, e))
+                idx += 1
+                if len(rows) >= _CHUNK_ROWS:
+                    yield rows
+                    rows = []
+            # a stream hands out what it has as soon as the writer pauses
+            if rows:
+                yield rows
+                rows = []
+
+    def chunks(self) -> Iterator[list[OrderRow]]:
+        if self._stream is not None:
+            yield from self._parse(_stream_lines(self._stream))
+            return
+        with open(self._fp, "rb") as f:
+            # one parse for the whole file, rows are numbered across batches
+            yield from self._parse(iter(lambda: f.readlines(_CHUNK_BYTES), []))
+
+
+def _unreadable_row(idx: int, values, error: Exception) -> OrderRow:
+    """Row `idx` failing with `error`, with the values that could be read"""
+    if not isinstance(values, dict):
+        values = {}
+    return (
+        idx,
+        *(str(values.get(name, "")) for name in ORDER_COLUMNS),
+        ValueError(f"Unreadable row. {type(error).__name__}: {error}"),
+    )
+
+
+def _stream_lines(stream) -> Iterator[list[bytes]]:
+    """Complete lines of `stream` in batches of what has been written so far.
+    `read1` returns the bytes available without waiting for a full buffer"""
+    pending = b""
+    while data := stream.read1(_CHUNK_BYTES):
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        yield lines
+    if pending:
+        yield [pending]
+
+
+class BinaryOrderSource(OrderSource):
+    """Fixed width record file written by `BinaryOrderSource.write`.
+
+    A header (magic, u16 symbol count, symbols as u8 length and ascii) is
+    followed by 33 byte records: u16 symbol id, u8 side (0 buy, 1 sell), i8
+    price and quantity decimals, i64 price and quantity mantissas, u32
+    account and f64 priority. Records are unpacked straight from the memory
+    mapped file, nothing is split or parsed as text.
+    """
+
+    def __init__(self, fp: str) -> None:
+        super().__init__(file_key(fp))
+        self._fp = fp
+
+    def chunks(self) -> Iterator[list[OrderRow]]:
+        with open(self._fp, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[: len(_BINARY_MAGIC)] != _BINARY_MAGIC:
+                    raise ValueError(f"{self._fp} is not a binary orders file")
+                pos = len(_BINARY_MAGIC)
+                (nsymbols,) = _SYMBOL_COUNT.unpack_from(mm, pos)
+                pos += _SYMBOL_COUNT.size
+                symbols = []
+                for _ in range(nsymbols):
+                    length = mm[pos]
+                    symbols.append(sys.intern(mm[pos + 1 : pos + 1 + length].decode()))
+                    pos += 1 + length
+                if (len(mm) - pos) % _BINARY_RECORD.size:
+                    raise ValueError(f"{self._fp} ends with a truncated record")
+                idx = 0
+                step = _CHUNK_ROWS * _BINARY_RECORD.size
+                for start in range(pos, len(mm), step):
+                    rows = [
+                        (
+                            idx + i,
+                            symbols[symbol],
+                            _SIDE_NAMES[side],
+                            (price, price_decimals),
+                            (qty, qty_decimals),
+                            account,
+                            priority,
+                        )
+                        for i, (
+                            symbol,
+                            side,
+                            price_decimals,
+                            qty_decimals,
+                            price,
+                            qty,
+                            account,
+                            priority,
+                        ) in enumerate(_BINARY_RECORD.iter_unpack(mm[start : start + step]))
+                    ]
+                    idx += len(rows)
+                    yield rows
+
+    @staticmethod
+    def write(fp: str, source: OrderSource) -> int:
+        """Convert the rows of `source` into a binary orders file at `fp`,
+        returns the number of rows. Raises ValueError on rows that can not
+        be represented (unknown direction, values that are not positive
+        decimals)"""
+        symbols: dict[str, int] = {}
+        records = bytearray()
+        nrows = 0
+        for chunk in source.chunks():
+            for idx, pair, direction, price, qty, account, priority in chunk:
+                if isinstance(priority, ValueError):
+                    raise ValueError(f"Invalid order at row {idx + 1}: {priority}")
+                side = _SIDE_IDS.get(str(direction).lower())
+                price = split_decimal(price) if isinstance(price, str) else price
+                qty = split_decimal(qty) if isinstance(qty, str) else qty
+                if side is None or price is None or qty is None:
+                    raise ValueError(f"Invalid order at row {idx + 1}")
+                symbol = symbols.setdefault(pair, len(symbols))
+                try:
+                    records += _BINARY_RECORD.pack(
+                        symbol,
+                        side,
+                        price[1],
+                        qty[1],
+                        price[0],
+                        qty[0],
+                        int(account),
+                        float(priority or 0),
+                    )
+                except (struct.error, ValueError) as e:
+                    raise ValueError(f"Invalid order at row {idx + 1}: {e}") from e
+                nrows += 1
+        with open(fp, "wb") as f:
+            f.write(_BINARY_MAGIC)
+            f.write(_SYMBOL_COUNT.pack(len(symbols)))
+            for symbol in symbols:
+                encoded = symbol.encode()
+                f.write(bytes([len(encoded)]) + encoded)
+            f.write(records)
+        return nrows
+
+
+def open_order_source(
+    orders_fp: str, priority_column: str | None = None, key: str | None = None
+) -> OrderSource:
+    """Source of `orders_fp` by extension: "-" is ndjson on stdin, .ndjson and
+    .jsonl are ndjson files, .opo are binary orders files, anything else csv.
+    `key` identifies stdin input, eg. to resume it"""
+    if orders_fp == "-":
+        return NdjsonOrderSource(
+            stream=sys.stdin.buffer, priority_column=priority_column, key=key
+        )
+    ext = os.path.splitext(orders_fp)[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return NdjsonOrderSource(orders_fp, priority_column=priority_column, key=key)
+    if ext == ".opo":
+        return BinaryOrderSource(orders_fp)
+    return CsvOrderSource(orders_fp, priority_column)
@@ -0,0 +1,185 @@
+import sys
+
+from order_placer.cex.binance.enums import BnceOrderSide
+from order_placer.cex.binance.exchange_info import BnceSymbolFilters
+from order_placer.cex.binance.fixed_point import (
+    BnceSymbolLimits,
+    decimal_places,
+    format_fixed,
+    split_decimal,
+)
+
+_SIDES = {"buy": BnceOrderSide.BUY, "sell": BnceOrderSide.SELL}
+
+
+def _quantize(
+    mantissa: int, decimals: int, scale: int, step: int, half_even: bool
+) -> int:
+    """`mantissa` * 10**-`decimals` as a multiple of `step` at `scale` decimals,
+    rounded half even or down"""
+    # quantize at the finer of both scales, the result is a multiple of step
+    extra = max(decimals - scale, 0)
+    value = mantissa * 10 ** (scale + extra - decimals)
+    unit = (step or 1) * 10**extra
+    units, rem = divmod(value, unit)
+    if half_even and (2 * rem > unit or (2 * rem == unit and units & 1)):
+        units += 1
+    return units * (step or 1)
+
+
+def _parts(value: str | tuple[int, int]) -> tuple[int, int] | None:
+    """(mantissa, decimals) of a positive decimal, None if it is not one"""
+    if isinstance(value, tuple):
+        return value if value[0] > 0 and value[1] >= 0 else None
+    return split_decimal(value)
+
+
+class BnceSymbolSpec:
+    """Fixed point scales and limits of a symbol, shared by all its orders"""
+
+    __slots__ = (
+        "symbol",
+        "limits",
+        "price_scale",
+        "qty_scale",
+        "price_decimals",
+        "qty_decimals",
+    )
+
+    def __init__(self, filters: BnceSymbolFilters) -> None:
+        self.symbol = sys.intern(filters.symbol)
+        self.price_scale = max(
+            decimal_places(d) for d in (filters.tick_size, filters.min_price, filters.max_price)
+        )
+        self.qty_scale = max(
+            decimal_places(d) for d in (filters.step_size, filters.min_qty, filters.max_qty)
+        )
+        self.limits = BnceSymbolLimits(filters, self.price_scale, self.qty_scale)
+        # decimals sent, multiples of tick and step need no more than theirs
+        self.price_decimals = (
+            decimal_places(filters.tick_size) if filters.tick_size else self.price_scale
+        )
+        self.qty_decimals = (
+            decimal_places(filters.step_size) if filters.step_size else self.qty_scale
+        )
+
+    def errors(self, price: int, qty: int) -> list[str]:
+        """Filter errors of a quantized fixed point order, 0 valued limits are
+        disabled"""
+        lim = self.limits
+        errors = []
+        if not lim.trading:
+            errors.append("Symbol not trading")
+        if price < lim.min_price or (lim.max_price and price > lim.max_price):
+            errors.append("Price outside PRICE_FILTER")
+        if qty < lim.min_qty or (lim.max_qty and qty > lim.max_qty):
+            errors.append("Quantity outside LOT_SIZE")
+        if price * qty < lim.min_notional:
+            errors.append("Notional below minimum")
+        return errors
+
+
+class BnceOrder:
+    """Limit order of one orders file row, price and quantity are quantized
+    fixed point integers at the scales of `spec`. Decimal strings are only
+    built to send."""
+
+    __slots__ = ("idx", "account", "side", "price", "qty", "spec")
+
+    def __init__(
+        self,
+        idx: int,
+        account: int,
+        side: BnceOrderSide,
+        price: int,
+        qty: int,
+        spec: BnceSymbolSpec,
+    ) -> None:
+        self.idx = idx
+        self.account = account
+        self.side = side
+        self.price = price
+        self.qty = qty
+        self.spec = spec
+
+    @property
+    def symbol(self) -> str:
+        return self.spec.symbol
+
+    def price_str(self) -> str:
+        spec = self.spec
+        return format_fixed(
+            self.price // 10 ** (spec.price_scale - spec.price_decimals),
+            spec.price_decimals,
+        )
+
+    def qty_str(self) -> str:
+        spec = self.spec
+        return format_fixed(
+            self.qty // 10 ** (spec.qty_scale - spec.qty_decimals), spec.qty_decimals
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"row {self.idx + 1} account {self.account} {self.side.value}"
+            f" {self.qty_str()} {self.symbol} @ {self.price_str()}"
+        )
+
+
+class BnceInvalidRow:
+    """Row of an orders file that is not a valid order, reported in place of
+    a `BnceOrder`"""
+
+    __slots__ = ("idx", "account", "symbol")
+
+    def __init__(self, idx: int, account: int | str, symbol: str) -> None:
+        self.idx = idx
+        self.account = account
+        self.symbol = symbol
+
+    def __repr__(self) -> str:
+        return f"row {self.idx + 1} account {self.account} {self.symbol}"
+
+
+class BnceOrderParser:
+    """Parses orders file rows into `BnceOrder`, quantized and checked against
+    the filters of `symbols`"""
+
+    def __init__(self, symbols: dict[str, BnceSymbolFilters]) -> None:
+        self._symbols = symbols
+        self._specs: dict[str, BnceSymbolSpec] = {}
+
+    def _spec(self, pair: str) -> BnceSymbolSpec:
+        spec = self._specs.get(pair)
+        if spec is None:
+            filters = self._symbols.get(pair)
+            if filters is None:
+                raise ValueError(f"Invalid pair detected: {pair}")
+            spec = self._specs[pair] = BnceSymbolSpec(filters)
+        return spec
+
+    def parse(
+        self,
+        idx: int,
+        pair: str,
+        direction: str,
+        price: str | tuple[int, int],
+        qty: str | tuple[int, int],
+        account: str | int,
+    ) -> BnceOrder:
+        """Price and quantity are decimal strings or (mantissa, decimals) as
+        read from binary sources. Raises ValueError if the row is not a valid
+        order"""
+        side = _SIDES.get(direction.lower())
+        if side is None:
+            raise ValueError(f"Invalid direction detected: {direction}")
+        spec = self._spec(pair)
+        price_parts = _parts(price)
+        qty_parts = _parts(qty)
+        if price_parts is None or qty_parts is None:
+            raise ValueError(f"Invalid price or quantity detected at row {idx + 1}")
+        price_fp = _quantize(*price_parts, spec.price_scale, spec.limits.tick, True)
+        qty_fp = _quantize(*qty_parts, spec.qty_scale, spec.limits.step, False)
+        if errors := spec.errors(price_fp, qty_fp):
+            raise ValueError(f"Invalid order detected at row {idx + 1}: {errors}")
+        return BnceOrder(idx, int(account), side, price_fp, qty_fp, spec)
@@ -0,0 +1,222 @@
+from enum import IntEnum, unique
+import logging
+import math
+from typing import Mapping
+
+from order_placer.cex.core.throttler import (
+    AsyncThrottler,
+    CompositeThrottler,
+    FixedWindowThrottler,
+    RefillRateUnit,
+)
+
+
+@unique
+class RateLimitScope(IntEnum):
+    IP = 1
+    ACCOUNT = 2
+
+
+# same format as `rateLimits` in /api/v3/exchangeInfo
+BNCE_DEFAULT_RATE_LIMITS = [
+    {
+        "rateLimitType": "REQUEST_WEIGHT",
+        "interval": "MINUTE",
+        "intervalNum": 1,
+        "limit": 6000,
+    },
+    {"rateLimitType": "ORDERS", "interval": "SECOND", "intervalNum": 10, "limit": 100},
+    {"rateLimitType": "ORDERS", "interval": "DAY", "intervalNum": 1, "limit": 200000},
+    {
+        "rateLimitType": "RAW_REQUESTS",
+        "interval": "MINUTE",
+        "intervalNum": 5,
+        "limit": 61000,
+    },
+]
+
+# weight of each endpoint ("{http method} {path}") per rate limit type.
+# missing types have weight 0
+BNCE_ENDPOINT_WEIGHTS = {
+    "POST /api/v3/order": {"REQUEST_WEIGHT": 1, "ORDERS": 1, "RAW_REQUESTS": 1},
+    "GET /api/v3/order": {"REQUEST_WEIGHT": 4, "RAW_REQUESTS": 1},
+    "GET /api/v3/openOrders": {"REQUEST_WEIGHT": 6, "RAW_REQUESTS": 1},
+    "GET /api/v3/allOrders": {"REQUEST_WEIGHT": 20, "RAW_REQUESTS": 1},
+    "DELETE /api/v3/openOrders": {"REQUEST_WEIGHT": 1, "RAW_REQUESTS": 1},
+    "GET /api/v3/account": {"REQUEST_WEIGHT": 20, "RAW_REQUESTS": 1},
+    "GET /api/v3/exchangeInfo": {"REQUEST_WEIGHT": 20, "RAW_REQUESTS": 1},
+    "GET /api/v3/ping": {"REQUEST_WEIGHT": 1, "RAW_REQUESTS": 1},
+    "GET /api/v3/time": {"REQUEST_WEIGHT": 1, "RAW_REQUESTS": 1},
+}
+_DEFAULT_ENDPOINT_WEIGHT = {"REQUEST_WEIGHT": 1, "RAW_REQUESTS": 1}
+
+# REQUEST_WEIGHT and RAW_REQUESTS are counted by ip, ORDERS by account
+_RATE_LIMIT_SCOPE = {
+    "REQUEST_WEIGHT": RateLimitScope.IP,
+    "RAW_REQUESTS": RateLimitScope.IP,
+    "ORDERS": RateLimitScope.ACCOUNT,
+}
+
+_INTERVAL_UNIT = {
+    "SECOND": (RefillRateUnit.SECOND, "S"),
+    "MINUTE": (RefillRateUnit.MINUTE, "M"),
+    "HOUR": (RefillRateUnit.HOUR, "H"),
+    "DAY": (RefillRateUnit.DAY, "D"),
+}
+
+# response header prefix to bucket name prefix. eg. X-MBX-USED-WEIGHT-1M -> REQUEST_WEIGHT_1M
+_HEADER_PREFIX = {
+    "X-MBX-USED-WEIGHT-": "REQUEST_WEIGHT_",
+    "X-MBX-ORDER-COUNT-": "ORDERS_",
+}
+
+
+def _bucket_name(rate_limit: dict) -> str:
+    """eg. REQUEST_WEIGHT_1M, ORDERS_10S"""
+    _, suffix = _INTERVAL_UNIT[rate_limit["interval"]]
+    return f"{rate_limit['rateLimitType']}_{rate_limit['intervalNum']}{suffix}"
+
+
+def make_buckets(
+    rate_limits: list[dict], scope: RateLimitScope
+) -> dict[str, AsyncThrottler]:
+    """Create one fixed window bucket per rate limit of `scope`, binance
+    counts its limits in fixed windows"""
+    buckets = {}
+    for rate_limit in rate_limits:
+        if _RATE_LIMIT_SCOPE.get(rate_limit["rateLimitType"]) != scope:
+            continue
+        unit, _ = _INTERVAL_UNIT[rate_limit["interval"]]
+        buckets[_bucket_name(rate_limit)] = FixedWindowThrottler(
+            rate_limit["limit"], rate_limit["intervalNum"], unit
+        )
+    return buckets
+
+
+class BnceRateLimiter:
+    """Weight aware rate limiter for a single account.
+
+    Combines ip scoped buckets, which should be shared by every account using
+    the same ip, with the account's own order count buckets. A 429 or 418
+    suspends the ip scoped buckets, which holds back every account (and
+    process) sharing them, unless only the account's order count was exceeded.
+    """
+
+    def __init__(
+        self,
+        ip_buckets: dict[str, AsyncThrottler],
+        account_buckets: dict[str, AsyncThrottler] | None = None,
+        endpoint_weights: dict[str, dict[str, int]] | None = None,
+    ) -> None:
+        self._throttler = CompositeThrottler({**ip_buckets, **(account_buckets or {})})
+        self._account_bucket_names = frozenset(account_buckets or ())
+        self._weights = {
+            endpoint: self._bucket_weights(weights)
+            for endpoint, weights in (endpoint_weights or BNCE_ENDPOINT_WEIGHTS).items()
+        }
+        self._default_weights = self._bucket_weights(_DEFAULT_ENDPOINT_WEIGHT)
+
+    @classmethod
+    def from_rate_limits(
+        cls,
+        rate_limits: list[dict] | None = None,
+        ip_buckets: dict[str, AsyncThrottler] | None = None,
+    ) -> "BnceRateLimiter":
+        """Create limiter from exchangeInfo `rateLimits`. Pass `ip_buckets` to share them."""
+        rate_limits = rate_limits or BNCE_DEFAULT_RATE_LIMITS
+        if ip_buckets is None:
+            ip_buckets = make_buckets(rate_limits, RateLimitScope.IP)
+        return cls(ip_buckets, make_buckets(rate_limits, RateLimitScope.ACCOUNT))
+
+    @property
+    def throttler(self) -> CompositeThrottler:
+        return self._throttler
+
+    def _bucket_weights(self, weights: dict[str, int]) -> dict[str, int]:
+        """Expand weight per rate limit type to weight per bucket"""
+        bucket_weights = {}
+        for name in self._throttler.buckets:
+            for limit_type, weight in weights.items():
+                # bucket name is {type}_{interval}, types may share a prefix
+                if name.rsplit("_", 1)[0] == limit_type and weight:
+                    bucket_weights[name] = weight
+        return bucket_weights
+
+    async def acquire(self, endpoint: str, priority: bool = False):
+        """Acquire weight of `endpoint`, eg. "POST /api/v3/order", across all
+        buckets. `priority` requests go ahead of queued ones and may use
+        reserved weight (eg. cancels of a kill switch)"""
+        weights = self._weights.get(endpoint, self._default_weights)
+        if priority:
+            await self._throttler.acquire_priority(weights)
+        else:
+            await self._throttler.acquire(weights)
+
+    def wait_time_s(self, endpoint: str) -> float:
+        """Seconds until a request to `endpoint` could go, inf while earlier
+        requests are still waiting"""
+        if self._throttler.waiters:
+            return math.inf
+        return self._throttler.wait_time_s(
+            self._weights.get(endpoint, self._default_weights)
+        )
+
+    def align(self, exchange_time_s: float):
+        """Align the windows of every bucket to the exchange clock,
+        `exchange_time_s` is its time now"""
+        for bucket in self._throttler.buckets.values():
+            if isinstance(bucket, FixedWindowThrottler):
+                bucket.align(exchange_time_s)
+
+    def set_rate_scale(self, scale: float):
+        """Send at `scale` times the configured limits, eg. to leave room for
+        other processes using the same ip"""
+        self._throttler.set_rate_scale(scale)
+
+    def update(self, status: int, headers: Mapping[str, str]):
+        """Resync buckets with X-MBX-USED-WEIGHT-* and X-MBX-ORDER-COUNT-* headers.
+
+        On 429 (too many requests) or 418 (ip banned) all acquisitions are
+        suspended for the Retry-After duration.
+        """
+        exceeded = set()
+        for key, value in headers.items():
+            key = key.upper()
+            for prefix, name_prefix in _HEADER_PREFIX.items():
+                if key.startswith(prefix):
+                    self._sync_used(
+                        name_prefix + key[len(prefix) :], int(value), exceeded
+                    )
+        self._suspend_on_ban(status, headers.get("Retry-After"), exceeded)
+
+    def update_from_rate_limits(self, status: int, rate_limits: list[dict]):
+        """Resync buckets with `rateLimits` counts of a websocket api response"""
+        exceeded = set()
+        for rate_limit in rate_limits:
+            if "count" in rate_limit and rate_limit["interval"] in _INTERVAL_UNIT:
+                self._sync_used(_bucket_name(rate_limit), rate_limit["count"], exceeded)
+        self._suspend_on_ban(status, None, exceeded)
+
+    def _sync_used(self, name: str, used: int, exceeded: set[str]):
+        """Resync bucket `name`, added to `exceeded` if `used` is over its limit"""
+        bucket = self._throttler.buckets.get(name)
+        if bucket is not None:
+            bucket.sync_used(used)
+            if used > bucket.bucket_size_max:
+                exceeded.add(name)
+
+    def _suspend_on_ban(
+        self, status: int, retry_after: str | None, exceeded: set[str]
+    ):
+        if status not in (418, 429):
+            return
+        seconds = float(retry_after) if retry_after else 60
+        if status == 429 and exceeded and exceeded <= self._account_bucket_names:
+            # only the order count of this account, other accounts may go on
+            self._throttler.suspend(seconds, exceeded)
+            return
+        # ip scoped limits, or an ip ban (418): every account and process
+        # sharing the ip buckets stops until Retry-After
+        if status == 418 and self._throttler.suspended_s() < seconds:
+            logging.error(f"Ip banned, suspending all requests for {seconds} s")
+        self._throttler.suspend(seconds)
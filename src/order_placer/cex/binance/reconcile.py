@@ -0,0 +1,175 @@
+from decimal import Decimal, InvalidOperation
+import logging
+
+from order_placer.cex.binance.order_store import BnceOrder
+
+# ids listed per kind of discrepancy when logging a report
+_MAX_LOGGED = 10
+
+
+class BnceReconciliation:
+    """Orders recorded by execution diffed against the exchange, discrepancies
+    as client order ids"""
+
+    __slots__ = (
+        "checked",
+        "matched",
+        "open",
+        "missing",
+        "duplicates",
+        "mismatched",
+        "unexpected",
+        "unchecked",
+    )
+
+    def __init__(self) -> None:
+        self.checked = 0  # exchange orders of the run
+        self.matched = 0
+        self.open = 0  # matched and still open
+        self.missing: list[str] = []  # placed per execution, unknown to the exchange
+        self.duplicates: list[str] = []  # more than one exchange order per id
+        self.mismatched: list[str] = []  # symbol, side, price, qty or id differ
+        self.unexpected: list[str] = []  # on the exchange, not placed per execution
+        self.unchecked = 0  # placed orders of account+symbol pairs not retrieved
+
+    @property
+    def ok(self) -> bool:
+        return not (
+            self.missing
+            or self.duplicates
+            or self.mismatched
+            or self.unexpected
+            or self.unchecked
+        )
+
+    def merge(self, other: "BnceReconciliation"):
+        self.checked += other.checked
+        self.matched += other.matched
+        self.open += other.open
+        self.missing.extend(other.missing)
+        self.duplicates.extend(other.duplicates)
+        self.mismatched.extend(other.mismatched)
+        self.unexpected.extend(other.unexpected)
+        self.unchecked += other.unchecked
+
+    def log(self):
+        logging.info(
+            f"Reconciled {self.checked} exchange orders: {self.matched} match"
+            f" ({self.open} open)"
+        )
+        for name, ids in (
+            ("missing", self.missing),
+            ("duplicated", self.duplicates),
+            ("mismatched", self.mismatched),
+            ("unexpected", self.unexpected),
+        ):
+            if ids:
+                more = ""
+                if len(ids) > _MAX_LOGGED:
+                    more = f" and {len(ids) - _MAX_LOGGED} more"
+                logging.error(f"{len(ids)} {name} orders: {ids[:_MAX_LOGGED]}{more}")
+        if self.unchecked:
+            logging.error(f"{self.unchecked} placed orders could not be reconciled")
+
+
+def _same_decimal(a: str, b) -> bool:
+    try:
+        return Decimal(a) == Decimal(b)
+    except (InvalidOperation, TypeError):
+        return False
+
+
+class BnceOrderReconciler:
+    """Records the outcome of every order of an execution and diffs them
+    against the orders of the exchange in a single pass.
+
+    Orders are indexed by row index, parsed back from client order ids
+    (`client_order_id_prefix` + row index), so exchange orders of other
+    clients or files are ignored.
+    """
+
+    def __init__(self, client_order_id_prefix: str) -> None:
+        self._prefix = client_order_id_prefix
+        # by row index, order and exchange order id of its ack
+        self._placed: dict[int, tuple[BnceOrder, int | None]] = {}
+        # rows placed in a previous run, per the journal
+        self._skipped: set[int] = set()
+
+    def placed(self, order: BnceOrder, order_id: int | None):
+        self._placed[order.idx] = (order, order_id)
+
+    def skipped(self, idx: int):
+        self._skipped.add(idx)
+
+    def _idx(self, client_order_id) -> int | None:
+        if not isinstance(client_order_id, str) or not client_order_id.startswith(
+            self._prefix
+        ):
+            return None
+        try:
+            return int(client_order_id[len(self._prefix) :])
+        except ValueError:
+            return None
+
+    def reconcile(
+        self,
+        exchange_orders: dict[tuple[int, str], list[dict]],
+        open_orders: dict[tuple[int, str], list[dict]],
+        unchecked: set[tuple[int, str]] | None = None,
+    ) -> BnceReconciliation:
+        """Diff recorded orders against `exchange_orders` (allOrders) and
+        `open_orders` (openOrders) by (account, symbol). Placed orders of
+        `unchecked` pairs, which could not be retrieved, are only counted."""
+        unchecked = unchecked or set()
+        report = BnceReconciliation()
+        # exchange orders by row index, with the account they were listed for
+        seen: dict[int, list[tuple[int, dict]]] = {}
+        for (account, _), orders in exchange_orders.items():
+            for data in orders:
+                idx = self._idx(data.get("clientOrderId"))
+                if idx is None:
+                    continue
+                report.checked += 1
+                seen.setdefault(idx, []).append((account, data))
+        open_idx = {
+            self._idx(data.get("clientOrderId"))
+            for orders in open_orders.values()
+            for data in orders
+        }
+
+        for idx, (order, order_id) in self._placed.items():
+            if (order.account, order.symbol) in unchecked:
+                report.unchecked += 1
+                continue
+            matches = seen.pop(idx, None)
+            client_order_id = f"{self._prefix}{idx}"
+            if matches is None:
+                report.missing.append(client_order_id)
+                continue
+            if len(matches) > 1:
+                report.duplicates.append(client_order_id)
+                continue
+            account, data = matches[0]
+            if (
+                account != order.account
+                or data.get("symbol") != order.symbol
+                or data.get("side") != order.side.value
+                or not _same_decimal(order.price_str(), data.get("price"))
+                or not _same_decimal(order.qty_str(), data.get("origQty"))
+                or (order_id is not None and data.get("orderId") != order_id)
+            ):
+                report.mismatched.append(client_order_id)
+                continue
+            report.matched += 1
+            if idx in open_idx:
+                report.open += 1
+
+        # left over exchange orders were not placed according to execution
+        for idx, matches in seen.items():
+            if idx in self._skipped:
+                continue
+            client_order_id = f"{self._prefix}{idx}"
+            report.unexpected.append(client_order_id)
+            if len(matches) > 1:
+                report.duplicates.append(client_order_id)
+        return report
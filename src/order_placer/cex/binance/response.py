@@ -0,0 +1,64 @@
+import json
+
+import aiohttp
+
+try:
+    import orjson
+except ImportError:  # optional, decoding falls back to the json module
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+else:
+    loads = json.loads
+
+
+class BnceOrderAck:
+    """Fields of a placed order response execution keeps, whatever
+    newOrderRespType it was requested with. `status` is None for ACK responses"""
+
+    __slots__ = ("order_id", "client_order_id", "status")
+
+    def __init__(
+        self,
+        order_id: int | None,
+        client_order_id: str | None,
+        status: str | None = None,
+    ) -> None:
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.status = status
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BnceOrderAck":
+        return cls(data.get("orderId"), data.get("clientOrderId"), data.get("status"))
+
+    def __repr__(self) -> str:
+        return (
+            f"{{orderId: {self.order_id}, clientOrderId: {self.client_order_id},"
+            f" status: {self.status}}}"
+        )
+
+
+async def read_order_response(res) -> BnceOrderAck | dict | None:
+    """Ack of an order response, else its error body (None if not json).
+
+    Rest bodies are read as bytes and released right away, so the connection
+    goes back to the pool before decoding, and decoded with orjson when
+    installed. Websocket responses arrive decoded.
+    """
+    if isinstance(res, aiohttp.ClientResponse):
+        try:
+            body = await res.read()
+        finally:
+            res.release()
+        try:
+            data = loads(body)
+        except ValueError:
+            # error bodies are not always json (eg. 5xx from a proxy)
+            return None
+    else:
+        data = await res.json()
+    if res.status < 300 and isinstance(data, dict) and "code" not in data:
+        return BnceOrderAck.from_dict(data)
+    return data
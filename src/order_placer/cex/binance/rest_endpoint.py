@@ -3,21 +3,37 @@ import hashlib
 import hmac
 import os
 import time
+from time import monotonic_ns, perf_counter_ns
 from typing_extensions import Self
 import urllib.parse
 
 import aiohttp
+from yarl import URL
 
-from order_placer.cex.binance.enums import BnceOrderSide, BnceOrderType, BnceOrderTimeInForce
+from order_placer.cex.binance.clock import BnceServerClock
+from order_placer.cex.binance.enums import (
+    BnceOrderRespType,
+    BnceOrderSide,
+    BnceOrderTimeInForce,
+    BnceOrderType,
+)
 from order_placer.cex.binance.mock import MockBnceRestEndpointV3
+from order_placer.cex.binance.rate_limits import BnceRateLimiter
 from order_placer.cex.core.throttler import AsyncThrottler, RefillRateUnit
+from order_placer.core.metrics import LatencyScope
 
 
-def _hashing(query_string: str, secret_key: str) -> str:
-    """hashing used to sign bnce rest requests"""
-    return hmac.new(
-        secret_key.encode("utf-8"), query_string.encode("utf-8"), hashlib.sha256
-    ).hexdigest()
+def _make_hmac(secret_key: str | None) -> hmac.HMAC | None:
+    """keyed hmac context, `copy()` it to sign without rehashing the key"""
+    if secret_key is None:
+        return None
+    return hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+def _sign(keyed_hmac: hmac.HMAC, query_string: str) -> str:
+    h = keyed_hmac.copy()
+    h.update(query_string.encode("utf-8"))
+    return h.hexdigest()
 
 
 def _get_timestamp_ms() -> int:
@@ -38,34 +54,117 @@ class BnceRestEndpointV3:
         secret_key: str | None = None,
         throttle_bucket_size: int = 45,
         throttle_refill_rate_s: int = 5,
+        rate_limiter: BnceRateLimiter | None = None,
+        latency: LatencyScope | None = None,
+        clock: BnceServerClock | None = None,
     ):
+        """`rate_limiter` replaces the single weight token bucket of
+        `throttle_bucket_size` and `throttle_refill_rate_s` when given.
+        Sign, throttle and round trip time of orders are recorded in `latency`.
+        Signed requests are stamped with `clock` time and recvWindow (the
+        local clock and none without), once they leave the rate limiter."""
         self._session = session
         self._api_key = api_key
         self._secret_key = secret_key
-        self._throttler = AsyncThrottler(
-            throttle_bucket_size, throttle_refill_rate_s, RefillRateUnit.SECOND
+        self._throttler = None
+        if rate_limiter is None:
+            self._throttler = AsyncThrottler(
+                throttle_bucket_size, throttle_refill_rate_s, RefillRateUnit.SECOND
+            )
+        self._rate_limiter = rate_limiter
+        self._latency = latency
+        self._clock = clock
+        # shared by every signed request of the account
+        self._hmac = _make_hmac(secret_key)
+        self._headers = {
+            "Content-Type": "application/json;charset=utf-8",
+            "X-MBX-APIKEY": self._api_key or "",
+        }
+
+    def prepare_order(
+        self,
+        symbol: str,
+        qty: Decimal | str,
+        price: Decimal | str,
+        side: BnceOrderSide | None = None,
+        type: BnceOrderType | None = None,
+        time_in_force: BnceOrderTimeInForce | None = None,
+        client_order_id: str | None = None,
+        resp_type: BnceOrderRespType | None = None,
+    ) -> str:
+        """Returns the url encoded order payload, send it with `post_prepared_order`"""
+        payload = {
+            "symbol": symbol,
+            "side": side.value,
+            "type": type.value,
+            "timeInForce": time_in_force.value,
+            "quantity": str(qty),
+            "price": str(price),
+        }
+        if client_order_id is not None:
+            payload["newClientOrderId"] = client_order_id
+        if resp_type is not None:
+            payload["newOrderRespType"] = resp_type.value
+        return urllib.parse.urlencode(payload, True)
+
+    async def post_prepared_order(self, prepared: str) -> aiohttp.ClientResponse:
+        """Send an order from `prepare_order`, only recvWindow, timestamp and
+        signature are added"""
+        return await self._signed_query_request(
+            "POST", "/api/v3/order", prepared, self._latency
         )
 
     async def post_order(
         self,
         symbol: str,
-        qty: Decimal,
-        price: Decimal,
+        qty: Decimal | str,
+        price: Decimal | str,
         side: BnceOrderSide | None = None,
         type: BnceOrderType | None = None,
         time_in_force: BnceOrderTimeInForce | None = None,
+        client_order_id: str | None = None,
+        resp_type: BnceOrderRespType | None = None,
+    ) -> aiohttp.ClientResponse:
+        return await self.post_prepared_order(
+            self.prepare_order(
+                symbol, qty, price, side, type, time_in_force, client_order_id, resp_type
+            )
+        )
+
+    async def get_order(
+        self, symbol: str, client_order_id: str
     ) -> aiohttp.ClientResponse:
         return await self._signed_http_request(
-            "POST",
+            "GET",
             "/api/v3/order",
-            {
-                "symbol": symbol,
-                "side": side.value,
-                "type": type.value,
-                "timeInForce": time_in_force.value,
-                "quantity": str(qty),
-                "price": str(price),
-            },
+            {"symbol": symbol, "origClientOrderId": client_order_id},
+        )
+
+    async def get_open_orders(self, symbol: str) -> aiohttp.ClientResponse:
+        return await self._signed_http_request(
+            "GET", "/api/v3/openOrders", {"symbol": symbol}
+        )
+
+    async def get_all_orders(
+        self,
+        symbol: str,
+        start_time_ms: int | None = None,
+        order_id: int | None = None,
+        limit: int = 1000,
+    ) -> aiohttp.ClientResponse:
+        """Orders of `symbol` from `order_id`, else placed since `start_time_ms`
+        (at most 24 hours back), by order id"""
+        payload = {"symbol": symbol, "limit": limit}
+        if order_id is not None:
+            payload["orderId"] = order_id
+        elif start_time_ms is not None:
+            payload["startTime"] = start_time_ms
+        return await self._signed_http_request("GET", "/api/v3/allOrders", payload)
+
+    async def cancel_open_orders(self, symbol: str) -> aiohttp.ClientResponse:
+        """Cancel every open order of `symbol`, ahead of queued requests"""
+        return await self._signed_http_request(
+            "DELETE", "/api/v3/openOrders", {"symbol": symbol}, priority=True
         )
 
     async def get_symbols(self) -> aiohttp.ClientResponse:
@@ -74,40 +173,100 @@ class BnceRestEndpointV3:
     async def get_account_info(self) -> aiohttp.ClientResponse:
         return await self._signed_http_request("GET", "/api/v3/account")
 
+    async def get_server_time(self) -> tuple[int, aiohttp.ClientResponse]:
+        """Response and `time.monotonic_ns` it was sent at, after the rate
+        limiter let it go"""
+        await self._acquire("GET", "/api/v3/time")
+        sent_ns = monotonic_ns()
+        resp = await self._session.request("GET", "/api/v3/time")
+        self._update_rate_limits(resp)
+        return sent_ns, resp
+
+    async def ping(self) -> aiohttp.ClientResponse:
+        """Cheapest request, used to open and verify pooled connections"""
+        return await self._unsigned_http_request("GET", "/api/v3/ping")
+
+    async def _acquire(self, http_method: str, path: str, priority: bool = False):
+        if self._rate_limiter is None:
+            await self._throttler.acquire()
+        else:
+            await self._rate_limiter.acquire(f"{http_method} {path}", priority)
+
+    def _update_rate_limits(self, resp: aiohttp.ClientResponse):
+        if self._rate_limiter is not None:
+            self._rate_limiter.update(resp.status, resp.headers)
+
     async def _unsigned_http_request(
         self, http_method: str, path: str, params: dict | None = None
     ) -> aiohttp.ClientResponse:
-        await self._throttler.acquire()
+        await self._acquire(http_method, path)
         resp = await self._session.request(
             http_method,
             path,
             params=params,
         )
+        self._update_rate_limits(resp)
         return resp
 
     async def _signed_http_request(
-        self, http_method: str, path: str, payload: dict | None = None
+        self,
+        http_method: str,
+        path: str,
+        payload: dict | None = None,
+        priority: bool = False,
     ) -> aiohttp.ClientResponse:
         """Performs a binance signed request"""
-        query_string = urllib.parse.urlencode(payload or {}, True)
+        return await self._signed_query_request(
+            http_method,
+            path,
+            urllib.parse.urlencode(payload or {}, True),
+            priority=priority,
+        )
+
+    def _signed_url(self, path: str, query_string: str) -> URL:
+        """Timestamp and sign an url encoded payload"""
+        if self._clock is not None:
+            stamp = self._clock.stamp()
+        else:
+            stamp = f"timestamp={_get_timestamp_ms()}"
         if query_string:
-            query_string = "{}&timestamp={}".format(query_string, _get_timestamp_ms())
+            query_string = f"{query_string}&{stamp}"
         else:
-            query_string = "timestamp={}".format(_get_timestamp_ms())
-
-        url = (
-            path
-            + "?"
-            + query_string
-            + "&signature="
-            + _hashing(query_string, self._secret_key)
+            query_string = stamp
+        # already encoded, skip requoting by yarl
+        return URL(
+            f"{path}?{query_string}&signature={_sign(self._hmac, query_string)}",
+            encoded=True,
         )
-        headers = {
-            "Content-Type": "application/json;charset=utf-8",
-            "X-MBX-APIKEY": self._api_key,
-        }
 
-        await self._throttler.acquire()
-        return await self._session.request(
-            method=http_method, url=url, params={}, headers=headers
+    async def _signed_query_request(
+        self,
+        http_method: str,
+        path: str,
+        query_string: str,
+        latency: LatencyScope | None = None,
+        priority: bool = False,
+    ) -> aiohttp.ClientResponse:
+        """Performs a binance signed request with an url encoded payload. It
+        is stamped and signed only once the rate limiter lets it go, time
+        spent waiting does not count against recvWindow"""
+        start_ns = perf_counter_ns()
+        await self._acquire(http_method, path, priority)
+        acquired_ns = perf_counter_ns()
+        url = self._signed_url(path, query_string)
+        signed_ns = perf_counter_ns()
+        sent_ns = monotonic_ns()
+        resp = await self._session.request(
+            method=http_method,
+            url=url,
+            headers=self._headers,
+            trace_request_ctx=latency,
         )
+        if latency is not None:
+            latency.record("throttle", acquired_ns - start_ns)
+            latency.record("sign", signed_ns - acquired_ns)
+            latency.record("round_trip", perf_counter_ns() - signed_ns)
+        if self._clock is not None:
+            self._clock.observe_date(resp.headers.get("Date"), sent_ns)
+        self._update_rate_limits(resp)
+        return resp
@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+import signal
+from time import perf_counter_ns
+
+from order_placer.cex.binance.order import BnceExecutionResult, BnceSpotLimitOrderPlacer
+from order_placer.cex.binance.rate_limits import (
+    BNCE_DEFAULT_RATE_LIMITS,
+    RateLimitScope,
+    make_buckets,
+)
+from order_placer.cex.core.throttler import RefillRateUnit, SharedFixedWindowThrottler
+from order_placer.core.log import logging_settings, setup_logging
+
+# ip scoped bucket states shared with the worker process, set by `_init_worker`
+_ip_bucket_states: dict[str, tuple] = {}
+
+
+def _init_worker(log_settings: dict, ip_bucket_states: dict[str, tuple]):
+    setup_logging(**log_settings)
+    _ip_bucket_states.update(ip_bucket_states)
+
+
+def _execute_shard(
+    account_metadata: dict, orders_fp: str, placer_kwargs: dict
+) -> BnceExecutionResult:
+    """Runs in a worker process with its own loop, session and endpoints"""
+    ip_buckets = {
+        name: SharedFixedWindowThrottler(limit, interval_s, RefillRateUnit.SECOND, state)
+        for name, (limit, interval_s, state) in _ip_bucket_states.items()
+    }
+
+    async def _run() -> BnceExecutionResult:
+        async with BnceSpotLimitOrderPlacer(
+            account_metadata,
+            orders_fp,
+            ip_buckets=ip_buckets,
+            account_filter=frozenset(account_metadata),
+            **placer_kwargs,
+        ) as app:
+            # ctrl-c reaches every process of the group, each worker cancels
+            # open orders of its own accounts
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, app.abort)
+            return await app.execute()
+
+    return asyncio.run(_run())
+
+
+async def execute_sharded(
+    account_metadata: dict, orders_fp: str, workers: int, **placer_kwargs
+) -> BnceExecutionResult:
+    """Execute orders in `orders_fp` with accounts split across `workers` processes.
+
+    Every worker reads the orders file and keeps the rows of its own accounts,
+    so row indices (and client order ids) match a single process run. The ip
+    wide rate limit buckets are shared by all workers. Each worker journals to
+    `{journal_fp}.{worker}of{workers}`, resume with the same number of workers.
+    """
+    start_time_ns = perf_counter_ns()
+    account_ids = sorted(account_metadata)
+    workers = max(1, min(workers, len(account_ids)))
+    shards = [account_ids[i::workers] for i in range(workers)]
+    logging.info(f"Starting order execution with {workers} workers: {shards}")
+
+    ctx = multiprocessing.get_context("spawn")
+    ip_bucket_states = {
+        name: (
+            bucket.bucket_size_max,
+            bucket.interval_s,
+            SharedFixedWindowThrottler.make_state(bucket.bucket_size_max, ctx),
+        )
+        for name, bucket in make_buckets(
+            placer_kwargs.get("rate_limits") or BNCE_DEFAULT_RATE_LIMITS,
+            RateLimitScope.IP,
+        ).items()
+    }
+
+    journal_fp = placer_kwargs.pop("journal_fp", None)
+    loop = asyncio.get_running_loop()
+    result = BnceExecutionResult()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(
+            logging_settings() or {"level": logging.getLogger().level},
+            ip_bucket_states,
+        ),
+    ) as pool:
+        futures = []
+        for i, shard in enumerate(shards):
+            kwargs = dict(placer_kwargs)
+            if journal_fp is not None:
+                kwargs["journal_fp"] = f"{journal_fp}.{i + 1}of{workers}"
+            futures.append(
+                loop.run_in_executor(
+                    pool,
+                    _execute_shard,
+                    {acc_id: account_metadata[acc_id] for acc_id in shard},
+                    orders_fp,
+                    kwargs,
+                )
+            )
+        for shard_result in await asyncio.gather(*futures):
+            result.merge(shard_result)
+
+    # execution time is the longest shard's, which leaves warm up out
+    wall_ns = perf_counter_ns() - start_time_ns
+    result.log()
+    logging.info(
+        f"Workers ran for {wall_ns / 1000000} ms, {(wall_ns - result.elapsed_ns) / 1000000}"
+        " ms of it outside execution (process start, clock sync, exchange info,"
+        " warm up, reconciliation)"
+    )
+    return result
@@ -0,0 +1,421 @@
+import asyncio
+from decimal import Decimal
+import logging
+import math
+import random
+import time
+from time import perf_counter_ns
+
+from order_placer.cex.binance.clock import BnceServerClock
+from order_placer.cex.binance.enums import (
+    BnceOrderRespType,
+    BnceOrderSide,
+    BnceOrderTimeInForce,
+    BnceOrderType,
+)
+from order_placer.cex.binance.mock import (
+    mock_all_orders,
+    mock_cancel_open_orders,
+    mock_exchange_info,
+    mock_order_response,
+)
+from order_placer.cex.binance.mock_rest_server import MockBnceRateLimits
+from order_placer.cex.binance.order import BnceSpotLimitOrderPlacer
+from order_placer.cex.binance.rate_limits import BnceRateLimiter
+from order_placer.core.metrics import LatencyScope
+from order_placer.core.mock import MockClientResponse
+from order_placer.core.retry import RetryPolicy
+from order_placer.core.virtual_time import run_virtual
+
+# completion curve points, fraction of an account's orders done
+_CURVE_POINTS = (0.25, 0.5, 0.75, 1.0)
+# every simulated account sends from the same address
+_SIMULATED_IP = "127.0.0.1"
+
+
+def _loop_time_ns() -> int:
+    """`time.monotonic_ns` of the running (virtual) loop"""
+    return int(asyncio.get_running_loop().time() * 1e9)
+
+
+class _SimulatedBnceExchange:
+    """Binance spot api on the virtual clock of the running loop, answering
+    like `MockBnceRestServer`: `rate_limits` enforced by `MockBnceRateLimits`,
+    orders kept by api key, log normal latency. `failure_rate` of orders get
+    a 5xx of unknown outcome, half of them placed. Exchange time starts at the
+    wall clock and moves with the loop."""
+
+    def __init__(
+        self,
+        rate_limits: list[dict] | None,
+        exchange_info: dict,
+        latency_median_s: float,
+        latency_sigma: float,
+        failure_rate: float,
+        rng: random.Random,
+    ) -> None:
+        self._limits = MockBnceRateLimits(rate_limits)
+        self._exchange_info = exchange_info
+        self._latency_median_s = latency_median_s
+        self._latency_sigma = latency_sigma
+        self._failure_rate = failure_rate
+        self._random = rng
+        self._order_counter = 0
+        self._orders: dict[str | None, dict[str, dict]] = {}
+        self._epoch_s = time.time() - asyncio.get_running_loop().time()
+
+    def now_s(self) -> float:
+        return self._epoch_s + asyncio.get_running_loop().time()
+
+    def latency_s(self) -> float:
+        return self._latency_median_s * math.exp(
+            self._latency_sigma * self._random.gauss(0, 1)
+        )
+
+    def handle(
+        self, api_key: str | None, endpoint: str, params: dict
+    ) -> tuple[int, dict | list, dict]:
+        """Status, body and headers of a request reaching the exchange now"""
+        headers, error = self._limits.count(_SIMULATED_IP, api_key, endpoint, self.now_s())
+        if error is not None:
+            status, code, msg = error
+            return status, {"code": code, "msg": msg}, headers
+        orders = self._orders.setdefault(api_key, {})
+        if endpoint == "GET /api/v3/time":
+            return 200, {"serverTime": int(self.now_s() * 1000)}, headers
+        if endpoint == "GET /api/v3/exchangeInfo":
+            return 200, self._exchange_info, headers
+        if endpoint == "POST /api/v3/order":
+            return (*self._post_order(orders, params), headers)
+        if endpoint == "GET /api/v3/order":
+            order = orders.get(params["origClientOrderId"])
+            if order is None:
+                return 400, {"code": -2013, "msg": "Order does not exist."}, headers
+            return 200, order, headers
+        if endpoint == "GET /api/v3/openOrders":
+            return (
+                200,
+                [
+                    order
+                    for order in orders.values()
+                    if order["status"] == "NEW" and order["symbol"] == params["symbol"]
+                ],
+                headers,
+            )
+        if endpoint == "DELETE /api/v3/openOrders":
+            cancelled = mock_cancel_open_orders(orders.values(), params["symbol"])
+            if not cancelled:
+                return 400, {"code": -2011, "msg": "Unknown order sent."}, headers
+            return 200, cancelled, headers
+        if endpoint == "GET /api/v3/allOrders":
+            return (
+                200,
+                mock_all_orders(
+                    orders.values(),
+                    params["symbol"],
+                    params.get("startTime"),
+                    params.get("orderId"),
+                    params.get("limit", 500),
+                ),
+                headers,
+            )
+        return 200, {}, headers
+
+    def _post_order(self, orders: dict[str, dict], params: dict) -> tuple[int, dict]:
+        client_order_id = params["newClientOrderId"]
+        if client_order_id in orders:
+            return 400, {"code": -2010, "msg": "Duplicate order sent."}
+        self._order_counter += 1
+        order = {
+            "symbol": params["symbol"],
+            "orderId": self._order_counter,
+            "orderListId": -1,
+            "clientOrderId": client_order_id,
+            "transactTime": int(self.now_s() * 1000),
+            "price": params["price"],
+            "origQty": params["quantity"],
+            "side": params["side"],
+            "type": params["type"],
+            "timeInForce": params["timeInForce"],
+            "status": "NEW",
+        }
+        if self._random.random() < self._failure_rate:
+            if self._random.random() < 0.5:
+                orders[client_order_id] = order
+            return 503, {"code": -1007, "msg": "Timeout waiting for response."}
+        orders[client_order_id] = order
+        return 200, mock_order_response(order, params.get("newOrderRespType"))
+
+
+class _SimulatedBnceEndpoint:
+    """Stands in for `BnceRestEndpointV3` against a `_SimulatedBnceExchange`:
+    requests go through the account's rate limiter, which is then updated
+    with the usage headers, Retry-After and status of the response. Time spent
+    waiting on the throttler is attributed to the bucket that held the
+    request back."""
+
+    def __init__(
+        self,
+        exchange: _SimulatedBnceExchange,
+        api_key: str | None,
+        rate_limiter: BnceRateLimiter,
+        latency: LatencyScope | None,
+        bottlenecks: dict[str, dict],
+    ) -> None:
+        self._exchange = exchange
+        self._api_key = api_key
+        self._rate_limiter = rate_limiter
+        self._latency = latency
+        self._bottlenecks = bottlenecks
+
+    def prepare_order(
+        self,
+        symbol: str,
+        qty: Decimal | str,
+        price: Decimal | str,
+        side: BnceOrderSide | None = None,
+        type: BnceOrderType | None = None,
+        time_in_force: BnceOrderTimeInForce | None = None,
+        client_order_id: str | None = None,
+        resp_type: BnceOrderRespType | None = None,
+    ) -> dict:
+        return {
+            "symbol": symbol,
+            "side": side.value,
+            "type": type.value,
+            "timeInForce": time_in_force.value,
+            "quantity": str(qty),
+            "price": str(price),
+            "newClientOrderId": client_order_id,
+            "newOrderRespType": resp_type.value if resp_type is not None else None,
+        }
+
+    async def post_prepared_order(self, prepared: dict) -> MockClientResponse:
+        return await self._request("POST", "/api/v3/order", prepared, self._latency)
+
+    async def get_order(self, symbol: str, client_order_id: str) -> MockClientResponse:
+        return await self._request(
+            "GET",
+            "/api/v3/order",
+            {"symbol": symbol, "origClientOrderId": client_order_id},
+        )
+
+    async def get_open_orders(self, symbol: str) -> MockClientResponse:
+        return await self._request("GET", "/api/v3/openOrders", {"symbol": symbol})
+
+    async def get_all_orders(
+        self,
+        symbol: str,
+        start_time_ms: int | None = None,
+        order_id: int | None = None,
+        limit: int = 1000,
+    ) -> MockClientResponse:
+        return await self._request(
+            "GET",
+            "/api/v3/allOrders",
+            {
+                "symbol": symbol,
+                "startTime": start_time_ms if order_id is None else None,
+                "orderId": order_id,
+                "limit": limit,
+            },
+        )
+
+    async def cancel_open_orders(self, symbol: str) -> MockClientResponse:
+        return await self._request(
+            "DELETE", "/api/v3/openOrders", {"symbol": symbol}, priority=True
+        )
+
+    async def get_symbols(self) -> MockClientResponse:
+        return await self._request("GET", "/api/v3/exchangeInfo")
+
+    async def get_server_time(self) -> tuple[int, MockClientResponse]:
+        """Response and loop time it was sent at, after the rate limiter let
+        it go"""
+        await self._acquire("GET /api/v3/time")
+        sent_ns = _loop_time_ns()
+        return sent_ns, await self._send("GET", "/api/v3/time")
+
+    async def _acquire(self, endpoint: str, priority: bool = False) -> float:
+        """Wait for the rate limiter, returns seconds waited"""
+        loop = asyncio.get_running_loop()
+        start_s = loop.time()
+        await self._rate_limiter.acquire(endpoint, priority)
+        waited_s = loop.time() - start_s
+        if waited_s > 0:
+            name = self._rate_limiter.throttler.binding
+            stats = self._bottlenecks.setdefault(
+                name, {"first_s": start_s, "delayed": 0, "wait_s": 0.0}
+            )
+            stats["first_s"] = min(stats["first_s"], start_s)
+            stats["delayed"] += 1
+            stats["wait_s"] += waited_s
+        return waited_s
+
+    async def _send(
+        self,
+        http_method: str,
+        path: str,
+        params: dict | None = None,
+        latency: LatencyScope | None = None,
+    ) -> MockClientResponse:
+        # half the round trip there, half back
+        round_trip_s = self._exchange.latency_s()
+        await asyncio.sleep(round_trip_s / 2)
+        status, data, headers = self._exchange.handle(
+            self._api_key, f"{http_method} {path}", params or {}
+        )
+        await asyncio.sleep(round_trip_s / 2)
+        if latency is not None:
+            latency.record("round_trip", int(round_trip_s * 1e9))
+        self._rate_limiter.update(status, headers)
+        return MockClientResponse(http_method, path, status, data, headers=headers)
+
+    async def _request(
+        self,
+        http_method: str,
+        path: str,
+        params: dict | None = None,
+        latency: LatencyScope | None = None,
+        priority: bool = False,
+    ) -> MockClientResponse:
+        waited_s = await self._acquire(f"{http_method} {path}", priority)
+        if latency is not None:
+            latency.record("throttle", int(waited_s * 1e9))
+        return await self._send(http_method, path, params, latency)
+
+
+class BnceSimulationResult:
+    """Projection of `BnceSimulator.run`, times in virtual seconds from start"""
+
+    __slots__ = ("norders", "placed", "makespan_s", "elapsed_ns", "curves", "bottlenecks")
+
+    def __init__(
+        self,
+        norders: int,
+        placed: int,
+        makespan_s: float,
+        elapsed_ns: int,
+        curves: dict[int, dict[float, float]],
+        bottlenecks: dict[str, dict],
+    ) -> None:
+        self.norders = norders
+        self.placed = placed
+        self.makespan_s = makespan_s
+        self.elapsed_ns = elapsed_ns
+        self.curves = curves
+        self.bottlenecks = bottlenecks
+
+    def log(self):
+        logging.info(
+            f"Projected {self.placed}/{self.norders} orders placed in {self.makespan_s:.3f} s"
+            f" ({self.norders / self.makespan_s if self.makespan_s else 0:.1f} orders/s),"
+            f" simulated in {self.elapsed_ns / 1000000} ms."
+        )
+        for acc_id, curve in self.curves.items():
+            points = ", ".join(f"{p:.0%} at {t:.3f} s" for p, t in curve.items())
+            logging.info(f"Account {acc_id} completion: {points}")
+        for name, stats in sorted(
+            self.bottlenecks.items(), key=lambda item: item[1]["first_s"]
+        ):
+            logging.info(
+                f"Rate limit {name} is the bottleneck from {stats['first_s']:.3f} s,"
+                f" delayed {stats['delayed']} requests by {stats['wait_s']:.3f} s in total"
+            )
+
+
+class BnceSimulator:
+    """Predicts execution of an orders file on a virtual clock.
+
+    Runs `BnceSpotLimitOrderPlacer.execute` itself, configured by
+    `placer_kwargs` like in execution (window, adaptive concurrency, retries,
+    rate limits...), against a simulated exchange on a virtual clock
+    loop, so Retry-After, 429/418 handling and the adaptive controller behave
+    as they would. No request leaves the process. Rows are checked against
+    `exchange_info` (the mock exchange's by default), orders are not
+    reconciled.
+    """
+
+    def __init__(
+        self,
+        account_metadata: dict,
+        orders_fp: str,
+        latency_median_s: float = 0.1,
+        latency_sigma: float = 0.5,
+        failure_rate: float = 0.0,
+        seed: int | None = 0,
+        exchange_info: dict | None = None,
+        **placer_kwargs,
+    ) -> None:
+        self._account = account_metadata
+        self._orders_fp = orders_fp
+        self._latency_median_s = latency_median_s
+        self._latency_sigma = latency_sigma
+        self._failure_rate = failure_rate
+        self._seed = seed
+        self._exchange_info = exchange_info or mock_exchange_info()
+        self._placer_kwargs = {
+            "retry_policy": RetryPolicy(seed=seed),
+            **placer_kwargs,
+            "reconcile": False,
+            "validate": False,
+        }
+
+    def run(self) -> BnceSimulationResult:
+        """Simulate on a fresh virtual clock loop, returns in real milliseconds"""
+        start_ns = perf_counter_ns()
+        result = run_virtual(self._simulate())
+        result.elapsed_ns = perf_counter_ns() - start_ns
+        result.log()
+        return result
+
+    async def _simulate(self) -> BnceSimulationResult:
+        loop = asyncio.get_running_loop()
+        exchange = _SimulatedBnceExchange(
+            self._placer_kwargs.get("rate_limits"),
+            self._exchange_info,
+            self._latency_median_s,
+            self._latency_sigma,
+            self._failure_rate,
+            random.Random(self._seed),
+        )
+        bottlenecks: dict[str, dict] = {}
+        done_at: dict[int, list[float]] = {}
+        start_s = loop.time()
+
+        def _on_order(order, data, error):
+            done_at.setdefault(order.account, []).append(loop.time() - start_s)
+
+        async with BnceSpotLimitOrderPlacer(
+            self._account,
+            self._orders_fp,
+            clock=BnceServerClock(
+                monotonic_ns=_loop_time_ns, time_ns=lambda: int(exchange.now_s() * 1e9)
+            ),
+            endpoint_factory=lambda api_key, secret_key, rate_limiter, latency: (
+                _SimulatedBnceEndpoint(
+                    exchange, api_key, rate_limiter, latency, bottlenecks
+                )
+            ),
+            **self._placer_kwargs,
+        ) as placer:
+            result = await placer.execute(on_order=_on_order)
+        makespan_s = loop.time() - start_s
+
+        curves = {}
+        for acc_id in self._account:
+            times = done_at.get(acc_id)
+            if times:
+                curves[acc_id] = {
+                    p: times[max(0, math.ceil(p * len(times)) - 1)] for p in _CURVE_POINTS
+                }
+        for stats in bottlenecks.values():
+            stats["first_s"] -= start_s
+        return BnceSimulationResult(
+            result.norders,
+            result.placed,
+            makespan_s,
+            0,
+            curves,
+            bottlenecks,
+        )
@@ -0,0 +1,463 @@
+import csv
+
+from order_placer.cex.binance.exchange_info import BnceSymbolFilters
+from order_placer.cex.binance.fixed_point import (
+    BnceSymbolLimits,
+    decimal_places,
+    split_decimal,
+)
+
+try:
+    import numpy as np
+except ImportError:  # optional, validation falls back to pure python
+    np = None
+
+# columns of an orders file, in the order values are handed out
+ORDER_COLUMNS = ("Pair", "Direction", "Price", "Quantity", "Account")
+_SIDES = ("buy", "sell")
+_INT64_MAX = 2**63 - 1
+# longest decimal parsed as array, its digits stay below 10**18
+_MAX_NUMBER_LEN = 18
+# longer strings are looked up one by one
+_MAX_KEY_LEN = 32
+
+
+class BnceOrderColumns:
+    """Pair, Direction, Price, Quantity and Account of an orders file, in row
+    order.
+
+    With NumPy a plain file (no quotes, no blank lines, same number of fields
+    on every line) is kept as bytes with the offsets of every field, so the
+    columns are parsed by array operations without a python object per value.
+    Otherwise, or through `column`, values are lists of strings.
+    """
+
+    __slots__ = ("_nrows", "_fields", "_lists")
+
+    def __init__(
+        self,
+        lists: dict[str, list[str]] | None = None,
+        fields: dict[str, tuple] | None = None,
+        nrows: int = 0,
+    ) -> None:
+        self._lists = lists or {}
+        # name: (bytes, uint8 array of them, field starts, field ends)
+        self._fields = fields or {}
+        self._nrows = len(lists[ORDER_COLUMNS[0]]) if lists else nrows
+
+    def __len__(self) -> int:
+        return self._nrows
+
+    @classmethod
+    def read(cls, orders_fp: str) -> "BnceOrderColumns":
+        """Files that are not plain are read with `csv.reader`, skipping blank
+        lines like `csv.DictReader` does, so indices are row indices of
+        execution."""
+        with open(orders_fp, "rb") as f:
+            data = f.read()
+        if b"\r" in data:
+            data = data.replace(b"\r\n", b"\n")
+        header, _, body = data.partition(b"\n")
+        del data
+        body = body.rstrip(b"\n")
+        fields = header.decode("utf-8").split(",")
+        width = len(fields)
+        if not body or b'"' in body or b"\r" in body:
+            return cls._read_csv(orders_fp)
+        idx = [fields.index(name) for name in ORDER_COLUMNS]
+
+        if np is None:
+            text = body.decode("utf-8")
+            del body
+            if "\n\n" in text or not uniform_fields(text, width):
+                return cls._read_csv(orders_fp)
+            values = text.replace("\n", ",").split(",")
+            return cls(lists={name: values[i::width] for name, i in zip(ORDER_COLUMNS, idx)})
+
+        buf = np.frombuffer(body, dtype=np.uint8)
+        delims = np.flatnonzero((buf == ord(",")) | (buf == ord("\n")))
+        if (len(delims) + 1) % width:
+            return cls._read_csv(orders_fp)
+        # every width-th delimiter ends a line, else lines are blank or uneven
+        line_ends = (np.arange(1, len(delims) + 1) % width) == 0
+        if not np.array_equal(buf[delims] == ord("\n"), line_ends):
+            return cls._read_csv(orders_fp)
+        starts = np.concatenate(([0], delims + 1)).reshape(-1, width)
+        ends = np.append(delims, len(buf)).reshape(-1, width)
+        return cls(
+            fields={
+                name: (body, buf, starts[:, i].copy(), ends[:, i].copy())
+                for name, i in zip(ORDER_COLUMNS, idx)
+            },
+            nrows=len(starts),
+        )
+
+    @classmethod
+    def _read_csv(cls, orders_fp: str) -> "BnceOrderColumns":
+        lists = {name: [] for name in ORDER_COLUMNS}
+        with open(orders_fp, "r", newline="") as f:
+            reader = csv.reader(f, delimiter=",")
+            header = next(reader, [])
+            idx = [header.index(name) for name in ORDER_COLUMNS]
+            width = max(idx) + 1
+            targets = [lists[name] for name in ORDER_COLUMNS]
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < width:
+                    # short row, missing values are empty
+                    row = row + [""] * (width - len(row))
+                for target, i in zip(targets, idx):
+                    target.append(row[i])
+        return cls(lists=lists)
+
+    def column(self, name: str) -> list[str]:
+        """Values of column `name` as strings"""
+        if name not in self._lists:
+            data, _, starts, ends = self._fields[name]
+            self._lists[name] = [
+                data[s:e].decode("utf-8") for s, e in zip(starts.tolist(), ends.tolist())
+            ]
+        return self._lists[name]
+
+    def field(self, name: str, i: int) -> str:
+        if name in self._lists:
+            return self._lists[name][i]
+        data, _, starts, ends = self._fields[name]
+        return data[starts[i] : ends[i]].decode("utf-8")
+
+    def row(self, i: int) -> dict:
+        return {name: self.field(name, i) for name in ORDER_COLUMNS}
+
+    def _bytes(self, name: str) -> tuple:
+        """(bytes, uint8 array of them, field starts, field ends) of column `name`"""
+        if name not in self._fields:
+            encoded = [v.encode("utf-8") for v in self._lists[name]]
+            data = b"".join(encoded)
+            lengths = np.fromiter(map(len, encoded), np.int64, len(encoded))
+            ends = np.cumsum(lengths)
+            self._fields[name] = (
+                data,
+                np.frombuffer(data, dtype=np.uint8),
+                ends - lengths,
+                ends,
+            )
+        return self._fields[name]
+
+
+def uniform_fields(text: str, width: int) -> bool:
+    """Every line of `text` has `width` fields"""
+    nlines = text.count("\n") + 1
+    if text.count(",") != nlines * (width - 1):
+        return False
+    return all(line.count(",") == width - 1 for line in text.split("\n"))
+
+
+def _limits(
+    symbols: dict[str, BnceSymbolFilters],
+    pairs,
+    price_decimals: int,
+    qty_decimals: int,
+) -> tuple[dict[str, BnceSymbolLimits], int, int]:
+    """Limits of the symbols in `pairs`, with price and quantity scales wide
+    enough for both the values and the filters"""
+    used = [symbols[s] for s in set(pairs) if s in symbols]
+    price_scale = max(
+        [price_decimals]
+        + [decimal_places(d) for f in used for d in (f.tick_size, f.min_price, f.max_price)]
+    )
+    qty_scale = max(
+        [qty_decimals]
+        + [decimal_places(d) for f in used for d in (f.step_size, f.min_qty, f.max_qty)]
+    )
+    limits = {f.symbol: BnceSymbolLimits(f, price_scale, qty_scale) for f in used}
+    return limits, price_scale, qty_scale
+
+
+def validate_order_columns(
+    columns: BnceOrderColumns,
+    symbols: dict[str, BnceSymbolFilters],
+    accounts: set[int] | None = None,
+    vectorized: bool | None = None,
+) -> dict[int, list[str]]:
+    """Errors by row index of every invalid order, in row order.
+
+    Same checks as `BnceSymbolSpec.errors` of quantized orders, in exact
+    fixed point integer arithmetic: prices and
+    quantities are scaled to the most decimals found in the column or its
+    filters. With NumPy (unless `vectorized` is False) parsing and checks run
+    as array operations, falling back to pure python when values do not fit
+    in 64 bits. Rows of accounts outside `accounts` are invalid.
+    """
+    if vectorized is None:
+        vectorized = np is not None
+    if vectorized:
+        if np is None:
+            raise ValueError("vectorized validation requires numpy")
+        invalid = _validate_numpy(columns, symbols, accounts)
+        if invalid is not None:
+            return invalid
+    return _validate_python(columns, symbols, accounts)
+
+
+def _validate_python(
+    columns: BnceOrderColumns,
+    symbols: dict[str, BnceSymbolFilters],
+    accounts: set[int] | None,
+) -> dict[int, list[str]]:
+    pair_col = columns.column("Pair")
+    price_parts = [split_decimal(v) for v in columns.column("Price")]
+    qty_parts = [split_decimal(v) for v in columns.column("Quantity")]
+    limits, price_scale, qty_scale = _limits(
+        symbols,
+        pair_col,
+        max((p[1] for p in price_parts if p is not None), default=0),
+        max((q[1] for q in qty_parts if q is not None), default=0),
+    )
+    pow10 = [10**i for i in range(max(price_scale, qty_scale) + 1)]
+
+    invalid = {}
+    for i, (pair, direction, price, qty, account) in enumerate(
+        zip(
+            pair_col,
+            columns.column("Direction"),
+            price_parts,
+            qty_parts,
+            columns.column("Account"),
+        )
+    ):
+        errors = []
+        lim = limits.get(pair)
+        if lim is None:
+            errors.append("Invalid Pair")
+        if direction.lower() not in _SIDES:
+            errors.append("Invalid Direction")
+        if price is None or qty is None:
+            errors.append("Invalid price or quantity")
+        elif lim is not None:
+            price = price[0] * pow10[price_scale - price[1]]
+            qty = qty[0] * pow10[qty_scale - qty[1]]
+            if lim.tick:
+                ticks, rem = divmod(price, lim.tick)
+                # round half even
+                if 2 * rem > lim.tick or (2 * rem == lim.tick and ticks & 1):
+                    ticks += 1
+                price = ticks * lim.tick
+            if lim.step:
+                qty -= qty % lim.step
+            if not lim.trading:
+                errors.append("Symbol not trading")
+            if price < lim.min_price or (lim.max_price and price > lim.max_price):
+                errors.append("Price outside PRICE_FILTER")
+            if qty < lim.min_qty or (lim.max_qty and qty > lim.max_qty):
+                errors.append("Quantity outside LOT_SIZE")
+            if price * qty < lim.min_notional:
+                errors.append("Notional below minimum")
+        if accounts is not None and not (account.isdigit() and int(account) in accounts):
+            errors.append("Unknown Account")
+        if errors:
+            invalid[i] = errors
+    return invalid
+
+
+def _parse_numpy(
+    data: bytes, buf: "np.ndarray", starts: "np.ndarray", ends: "np.ndarray"
+) -> tuple["np.ndarray", "np.ndarray"] | None:
+    """Mantissa and decimals arrays of the decimal fields at `starts`:`ends`
+    of `buf`, mantissa is 0 where not a positive number. None if a mantissa
+    does not fit in 64 bits"""
+    n = len(starts)
+    lengths = ends - starts
+    short = lengths <= _MAX_NUMBER_LEN
+    width = max(1, int(np.max(lengths, where=short, initial=0)))
+    # fields right aligned in a (rows, width) matrix of characters, padded by "0"
+    cols = np.arange(width)
+    offsets = ends[:, None] - width + cols
+    inside = (offsets >= starts[:, None]) & short[:, None]
+    chars = buf.take(offsets, mode="clip") if len(buf) else np.empty((n, width), np.uint8)
+    np.putmask(chars, ~inside, ord("0"))
+    is_dot = chars == ord(".")
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    ndots = np.count_nonzero(is_dot, axis=1)
+    ndigits = np.count_nonzero(is_digit & inside, axis=1)
+    plain = (
+        short
+        & np.all(is_digit | is_dot, axis=1)
+        & (ndots <= 1)
+        & (ndigits > 0)
+    )
+    dot_col = np.where(ndots == 1, is_dot.argmax(axis=1), 0)
+    decimals = np.where(ndots == 1, width - 1 - dot_col, 0).astype(np.int64)
+    # the dot counts as a 0 digit, digits left of it are then worth ten times
+    # too much: remove 9/10 of their sum
+    digits = np.where(is_digit & plain[:, None], chars - ord("0"), 0).astype(np.int64)
+    pow10 = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    mantissa = digits @ pow10
+    mantissa -= (np.where(cols < dot_col[:, None], digits, 0) @ pow10) // 10 * 9
+    # exponents, signs, spaces, long values
+    for i in np.flatnonzero(~plain).tolist():
+        parts = split_decimal(data[starts[i] : ends[i]].decode("utf-8"))
+        if parts is not None:
+            if parts[0] > _INT64_MAX:
+                return None
+            mantissa[i], decimals[i] = parts
+    return mantissa, decimals
+
+
+def _encode(
+    data: bytes, buf: "np.ndarray", starts: "np.ndarray", ends: "np.ndarray"
+) -> tuple[list[str], "np.ndarray"]:
+    """Distinct strings of the fields at `starts`:`ends` of `buf` and the
+    index of every field's string in them"""
+    n = len(starts)
+    lengths = ends - starts
+    short = lengths <= _MAX_KEY_LEN
+    width = max(1, int(np.max(lengths, where=short, initial=0)))
+    # fields left aligned in a (rows, width) matrix of bytes, padded by nul,
+    # read as 8 byte words and numbered word by word
+    width = -(-width // 8) * 8
+    cols = np.arange(width)
+    offsets = starts[:, None] + cols
+    inside = (cols < lengths[:, None]) & short[:, None]
+    chars = buf.take(offsets, mode="clip") if len(buf) else np.empty((n, width), np.uint8)
+    np.putmask(chars, ~inside, 0)
+    rows = np.flatnonzero(short)
+    words = chars.view(np.uint64)[rows]
+    key_codes = np.zeros(len(rows), dtype=np.int64)
+    first = np.zeros(0, dtype=np.int64)
+    for j in range(words.shape[1]):
+        uniques, word_codes = np.unique(words[:, j], return_inverse=True)
+        _, first, key_codes = np.unique(
+            key_codes * len(uniques) + word_codes.reshape(-1),
+            return_index=True,
+            return_inverse=True,
+        )
+        key_codes = key_codes.reshape(-1)
+    codes = np.zeros(n, dtype=np.int64)
+    codes[rows] = key_codes
+    first = rows[first]
+    strings = [
+        data[s:e].decode("utf-8")
+        for s, e in zip(starts[first].tolist(), ends[first].tolist())
+    ]
+    index = {}
+    for i in np.flatnonzero(~short).tolist():
+        value = data[starts[i] : ends[i]].decode("utf-8")
+        codes[i] = index.setdefault(value, len(strings) + len(index))
+    strings.extend(index)
+    return strings, codes
+
+
+def _lookup(columns: BnceOrderColumns, name: str, fn) -> "np.ndarray":
+    """`fn` of every value of column `name`, called once per distinct value"""
+    strings, codes = _encode(*columns._bytes(name))
+    return np.array([fn(v) for v in strings], dtype=bool)[codes]
+
+
+def _rescale(
+    mantissa: "np.ndarray", decimals: "np.ndarray", scale: int
+) -> "np.ndarray | None":
+    """`mantissa` at `scale` decimals, None on int64 overflow"""
+    shift = np.where(mantissa > 0, scale - decimals, 0)
+    if int(shift.max(initial=0)) > 18:
+        return None
+    headroom = np.array([_INT64_MAX // 10**k for k in range(19)], dtype=np.int64)
+    if np.any(mantissa > headroom[shift]):
+        return None
+    pow10 = np.array([10**k for k in range(19)], dtype=np.int64)
+    return mantissa * pow10[shift]
+
+
+def _validate_numpy(
+    columns: BnceOrderColumns,
+    symbols: dict[str, BnceSymbolFilters],
+    accounts: set[int] | None,
+) -> dict[int, list[str]] | None:
+    """None if values do not fit in 64 bits"""
+    n = len(columns)
+    price_parsed = _parse_numpy(*columns._bytes("Price"))
+    qty_parsed = _parse_numpy(*columns._bytes("Quantity"))
+    if price_parsed is None or qty_parsed is None:
+        return None
+    pairs, codes = _encode(*columns._bytes("Pair"))
+    valid_num = (price_parsed[0] > 0) & (qty_parsed[0] > 0)
+    limits, price_scale, qty_scale = _limits(
+        symbols,
+        pairs,
+        int(np.max(price_parsed[1], where=valid_num, initial=0)),
+        int(np.max(qty_parsed[1], where=valid_num, initial=0)),
+    )
+    price = _rescale(*price_parsed, price_scale)
+    qty = _rescale(*qty_parsed, qty_scale)
+    sym_limits = [limits.get(s) for s in pairs]
+    if price is None or qty is None or any(
+        max(lim.max_price, lim.max_qty, lim.tick, lim.step).bit_length() > 62
+        for lim in sym_limits
+        if lim is not None
+    ):
+        return None
+
+    def _gather(attr: str, dtype=np.int64) -> "np.ndarray":
+        """Per symbol limit as a per row array"""
+        return np.array(
+            [getattr(lim, attr) if lim is not None else 0 for lim in sym_limits],
+            dtype=dtype,
+        )[codes]
+
+    known = np.array([lim is not None for lim in sym_limits], dtype=bool)[codes]
+    checked = known & valid_num
+
+    # quantize, price half even to tick, qty down to step
+    tick, step = _gather("tick"), _gather("step")
+    safe_tick = np.where(tick > 0, tick, 1)
+    ticks, rem = np.divmod(price, safe_tick)
+    round_up = (2 * rem > safe_tick) | ((2 * rem == safe_tick) & (ticks & 1 == 1))
+    price = np.where(tick > 0, (ticks + round_up) * safe_tick, price)
+    safe_step = np.where(step > 0, step, 1)
+    qty = np.where(step > 0, qty - qty % safe_step, qty)
+
+    min_price, max_price = _gather("min_price"), _gather("max_price")
+    min_qty, max_qty = _gather("min_qty"), _gather("max_qty")
+    # notional may overflow int64, compare as float and settle close calls exactly
+    notional = price.astype(np.float64) * qty.astype(np.float64)
+    min_notional = _gather("min_notional", np.float64)
+    below = notional < min_notional
+    close = checked & (np.abs(notional - min_notional) <= min_notional * 1e-9 + 1)
+    for i in np.flatnonzero(close).tolist():
+        below[i] = int(price[i]) * int(qty[i]) < sym_limits[codes[i]].min_notional
+
+    checks = [
+        ("Invalid Pair", ~known),
+        ("Invalid Direction", ~_lookup(columns, "Direction", lambda v: v.lower() in _SIDES)),
+        ("Invalid price or quantity", ~valid_num),
+        ("Symbol not trading", checked & ~_gather("trading", bool)),
+        (
+            "Price outside PRICE_FILTER",
+            checked & ((price < min_price) | ((max_price > 0) & (price > max_price))),
+        ),
+        (
+            "Quantity outside LOT_SIZE",
+            checked & ((qty < min_qty) | ((max_qty > 0) & (qty > max_qty))),
+        ),
+        ("Notional below minimum", checked & below),
+    ]
+    if accounts is not None:
+        checks.append(
+            (
+                "Unknown Account",
+                ~_lookup(
+                    columns, "Account", lambda v: v.isdigit() and int(v) in accounts
+                ),
+            )
+        )
+
+    invalid_mask = np.zeros(n, dtype=bool)
+    for _, mask in checks:
+        invalid_mask |= mask
+    rows = np.flatnonzero(invalid_mask)
+    # error flags of invalid rows only, one column per check
+    flags = np.stack([mask[rows] for _, mask in checks], axis=1).tolist()
+    return {
+        i: [msg for (msg, _), flag in zip(checks, row_flags) if flag]
+        for i, row_flags in zip(rows.tolist(), flags)
+    }
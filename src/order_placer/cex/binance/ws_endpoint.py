@@ -0,0 +1,352 @@
+import asyncio
+from decimal import Decimal
+import json
+import logging
+from time import monotonic_ns, perf_counter_ns
+import urllib.parse
+
+import aiohttp
+
+from order_placer.cex.binance.clock import BnceServerClock
+from order_placer.cex.binance.enums import (
+    BnceOrderRespType,
+    BnceOrderSide,
+    BnceOrderTimeInForce,
+    BnceOrderType,
+)
+from order_placer.cex.binance.rate_limits import BnceRateLimiter
+from order_placer.cex.binance.response import loads
+from order_placer.cex.binance.rest_endpoint import _get_timestamp_ms, _make_hmac, _sign
+from order_placer.cex.core.throttler import AsyncThrottler, RefillRateUnit
+from order_placer.core.metrics import LatencyScope
+
+BNCE_WS_API_ENDPOINT = "wss://ws-api.binance.com:443/ws-api/v3"
+BNCE_WS_API_TESTNET = "wss://testnet.binance.vision/ws-api/v3"
+
+# websocket api method to the rest endpoint used for its rate limit weights
+_METHOD_ENDPOINT = {
+    "order.place": "POST /api/v3/order",
+    "order.status": "GET /api/v3/order",
+    "openOrders.status": "GET /api/v3/openOrders",
+    "allOrders": "GET /api/v3/allOrders",
+    "openOrders.cancelAll": "DELETE /api/v3/openOrders",
+    "account.status": "GET /api/v3/account",
+    "exchangeInfo": "GET /api/v3/exchangeInfo",
+    "time": "GET /api/v3/time",
+}
+
+
+class BnceWsResponse:
+    """Websocket api response exposing the subset of `aiohttp.ClientResponse` used by callers"""
+
+    def __init__(self, method: str, data: dict) -> None:
+        self.method = method
+        self.status = data.get("status", 0)
+        self.headers = {}
+        self._data = data
+        self.reason = data["error"].get("msg") if "error" in data else None
+
+    @property
+    def ok(self) -> bool:
+        return 0 < self.status < 300
+
+    async def json(self) -> dict:
+        """`result` on success, else the error (code, msg) like a rest error body"""
+        if "error" in self._data:
+            return self._data["error"]
+        return self._data.get("result")
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise aiohttp.ClientResponseError(
+                None,
+                (),
+                status=self.status,
+                message=self.reason or "",
+                headers={},
+            )
+
+
+class BnceWsEndpointV3:
+    """Binance websocket api endpoint with the same interface as `BnceRestEndpointV3`.
+
+    Requests are multiplexed over one persistent connection and matched to
+    responses by id. The connection is (re)opened lazily on the next request
+    after a drop, requests in flight during a drop fail with `ConnectionResetError`.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        url: str = BNCE_WS_API_ENDPOINT,
+        api_key: str | None = None,
+        secret_key: str | None = None,
+        throttle_bucket_size: int = 45,
+        throttle_refill_rate_s: int = 5,
+        rate_limiter: BnceRateLimiter | None = None,
+        request_timeout_s: float = 10,
+        latency: LatencyScope | None = None,
+        clock: BnceServerClock | None = None,
+    ):
+        self._session = session
+        self._url = url
+        self._api_key = api_key
+        self._secret_key = secret_key
+        self._throttler = None
+        if rate_limiter is None:
+            self._throttler = AsyncThrottler(
+                throttle_bucket_size, throttle_refill_rate_s, RefillRateUnit.SECOND
+            )
+        self._rate_limiter = rate_limiter
+        self._request_timeout_s = request_timeout_s
+        self._latency = latency
+        self._clock = clock
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+        self._reader: asyncio.Task | None = None
+        self._connect_lock = asyncio.Lock()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._request_id = 0
+        self._hmac = _make_hmac(secret_key)
+
+    async def close(self):
+        """Close the connection. Errors of the reader are logged, they must
+        not stop the rest of a shutdown"""
+        ws, reader = self._ws, self._reader
+        self._ws = None
+        self._reader = None
+        if ws is not None:
+            await ws.close()
+        if reader is not None:
+            await self._join_reader(reader)
+
+    async def _join_reader(self, reader: asyncio.Task):
+        """Wait for the reader of a closed connection, logging its error"""
+        try:
+            await reader
+        except Exception as e:
+            logging.error(f"Connection to {self._url} failed. {type(e).__name__}: {e}")
+
+    def prepare_order(
+        self,
+        symbol: str,
+        qty: Decimal | str,
+        price: Decimal | str,
+        side: BnceOrderSide | None = None,
+        type: BnceOrderType | None = None,
+        time_in_force: BnceOrderTimeInForce | None = None,
+        client_order_id: str | None = None,
+        resp_type: BnceOrderRespType | None = None,
+    ) -> tuple[dict, str, str]:
+        """Returns order params with the signature payload encoded around the
+        timestamp, send it with `post_prepared_order`"""
+        params = {
+            "symbol": symbol,
+            "side": side.value,
+            "type": type.value,
+            "timeInForce": time_in_force.value,
+            "quantity": str(qty),
+            "price": str(price),
+        }
+        if client_order_id is not None:
+            params["newClientOrderId"] = client_order_id
+        if resp_type is not None:
+            params["newOrderRespType"] = resp_type.value
+        return self._prepare_params(params)
+
+    async def post_prepared_order(self, prepared: tuple[dict, str, str]) -> BnceWsResponse:
+        return await self._signed_request("order.place", prepared, self._latency)
+
+    async def post_order(
+        self,
+        symbol: str,
+        qty: Decimal | str,
+        price: Decimal | str,
+        side: BnceOrderSide | None = None,
+        type: BnceOrderType | None = None,
+        time_in_force: BnceOrderTimeInForce | None = None,
+        client_order_id: str | None = None,
+        resp_type: BnceOrderRespType | None = None,
+    ) -> BnceWsResponse:
+        return await self.post_prepared_order(
+            self.prepare_order(
+                symbol, qty, price, side, type, time_in_force, client_order_id, resp_type
+            )
+        )
+
+    async def get_order(self, symbol: str, client_order_id: str) -> BnceWsResponse:
+        return await self._signed_request(
+            "order.status",
+            self._prepare_params(
+                {"symbol": symbol, "origClientOrderId": client_order_id}
+            ),
+        )
+
+    async def get_open_orders(self, symbol: str) -> BnceWsResponse:
+        return await self._signed_request(
+            "openOrders.status", self._prepare_params({"symbol": symbol})
+        )
+
+    async def get_all_orders(
+        self,
+        symbol: str,
+        start_time_ms: int | None = None,
+        order_id: int | None = None,
+        limit: int = 1000,
+    ) -> BnceWsResponse:
+        params = {"symbol": symbol, "limit": limit}
+        if order_id is not None:
+            params["orderId"] = order_id
+        elif start_time_ms is not None:
+            params["startTime"] = start_time_ms
+        return await self._signed_request("allOrders", self._prepare_params(params))
+
+    async def cancel_open_orders(self, symbol: str) -> BnceWsResponse:
+        """Cancel every open order of `symbol`, ahead of queued requests"""
+        return await self._signed_request(
+            "openOrders.cancelAll",
+            self._prepare_params({"symbol": symbol}),
+            priority=True,
+        )
+
+    async def get_symbols(self) -> BnceWsResponse:
+        return await self._request("exchangeInfo")
+
+    async def get_server_time(self) -> tuple[int, BnceWsResponse]:
+        """Response and `time.monotonic_ns` it was sent at, after the rate
+        limiter let it go"""
+        await self._acquire("time")
+        sent_ns = monotonic_ns()
+        return sent_ns, await self._send("time")
+
+    async def get_account_info(self) -> BnceWsResponse:
+        return await self._signed_request(
+            "account.status", self._prepare_params({})
+        )
+
+    async def connect(self) -> bool:
+        """Open the connection ahead of the first request, True once open"""
+        ws = await self._connect()
+        return not ws.closed
+
+    async def _connect(self) -> aiohttp.ClientWebSocketResponse:
+        async with self._connect_lock:
+            if self._ws is None or self._ws.closed:
+                if self._reader is not None:
+                    # fail requests of the dropped connection before reconnecting
+                    await self._join_reader(self._reader)
+                logging.debug(f"Connecting to {self._url}")
+                self._ws = await self._session.ws_connect(self._url, heartbeat=30)
+                self._reader = asyncio.create_task(self._read(self._ws))
+            return self._ws
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse):
+        """Resolve pending requests with responses until the connection drops"""
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = loads(msg.data)
+                fut = self._pending.pop(data.get("id"), None)
+                if fut is not None and not fut.done():
+                    fut.set_result(data)
+        finally:
+            logging.debug(f"Connection to {self._url} closed")
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionResetError("websocket connection dropped"))
+            self._pending.clear()
+
+    async def _acquire(self, method: str, priority: bool = False):
+        if self._rate_limiter is None:
+            await self._throttler.acquire()
+        else:
+            await self._rate_limiter.acquire(
+                _METHOD_ENDPOINT.get(method, method), priority
+            )
+
+    async def _request(
+        self,
+        method: str,
+        params: dict | None = None,
+        latency: LatencyScope | None = None,
+        priority: bool = False,
+        prepared: tuple[dict, str, str] | None = None,
+    ) -> BnceWsResponse:
+        """`prepared` params (see `_prepare_params`) are stamped and signed
+        right before sending, once the rate limiter lets the request go"""
+        start_ns = perf_counter_ns()
+        await self._acquire(method, priority)
+        if latency is not None:
+            latency.record("throttle", perf_counter_ns() - start_ns)
+        return await self._send(method, params, latency, prepared)
+
+    async def _send(
+        self,
+        method: str,
+        params: dict | None = None,
+        latency: LatencyScope | None = None,
+        prepared: tuple[dict, str, str] | None = None,
+    ) -> BnceWsResponse:
+        """Send a request the rate limiter let go and wait for its response"""
+        acquired_ns = perf_counter_ns()
+        ws = await self._connect()
+        if prepared is not None:
+            sign_start_ns = perf_counter_ns()
+            params = self._sign_params(prepared)
+            if latency is not None:
+                latency.record("sign", perf_counter_ns() - sign_start_ns)
+        self._request_id += 1
+        request_id = str(self._request_id)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = fut
+        try:
+            await ws.send_str(
+                json.dumps({"id": request_id, "method": method, "params": params or {}})
+            )
+            data = await asyncio.wait_for(fut, self._request_timeout_s)
+        finally:
+            self._pending.pop(request_id, None)
+        if latency is not None:
+            latency.record("round_trip", perf_counter_ns() - acquired_ns)
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.update_from_rate_limits(
+                data.get("status", 0), data.get("rateLimits", [])
+            )
+        return BnceWsResponse(method, data)
+
+    def _prepare_params(self, params: dict) -> tuple[dict, str, str]:
+        """Params are signed in alphabetical order, encode the ones sorting before
+        and after `timestamp` ahead of time"""
+        params = dict(params, apiKey=self._api_key)
+        if self._clock is not None:
+            params["recvWindow"] = self._clock.recv_window_ms
+        before = sorted((k, v) for k, v in params.items() if k < "timestamp")
+        after = sorted((k, v) for k, v in params.items() if k > "timestamp")
+        return (
+            params,
+            urllib.parse.urlencode(before, True),
+            urllib.parse.urlencode(after, True),
+        )
+
+    async def _signed_request(
+        self,
+        method: str,
+        prepared: tuple[dict, str, str],
+        latency: LatencyScope | None = None,
+        priority: bool = False,
+    ) -> BnceWsResponse:
+        """Performs a binance signed request"""
+        return await self._request(method, None, latency, priority, prepared)
+
+    def _sign_params(self, prepared: tuple[dict, str, str]) -> dict:
+        """Timestamp and sign prepared params"""
+        params, before, after = prepared
+        if self._clock is not None:
+            timestamp = self._clock.now_ms()
+        else:
+            timestamp = _get_timestamp_ms()
+        query_string = "&".join(q for q in (before, f"timestamp={timestamp}", after) if q)
+        return dict(
+            params, timestamp=timestamp, signature=_sign(self._hmac, query_string)
+        )
@@ -0,0 +1,200 @@
+from enum import IntEnum, unique
+import logging
+from typing import Callable
+
+from order_placer.cex.core.throttler import _now
+
+
+@unique
+class Outcome(IntEnum):
+    OK = 0
+    ERROR = 1  # 5xx, timeouts, dropped connections
+    OVERLOADED = 2  # 429 too many requests, 418 ip banned
+
+
+class AimdDecision:
+    """A change of limit and rate scale made by `AimdController`"""
+
+    __slots__ = ("time_s", "reason", "limit", "rate_scale", "p99_us", "error_rate")
+
+    def __init__(
+        self,
+        time_s: float,
+        reason: str,
+        limit: int,
+        rate_scale: float,
+        p99_us: int,
+        error_rate: float,
+    ) -> None:
+        self.time_s = time_s
+        self.reason = reason
+        self.limit = limit
+        self.rate_scale = rate_scale
+        self.p99_us = p99_us
+        self.error_rate = error_rate
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class AimdController:
+    """Additive increase, multiplicative decrease of a concurrency limit and of
+    a rate scale (fraction of the configured refill rates) from request
+    feedback.
+
+    Outcomes are judged per window of about one limit's worth of requests
+    (`fanout` * limit, at least `min_samples`). A window with p99 latency
+    within `tolerance` times the baseline (lowest p99 seen, drifting up 1%
+    per window to follow a slower network) and an error rate below
+    `max_error_rate` raises the limit by `increase` and the rate scale by
+    `rate_increase`, more errors hold both where they are (eg. 5xx of a
+    flaky exchange are not a sign of sending too much). Higher latency
+    scales both by `latency_backoff`. 429 and 418 responses cut both by
+    `backoff` right away, at most once per window since requests already in
+    flight are rejected too.
+
+    `on_change` is called with the new limit and rate scale on every change.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        fanout: int = 1,
+        min_samples: int = 20,
+        increase: int = 1,
+        backoff: float = 0.5,
+        latency_backoff: float = 0.9,
+        tolerance: float = 2.0,
+        max_error_rate: float = 0.05,
+        rate_increase: float = 0.05,
+        min_rate_scale: float = 0.05,
+        on_change: Callable[[int, float], None] | None = None,
+    ) -> None:
+        max_limit = max_limit or initial_limit
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min <= initial <= max")
+        if not (0 < backoff < 1 and 0 < latency_backoff < 1):
+            raise ValueError("backoff must be between 0 and 1")
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._fanout = fanout
+        self._min_samples = min_samples
+        self._increase = increase
+        self._backoff = backoff
+        self._latency_backoff = latency_backoff
+        self._tolerance = tolerance
+        self._max_error_rate = max_error_rate
+        self._rate_scale = 1.0
+        self._rate_increase = rate_increase
+        self._min_rate_scale = min_rate_scale
+        self._on_change = on_change
+        self._start_s = _now()
+        self._latencies_ns: list[int] = []
+        self._outcomes = 0
+        self._errors = 0
+        # outcomes since the last cut on overload, the first one cuts right away
+        self._since_backoff = self._window()
+        self._baseline_ns: float | None = None
+        self._last_p99_ns = 0
+        self.decisions: list[AimdDecision] = []
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def rate_scale(self) -> float:
+        return self._rate_scale
+
+    def _window(self) -> int:
+        return max(self.limit * self._fanout, self._min_samples)
+
+    def record_latency(self, value_ns: int):
+        """Round trip of a request, excluding time waiting on throttlers"""
+        self._latencies_ns.append(value_ns)
+
+    def record_outcome(self, outcome: Outcome):
+        self._outcomes += 1
+        self._since_backoff += 1
+        if outcome == Outcome.OVERLOADED:
+            if self._since_backoff >= self._window():
+                self._since_backoff = 0
+                self._set(self._backoff, "overloaded")
+                self._reset_window()
+            return
+        if outcome == Outcome.ERROR:
+            self._errors += 1
+        if self._outcomes >= self._window():
+            self._judge_window()
+
+    def _judge_window(self):
+        error_rate = self._errors / self._outcomes
+        latencies = sorted(self._latencies_ns)
+        self._reset_window()
+        if latencies:
+            self._last_p99_ns = latencies[
+                min(len(latencies) - 1, int(len(latencies) * 0.99))
+            ]
+            if self._baseline_ns is None:
+                self._baseline_ns = self._last_p99_ns
+            else:
+                self._baseline_ns = min(self._baseline_ns * 1.01, self._last_p99_ns)
+            if self._last_p99_ns > self._tolerance * self._baseline_ns:
+                self._set(self._latency_backoff, "latency", error_rate)
+                return
+        if error_rate > self._max_error_rate:
+            self._set(1.0, "errors", error_rate)
+            return
+        self._set(None, "increase", error_rate)
+
+    def _reset_window(self):
+        self._latencies_ns = []
+        self._outcomes = 0
+        self._errors = 0
+
+    def _set(self, factor: float | None, reason: str, error_rate: float = 0.0):
+        """Scale limit and rate scale by `factor`, increase them additively if
+        None. Holds (factor 1) are recorded as decisions too"""
+        if factor is None:
+            limit = min(self._limit + self._increase, self._max_limit)
+            rate_scale = min(self._rate_scale + self._rate_increase, 1.0)
+        else:
+            limit = max(self._limit * factor, self._min_limit)
+            rate_scale = max(self._rate_scale * factor, self._min_rate_scale)
+        changed = int(limit) != self.limit or rate_scale != self._rate_scale
+        self._limit = limit
+        self._rate_scale = rate_scale
+        if not changed and factor != 1.0:
+            return
+        decision = AimdDecision(
+            round(_now() - self._start_s, 3),
+            reason,
+            self.limit,
+            round(rate_scale, 4),
+            self._last_p99_ns // 1000,
+            round(error_rate, 4),
+        )
+        self.decisions.append(decision)
+        log = logging.warning if changed and factor is not None else logging.info
+        log(
+            f"Concurrency limit {decision.limit}, rate scale {decision.rate_scale}"
+            f" ({reason}, p99 {decision.p99_us} us, error rate {decision.error_rate})"
+        )
+        if changed and self._on_change is not None:
+            self._on_change(self.limit, rate_scale)
+
+    def summary(self) -> dict:
+        """Current limit and rate scale, decision counts by reason and the
+        history of decisions"""
+        counts = {}
+        for decision in self.decisions:
+            counts[decision.reason] = counts.get(decision.reason, 0) + 1
+        return {
+            "limit": self.limit,
+            "rate_scale": round(self._rate_scale, 4),
+            "decisions_by_reason": counts,
+            "decisions": [decision.to_dict() for decision in self.decisions],
+        }
@@ -0,0 +1,79 @@
+import asyncio
+from time import perf_counter_ns
+from typing import Awaitable, Callable
+
+import aiohttp
+
+
+def make_session(
+    base_url: str | None = None,
+    pool_size: int = 100,
+    dns_ttl_s: float | None = 300,
+    keepalive_s: float = 60,
+    trace_configs: list[aiohttp.TraceConfig] | None = None,
+) -> aiohttp.ClientSession:
+    """Session with a connection pool of up to `pool_size` connections per host,
+    dns answers cached `dns_ttl_s` (None caches them forever) and idle
+    connections kept open `keepalive_s`"""
+    if pool_size < 1:
+        raise ValueError("pool size must be at least 1")
+    connector = aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=pool_size,
+        ttl_dns_cache=dns_ttl_s,
+        keepalive_timeout=keepalive_s,
+    )
+    return aiohttp.ClientSession(
+        base_url, connector=connector, trace_configs=trace_configs
+    )
+
+
+class WarmUpResult:
+    """Outcome of `warm_up`"""
+
+    __slots__ = ("opened", "failed", "elapsed_ns")
+
+    def __init__(self, opened: int = 0, failed: int = 0, elapsed_ns: int = 0) -> None:
+        self.opened = opened
+        self.failed = failed
+        self.elapsed_ns = elapsed_ns
+
+    def merge(self, other: "WarmUpResult"):
+        """Add counts of `other`, elapsed time is the longest of both"""
+        self.opened += other.opened
+        self.failed += other.failed
+        self.elapsed_ns = max(self.elapsed_ns, other.elapsed_ns)
+
+
+async def warm_up(
+    open_connection: Callable[[], Awaitable[bool]],
+    connections: int,
+    on_opened: Callable[[int], None] | None = None,
+) -> WarmUpResult:
+    """Open `connections` connections ahead of the first order.
+
+    `open_connection` is called `connections` times at once so that none of
+    them can reuse a connection of another, and returns whether its
+    connection was verified (eg. a ping answered). Calls raising a client
+    error count as failed. `on_opened` is called with the nanoseconds taken
+    by each verified connection.
+    """
+    result = WarmUpResult()
+    start_ns = perf_counter_ns()
+
+    async def _open():
+        call_start_ns = perf_counter_ns()
+        try:
+            ok = await open_connection()
+        except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError):
+            ok = False
+        if ok:
+            result.opened += 1
+            if on_opened is not None:
+                on_opened(perf_counter_ns() - call_start_ns)
+        else:
+            result.failed += 1
+
+    await asyncio.gather(*(_open() for _ in range(connections)))
+    result.elapsed_ns = perf_counter_ns() - start_ns
+    return result
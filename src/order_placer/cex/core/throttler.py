@@ -1,7 +1,19 @@
+import abc
 import asyncio
+from collections import deque
 from enum import IntEnum, unique
-import math
+import multiprocessing
 import time
+from typing import Iterable
+
+
+def _now() -> float:
+    """Clock of the running event loop, monotonic outside of one. Follows a
+    virtual clock loop (see `order_placer.core.virtual_time`)"""
+    try:
+        return asyncio.get_running_loop().time()
+    except RuntimeError:
+        return time.monotonic()
 
 
 @unique
@@ -9,50 +21,462 @@ class RefillRateUnit(IntEnum):
     SECOND = 1
     MINUTE = 2
     HOUR = 3
+    DAY = 4
+
+
+_UNIT_S = {
+    RefillRateUnit.SECOND: 1,
+    RefillRateUnit.MINUTE: 60,
+    RefillRateUnit.HOUR: 60 * 60,
+    RefillRateUnit.DAY: 60 * 60 * 24,
+}
+# used weight reported this early in a window may be of the previous window
+_WINDOW_SYNC_GRACE_S = 1.0
+
+
+class _FifoWaiters(abc.ABC):
+    """FIFO hand-off of tokens to waiting acquirers.
 
+    Only the head waiter has a timer, scheduled for the exact (fractional) time
+    its tokens become available. Waiters behind it are woken in order once the
+    head is served, so there is no stampede and no retry recursion.
+    """
 
-class AsyncThrottler:
+    def __init__(self) -> None:
+        self._waiters: deque[tuple[object, asyncio.Future]] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @abc.abstractmethod
+    def _wait_time_s(self, weight) -> float:
+        """Seconds until `weight` is available, 0 if available now"""
+
+    @abc.abstractmethod
+    def _consume(self, weight):
+        """Take `weight` once it is available"""
+
+    @abc.abstractmethod
+    def _release(self, weight):
+        """Return tokens of an acquisition cancelled after hand-off"""
+
+    @property
+    def waiters(self) -> int:
+        return len(self._waiters)
+
+    async def _acquire(self, weight):
+        if not self._waiters and self._wait_time_s(weight) <= 0:
+            self._consume(weight)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((weight, fut))
+        if len(self._waiters) == 1:
+            self._wake()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # tokens were handed over right before cancellation
+                self._release(weight)
+            # cancelled waiters are dropped lazily, reschedule in case it was the head
+            self._wake()
+            raise
+
+    def _wake(self):
+        """Serve waiters from the head while tokens are available"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters:
+            weight, fut = self._waiters[0]
+            if fut.done():
+                self._waiters.popleft()
+                continue
+            wait_s = self._wait_time_s(weight)
+            if wait_s > 0:
+                self._timer = asyncio.get_running_loop().call_later(
+                    wait_s, self._wake
+                )
+                return
+            self._waiters.popleft()
+            self._consume(weight)
+            fut.set_result(None)
+
+
+class AsyncThrottler(_FifoWaiters):
     """Throttle with token bucket algorithm"""
 
     def __init__(
         self,
         bucket_size_max: int,
-        refill_rate: int,
+        refill_rate: float,
         refill_rate_unit: RefillRateUnit | None = RefillRateUnit.SECOND,
     ) -> None:
+        super().__init__()
         self._bucket_size_max = bucket_size_max
         self._refill_rate_s = None
 
         match refill_rate_unit:
+            case RefillRateUnit.DAY:
+                self._refill_rate_s = refill_rate / (60 * 60 * 24)
             case RefillRateUnit.HOUR:
-                self._refill_rate_s = refill_rate // (60 * 60)
+                self._refill_rate_s = refill_rate / (60 * 60)
             case RefillRateUnit.MINUTE:
-                self._refill_rate_s = refill_rate // 60
+                self._refill_rate_s = refill_rate / 60
             case RefillRateUnit.SECOND:
                 self._refill_rate_s = refill_rate
             case _:
                 raise ValueError("Invalid refill rate unit, ", refill_rate_unit)
 
         self._bucket_size = bucket_size_max
-        self._last_refill = 0
+        self._last_refill = _now()
+        self._reserved = 0
+        self._resume_at = 0.0
 
     def _refill(self):
-        now = time.time()
+        now = _now()
         delta = now - self._last_refill
         refill = self._refill_rate_s * delta
         self._bucket_size = min(self._bucket_size_max, refill + self._bucket_size)
         self._last_refill = now
 
+    @property
+    def bucket_size_max(self) -> int:
+        return self._bucket_size_max
+
+    @property
+    def refill_rate_s(self) -> float:
+        return self._refill_rate_s
+
+    def reserve(self, tokens: int):
+        """Keep `tokens` for priority acquisitions (see
+        `CompositeThrottler.acquire_priority`), others leave them in the bucket"""
+        self._reserved = tokens
+
+    def _reserve_for(self, weight: int, reserved: bool) -> int:
+        if not reserved:
+            return 0
+        # never reserve so much that `weight` could not be served at all
+        return min(self._reserved, max(self._bucket_size_max - weight, 0))
+
+    def set_refill_rate(self, refill_rate_s: float):
+        """Change the refill rate (per second), tokens refilled so far are kept"""
+        self._refill()
+        self._refill_rate_s = refill_rate_s
+
+    def sync_used(self, used: int):
+        """Lower available tokens to what the server reports as unused.
+
+        Never raises the token count, requests in flight are not yet accounted
+        for by the server.
+        """
+        self._refill()
+        self._bucket_size = min(self._bucket_size, self._bucket_size_max - used)
+
+    def suspend(self, seconds: float):
+        """Block all acquisitions for `seconds`, eg. on a Retry-After header.
+        Composites sharing the bucket are held back too"""
+        self._resume_at = max(self._resume_at, _now() + seconds)
+        if self._waiters:
+            self._wake()
+
+    def suspended_s(self) -> float:
+        """Seconds until the bucket is no longer suspended, 0 if it is not"""
+        return max(self._resume_at - _now(), 0)
+
+    def _wait_time_s(self, weight: int, reserved: bool = True) -> float:
+        self._refill()
+        # `_refill` just moved `_last_refill` to now
+        wait_s = self._resume_at - self._last_refill
+        deficit = weight + self._reserve_for(weight, reserved) - self._bucket_size
+        if deficit > 0:
+            wait_s = max(wait_s, deficit / self._refill_rate_s)
+        return max(wait_s, 0)
+
+    def _consume(self, weight: int):
+        self._bucket_size -= weight
+
+    def _release(self, weight: int):
+        self._bucket_size = min(self._bucket_size_max, self._bucket_size + weight)
+
     async def acquire(self, weight: int = 1):
         if weight > self._bucket_size_max:
             raise ValueError("weight more than bucket size max")
+        await self._acquire(weight)
+
+
+class FixedWindowThrottler(AsyncThrottler):
+    """Throttle with fixed windows, the way binance counts its rate limits.
+
+    Up to `limit` weight per window of `interval` units. A token bucket
+    refilling at `limit` per interval lets up to twice the limit through
+    around a window boundary. Here tokens come back all at once when a window
+    ends. Windows start at multiples of their length in exchange time: the
+    loop clock plus an offset set by `align`, the local wall clock by default.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        interval: int = 1,
+        interval_unit: RefillRateUnit = RefillRateUnit.SECOND,
+    ) -> None:
+        super().__init__(limit, limit / interval, interval_unit)
+        self._interval_s = interval * _UNIT_S[interval_unit]
+        # the limit scaled by `set_refill_rate`
+        self._limit = limit
+        self._offset_s = time.time() - self._last_refill
+        self._window = self._window_at(self._last_refill)
+
+    @property
+    def interval_s(self) -> float:
+        return self._interval_s
+
+    def _window_at(self, now: float) -> int:
+        return int((now + self._offset_s) // self._interval_s)
+
+    def _window_elapsed_s(self, now: float) -> float:
+        return (now + self._offset_s) % self._interval_s
+
+    def align(self, exchange_time_s: float):
+        """Align windows to the exchange clock, `exchange_time_s` is its time
+        now. Weight used in the current window is kept"""
+        self._offset_s = exchange_time_s - _now()
+        self._window = self._window_at(_now())
+
+    def _refill(self):
+        now = _now()
+        window = self._window_at(now)
+        if window != self._window:
+            self._window = window
+            self._bucket_size = self._limit
+        self._last_refill = now
 
+    def set_refill_rate(self, refill_rate_s: float):
+        """Scale the limit per window to `refill_rate_s` * interval, weight used
+        in the current window is kept"""
         self._refill()
-        tokens_rem = self._bucket_size - weight
+        limit = min(max(refill_rate_s * self._interval_s, 1), self._bucket_size_max)
+        self._bucket_size -= self._limit - limit
+        self._limit = limit
+        self._refill_rate_s = limit / self._interval_s
 
-        if tokens_rem >= 0:
-            self._bucket_size -= weight
-            return
+    def sync_used(self, used: int):
+        """Lower available tokens to what the server reports as unused in the
+        current window. Reports right after a window started may count the
+        previous one and are ignored"""
+        self._refill()
+        if self._window_elapsed_s(self._last_refill) >= self._sync_grace_s():
+            self._bucket_size = min(self._bucket_size, self._limit - used)
+
+    def _sync_grace_s(self) -> float:
+        return min(_WINDOW_SYNC_GRACE_S, self._interval_s / 10)
+
+    def _reserve_for(self, weight: int, reserved: bool) -> int:
+        if not reserved:
+            return 0
+        return min(self._reserved, max(self._limit - weight, 0))
+
+    def _wait_s(self, tokens: float, weight: int, reserved: bool, resume_at: float):
+        """Seconds until `weight` can be taken from `tokens` (right after a
+        refill), at least until `resume_at`"""
+        now = self._last_refill
+        wait_s = resume_at - now
+        # a weight above a scaled down limit goes once the window is unused
+        needed = min(weight + self._reserve_for(weight, reserved), self._limit)
+        if needed > tokens:
+            wait_s = max(wait_s, self._interval_s - self._window_elapsed_s(now))
+        return max(wait_s, 0)
+
+    def _wait_time_s(self, weight: int, reserved: bool = True) -> float:
+        self._refill()
+        return self._wait_s(self._bucket_size, weight, reserved, self._resume_at)
+
+    def _release(self, weight: int):
+        self._bucket_size = min(self._limit, self._bucket_size + weight)
+
+
+class SharedFixedWindowThrottler(FixedWindowThrottler):
+    """Fixed window throttler shared by processes.
+
+    Tokens, the current window and the end of a suspension live in `state`, a
+    `make_state` array created by the parent and handed to child processes, so
+    a suspension holds back every process. Waiters are FIFO within a process
+    only. A check and a later consume are not atomic across processes, tokens
+    may briefly go negative and are repaid in the next window. A scaled limit
+    (`set_refill_rate`) is this process's own, the process starting a window
+    fills it to its limit.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        interval: int = 1,
+        interval_unit: RefillRateUnit = RefillRateUnit.SECOND,
+        state=None,
+    ) -> None:
+        super().__init__(limit, interval, interval_unit)
+        if state is None:
+            state = self.make_state(limit)
+        self._state = state
+
+    @staticmethod
+    def make_state(limit: int, ctx=multiprocessing):
+        """Shared state of an unused window, `ctx` is the multiprocessing
+        context of the processes sharing it"""
+        return ctx.Array("d", [limit, -1, 0])
+
+    @property
+    def state(self):
+        return self._state
+
+    def _refill(self):
+        """Caller holds the state lock"""
+        now = _now()
+        window = self._window_at(now)
+        # windows only move forward, processes may be aligned a bit apart
+        if window > self._state[1]:
+            self._state[1] = window
+            self._state[0] = self._limit
+        self._last_refill = now
+
+    def set_refill_rate(self, refill_rate_s: float):
+        with self._state.get_lock():
+            self._refill()
+            limit = min(max(refill_rate_s * self._interval_s, 1), self._bucket_size_max)
+            self._state[0] -= self._limit - limit
+            self._limit = limit
+            self._refill_rate_s = limit / self._interval_s
+
+    def sync_used(self, used: int):
+        with self._state.get_lock():
+            self._refill()
+            if self._window_elapsed_s(self._last_refill) >= self._sync_grace_s():
+                self._state[0] = min(self._state[0], self._limit - used)
+
+    def suspend(self, seconds: float):
+        with self._state.get_lock():
+            self._state[2] = max(self._state[2], _now() + seconds)
+        if self._waiters:
+            self._wake()
+
+    def suspended_s(self) -> float:
+        return max(self._state[2] - _now(), 0)
+
+    def _wait_time_s(self, weight: int, reserved: bool = True) -> float:
+        with self._state.get_lock():
+            self._refill()
+            tokens, resume_at = self._state[0], self._state[2]
+        return self._wait_s(tokens, weight, reserved, resume_at)
+
+    def _consume(self, weight: int):
+        with self._state.get_lock():
+            self._state[0] -= weight
+
+    def _release(self, weight: int):
+        with self._state.get_lock():
+            self._state[0] = min(self._limit, self._state[0] + weight)
+
+
+SUSPENDED = "SUSPENDED"
+
+
+class CompositeThrottler(_FifoWaiters):
+    """Acquire weights atomically across several named token buckets.
+
+    Tokens are only taken once every bucket involved can serve its weight, so a
+    request never holds tokens of one bucket while waiting on another. Buckets
+    may be shared between composites (eg. an ip wide bucket shared by accounts),
+    suspending a shared bucket holds back every composite using it.
+    """
+
+    def __init__(self, buckets: dict[str, AsyncThrottler]) -> None:
+        super().__init__()
+        self._buckets = buckets
+        self._refill_rates_s = {
+            name: bucket.refill_rate_s for name, bucket in buckets.items()
+        }
+        self._binding: str | None = None
+
+    @property
+    def buckets(self) -> dict[str, AsyncThrottler]:
+        return self._buckets
+
+    @property
+    def binding(self) -> str | None:
+        """Name of the bucket that last delayed an acquisition, `SUSPENDED` if
+        it was a suspension"""
+        return self._binding
+
+    def suspend(self, seconds: float, names: Iterable[str] | None = None):
+        """Block acquisitions of buckets `names` (all by default) for
+        `seconds`, eg. on a Retry-After header"""
+        for name in self._buckets if names is None else names:
+            self._buckets[name].suspend(seconds)
+        if self._waiters:
+            self._wake()
+
+    def set_rate_scale(self, scale: float):
+        """Refill every bucket at `scale` times its initial rate"""
+        for name, bucket in self._buckets.items():
+            bucket.set_refill_rate(self._refill_rates_s[name] * scale)
+        if self._waiters:
+            self._wake()
+
+    def suspended_s(self) -> float:
+        """Seconds until every bucket is no longer suspended"""
+        return max((bucket.suspended_s() for bucket in self._buckets.values()), default=0)
+
+    def sync_used(self, name: str, used: int):
+        """Resync bucket `name` with the used weight reported by the server"""
+        if name in self._buckets:
+            self._buckets[name].sync_used(used)
+
+    def _binding_wait(
+        self, weights: dict[str, int], reserved: bool = True
+    ) -> tuple[float, str | None]:
+        wait_s = 0
+        binding = None
+        for name, weight in weights.items():
+            bucket = self._buckets[name]
+            bucket_wait_s = bucket._wait_time_s(weight, reserved)
+            if bucket_wait_s > wait_s:
+                wait_s = bucket_wait_s
+                binding = SUSPENDED if bucket.suspended_s() >= wait_s else name
+        return wait_s, binding
+
+    def _wait_time_s(self, weights: dict[str, int]) -> float:
+        wait_s, binding = self._binding_wait(weights)
+        if binding is not None:
+            self._binding = binding
+        return wait_s
+
+    def wait_time_s(self, weights: dict[str, int]) -> float:
+        """Seconds until `weights` are available, 0 if available now. Waiters
+        already queued are not accounted for"""
+        return self._binding_wait(weights)[0]
+
+    def _consume(self, weights: dict[str, int]):
+        for name, weight in weights.items():
+            self._buckets[name]._consume(weight)
+
+    def _release(self, weights: dict[str, int]):
+        for name, weight in weights.items():
+            self._buckets[name]._release(weight)
+
+    async def acquire(self, weights: dict[str, int]):
+        """Acquire `weights`, a mapping of bucket name to weight"""
+        for name, weight in weights.items():
+            if weight > self._buckets[name].bucket_size_max:
+                raise ValueError(f"weight more than bucket size max of {name}")
+        await self._acquire(weights)
 
-        await asyncio.sleep(math.ceil(abs(tokens_rem) / self._refill_rate_s))
-        await self.acquire(weight)
+    async def acquire_priority(self, weights: dict[str, int]):
+        """Acquire `weights` ahead of queued waiters, tokens reserved by the
+        buckets may be used. Suspensions still apply"""
+        for name, weight in weights.items():
+            if weight > self._buckets[name].bucket_size_max:
+                raise ValueError(f"weight more than bucket size max of {name}")
+        while (wait_s := self._binding_wait(weights, reserved=False)[0]) > 0:
+            await asyncio.sleep(wait_s)
+        self._consume(weights)
@@ -4,44 +4,325 @@ import argparse
 import asyncio
 from collections import defaultdict
 import csv
+import json
 import logging
 import os
+import signal
 
 from dotenv import load_dotenv
 
+from order_placer import daemon
+from order_placer.cex.binance.clock import clock_to_prometheus
+from order_placer.cex.binance.enums import BnceOrderRespType, BnceTransport
 from order_placer.cex.binance.order import BnceSpotLimitOrderPlacer
+from order_placer.cex.binance.order_source import BinaryOrderSource, open_order_source
+from order_placer.cex.binance.sharded import execute_sharded
+from order_placer.cex.binance.simulator import BnceSimulator
+from order_placer.core.log import setup_logging
+from order_placer.core.retry import RetryPolicy
 
-logging.basicConfig(level=logging.DEBUG)
 
+def _on_interrupt(abort):
+    """First ctrl-c aborts gracefully, the second one interrupts right away"""
 
-async def _start_app(exec: bool, account_metadata: dict, orders_fp: str, mock_fail_rate: float):
-    async with BnceSpotLimitOrderPlacer(account_metadata, orders_fp, mock_fail_rate) as app:
-        if exec:
-            await app.execute()
-        else:
+    def _handler(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        abort()
+
+    return _handler
+
+
+async def _start_client(cancel_all: bool, daemon_url: str, orders_fp: str):
+    """Submit to a running daemon instead of executing in this process"""
+    if cancel_all:
+        await daemon.cancel_all(daemon_url, orders_fp)
+        return
+    loop = asyncio.get_running_loop()
+    # ctrl-c aborts the batch in the daemon, which then cancels open orders
+    signal.signal(
+        signal.SIGINT,
+        _on_interrupt(
+            lambda: loop.call_soon_threadsafe(
+                lambda: asyncio.ensure_future(daemon.abort(daemon_url))
+            )
+        ),
+    )
+    await daemon.submit_orders(daemon_url, orders_fp)
+
+
+async def _start_daemon(
+    account_metadata: dict,
+    placer_kwargs: dict,
+    spool_dir: str,
+    socket_path: str | None,
+    port: int,
+):
+    # a batch resubmitted with the same client order ids resumes from its journal
+    async with BnceSpotLimitOrderPlacer(
+        account_metadata, None, resume=True, **placer_kwargs
+    ) as app:
+        async with daemon.OrderPlacerDaemon(app, spool_dir, socket_path, port=port):
+            stopped = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, stopped.set)
+            await stopped.wait()
+            logging.info("Stopping order placer daemon")
+
+
+async def _start_app(
+    exec: bool,
+    cancel_all: bool,
+    workers: int,
+    account_metadata: dict,
+    orders_fp: str,
+    placer_kwargs: dict,
+    latency_json_fp: str | None = None,
+    latency_prom_fp: str | None = None,
+    concurrency_json_fp: str | None = None,
+):
+    if cancel_all:
+        async with BnceSpotLimitOrderPlacer(
+            account_metadata, orders_fp, **placer_kwargs
+        ) as app:
+            await app.cancel_all()
+        return
+
+    if not exec:
+        async with BnceSpotLimitOrderPlacer(
+            account_metadata, orders_fp, **placer_kwargs
+        ) as app:
             await app.dry_run()
+        return
 
+    loop = asyncio.get_running_loop()
+    if workers > 1:
+        # workers receive ctrl-c too and abort themselves
+        signal.signal(
+            signal.SIGINT,
+            _on_interrupt(lambda: logging.warning("Aborting execution of workers")),
+        )
+        result = await execute_sharded(
+            account_metadata, orders_fp, workers, **placer_kwargs
+        )
+    else:
+        async with BnceSpotLimitOrderPlacer(
+            account_metadata, orders_fp, **placer_kwargs
+        ) as app:
+            signal.signal(
+                signal.SIGINT,
+                _on_interrupt(lambda: loop.call_soon_threadsafe(app.abort)),
+            )
+            result = await app.execute()
 
-def main():
-    parser = argparse.ArgumentParser(
-        prog="order",
-        description="place orders provided in csv file on bitmex exchange",
+    if latency_json_fp:
+        with open(latency_json_fp, "w") as f:
+            f.write(result.latency.to_json())
+    if latency_prom_fp:
+        with open(latency_prom_fp, "w") as f:
+            f.write(result.latency.to_prometheus())
+            f.write(clock_to_prometheus(result.clock))
+    if concurrency_json_fp:
+        with open(concurrency_json_fp, "w") as f:
+            json.dump(result.concurrency, f, indent=2)
+
+
+def _add_placer_arguments(parser: argparse.ArgumentParser):
+    """Options of `BnceSpotLimitOrderPlacer`, shared by the cli and the daemon"""
+    parser.add_argument(
+        "--mock-fail-rate",
+        default=0,
+        help="value between 0 and 1. how often order fails when enviroment variable APP_ENV == test or local, or in simulate mode",
+        type=float,
     )
-    parser.add_argument("orders_fp", help="filepath for orders data", type=str)
-    parser.add_argument("precision_fp", help="filepath for precision data", type=str)
     parser.add_argument(
-        "-e",
-        "--exec",
+        "--window",
+        default=45,
+        help="max number of in-flight orders per account in execution mode",
+        type=int,
+    )
+    parser.add_argument(
+        "--adaptive",
         action="store_true",
-        help="if flag is present run in execution mode else run in dry run mode",
+        help="adapt the in-flight window and rate limits to latency, errors and 429/418 responses in execution mode",
     )
     parser.add_argument(
-        "--mock-fail-rate",
-        default=0,
-        help="value between 0 and 1. how often order fails when enviroment variable APP_ENV == test",
+        "--max-window",
+        default=None,
+        help="max number of in-flight orders per account the adaptive window may reach, defaults to 4 * window",
+        type=int,
+    )
+    parser.add_argument(
+        "--concurrency-json",
+        default=None,
+        help="filepath to export the decisions of the adaptive window as json",
+        type=str,
+    )
+    parser.add_argument(
+        "--lookahead",
+        default=10000,
+        help="max number of orders read ahead of sending in execution mode, priorities apply within them",
+        type=int,
+    )
+    parser.add_argument(
+        "--account-weights",
+        nargs="+",
+        default=None,
+        help="${accountid}:${weight} share of sending capacity per account, defaults to 1",
+        type=str,
+    )
+    parser.add_argument(
+        "--priority-column",
+        default=None,
+        help="numeric column of the orders file, eg. Value. orders with higher values are sent first",
+        type=str,
+    )
+    parser.add_argument(
+        "--transport",
+        default=BnceTransport.REST.value,
+        choices=[t.value for t in BnceTransport],
+        help="rest or ws (websocket api). in test enviroment ws uses a local mock websocket server",
+        type=str,
+    )
+    parser.add_argument(
+        "--order-resp-type",
+        default=BnceOrderRespType.ACK.value,
+        choices=[t.value for t in BnceOrderRespType],
+        help="detail of order responses. ACK is the smallest, only order ids are kept either way",
+        type=str,
+    )
+    parser.add_argument(
+        "--recv-window",
+        default=5000,
+        help="milliseconds a signed request may take to reach the exchange, from when it leaves the rate limiter. at most 60000",
+        type=int,
+    )
+    parser.add_argument(
+        "--clock-refresh",
+        default=60,
+        help="seconds between syncs of the server clock estimate, orders are stamped with server time",
         type=float,
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--exchange-info-ttl",
+        default=3600,
+        help="seconds before cached exchange info is retrieved again",
+        type=float,
+    )
+    parser.add_argument(
+        "--max-attempts",
+        default=5,
+        help="max attempts per order on transient failures (5xx, 429, timeouts, -1021)",
+        type=int,
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="parse and check every order before sending the first one in execution mode, none are sent if any is invalid",
+    )
+    parser.add_argument(
+        "--no-reconcile",
+        action="store_true",
+        help="skip diffing placed orders against the orders of the exchange after execution",
+    )
+    parser.add_argument(
+        "--trace-connections",
+        action="store_true",
+        help="record dns, connect and connection pool wait time of orders",
+    )
+    parser.add_argument(
+        "--pool-size",
+        default=None,
+        help="max open rest connections, defaults to window * number of accounts",
+        type=int,
+    )
+    parser.add_argument(
+        "--warmup-connections",
+        default=None,
+        help="rest connections opened and verified with pings before the first order, defaults to 8 (at most the pool size). 0 disables warm up",
+        type=int,
+    )
+    parser.add_argument(
+        "--dns-ttl",
+        default=300,
+        help="seconds dns answers are cached",
+        type=float,
+    )
+    parser.add_argument(
+        "--keepalive",
+        default=60,
+        help="seconds idle connections are kept open for reuse",
+        type=float,
+    )
+
+
+def _add_logging_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--log-level",
+        default="DEBUG",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="lowest level logged, messages of lower levels are never formatted",
+        type=str,
+    )
+    parser.add_argument(
+        "--log-background",
+        action="store_true",
+        help="format and write log records on a background thread, off the event loop",
+    )
+    parser.add_argument(
+        "--log-sample",
+        default=1.0,
+        help="value between 0 and 1. share of per order success lines logged, warnings and errors are always logged",
+        type=float,
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="log records as json lines",
+    )
+
+
+def _setup_logging(args: argparse.Namespace):
+    setup_logging(args.log_level, args.log_background, args.log_sample, args.log_json)
+
+
+def _account_weights(args: argparse.Namespace) -> dict[int, float] | None:
+    if not args.account_weights:
+        return None
+    account_weights = {}
+    for weight_str in args.account_weights:
+        acc_id, weight = weight_str.split(":", maxsplit=1)
+        account_weights[int(acc_id)] = float(weight)
+    return account_weights
+
+
+def _placer_kwargs(args: argparse.Namespace) -> dict:
+    return {
+        "mock_failure_rate": args.mock_fail_rate,
+        "inflight_window": args.window,
+        "transport": BnceTransport(args.transport),
+        "exchange_info_ttl_s": args.exchange_info_ttl,
+        "retry_policy": RetryPolicy(args.max_attempts),
+        "trace_connections": args.trace_connections,
+        "lookahead": args.lookahead,
+        "account_weights": _account_weights(args),
+        "priority_column": args.priority_column,
+        "pool_size": args.pool_size,
+        "warmup_connections": args.warmup_connections,
+        "dns_ttl_s": args.dns_ttl,
+        "keepalive_s": args.keepalive,
+        "adaptive": args.adaptive,
+        "max_inflight_window": args.max_window,
+        "reconcile": not args.no_reconcile,
+        "order_resp_type": BnceOrderRespType(args.order_resp_type),
+        "validate": args.validate,
+        "recv_window_ms": args.recv_window,
+        "clock_refresh_s": args.clock_refresh,
+    }
+
+
+def _load_account_metadata(precision_fp: str) -> dict:
+    """Api keys from the environment (and .env), precisions from `precision_fp`"""
     load_dotenv()
 
     account_metadata = defaultdict(dict)
@@ -54,7 +335,7 @@ def main():
         acc_id, key = key_str.split(":", maxsplit=1)
         account_metadata[int(acc_id)]["secret_key"] = key
 
-    with open(args.precision_fp, "r") as f:
+    with open(precision_fp, "r") as f:
         reader = csv.DictReader(f, delimiter=",")
         for row in reader:
             account_metadata[int(row["Account"])]["px_prec"] = int(
@@ -63,8 +344,186 @@ def main():
             account_metadata[int(row["Account"])]["qty_prec"] = int(
                 row["Quantity Precision"]
             )
+    return account_metadata
+
 
-    asyncio.run(_start_app(args.exec, account_metadata, args.orders_fp, args.mock_fail_rate))
+def _daemon_url(address: str) -> str:
+    if address.startswith(("http://", "https://")):
+        return address
+    return f"unix:{address}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="order",
+        description="place orders provided in csv file on bitmex exchange",
+    )
+    parser.add_argument(
+        "orders_fp",
+        help="filepath for orders data: csv, ndjson (.ndjson, .jsonl), binary (.opo) or - for ndjson on stdin",
+        type=str,
+    )
+    parser.add_argument("precision_fp", help="filepath for precision data", type=str)
+    parser.add_argument(
+        "-e",
+        "--exec",
+        action="store_true",
+        help="if flag is present run in execution mode else run in dry run mode",
+    )
+    parser.add_argument(
+        "--cancel-all",
+        action="store_true",
+        help="cancel open orders of every account and symbol in the orders file, no orders are placed",
+    )
+    parser.add_argument(
+        "--daemon",
+        default=None,
+        help="socket path or http://host:port of a running order-placerd. orders are executed (or cancelled) by the daemon with its own options",
+        type=str,
+    )
+    parser.add_argument(
+        "--to-binary",
+        default=None,
+        help="convert the orders file into a binary orders file (.opo) at this filepath and exit",
+        type=str,
+    )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="predict execution time on a virtual clock, no orders are sent",
+    )
+    parser.add_argument(
+        "--sim-latency-ms",
+        default=100,
+        help="median round trip of an order in simulate mode",
+        type=float,
+    )
+    _add_placer_arguments(parser)
+    parser.add_argument(
+        "--journal",
+        default=None,
+        help="filepath of execution journal. defaults to {orders_fp}.journal, none for stdin",
+        type=str,
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip orders already placed according to the execution journal",
+    )
+    parser.add_argument(
+        "--workers",
+        default=1,
+        help="number of processes in execution mode, accounts are split across them",
+        type=int,
+    )
+    parser.add_argument(
+        "--latency-json",
+        default=None,
+        help="filepath to export per order latency percentiles by stage and account as json",
+        type=str,
+    )
+    parser.add_argument(
+        "--latency-prom",
+        default=None,
+        help="filepath to export per order latency in prometheus text format",
+        type=str,
+    )
+    _add_logging_arguments(parser)
+    args = parser.parse_args()
+    _setup_logging(args)
+    stdin = args.orders_fp == "-"
+
+    if args.to_binary:
+        nrows = BinaryOrderSource.write(
+            args.to_binary, open_order_source(args.orders_fp, args.priority_column)
+        )
+        logging.info(f"Wrote {nrows} orders to {args.to_binary}")
+        return
+
+    if stdin and (args.daemon or args.workers > 1):
+        parser.error("orders from stdin require a single process without --daemon")
+
+    if args.daemon:
+        if not (args.exec or args.cancel_all):
+            parser.error("--daemon requires --exec or --cancel-all")
+        asyncio.run(
+            _start_client(args.cancel_all, _daemon_url(args.daemon), args.orders_fp)
+        )
+        return
+
+    account_metadata = _load_account_metadata(args.precision_fp)
+
+    if args.simulate:
+        BnceSimulator(
+            account_metadata,
+            args.orders_fp,
+            latency_median_s=args.sim_latency_ms / 1000,
+            failure_rate=args.mock_fail_rate,
+            **{
+                **_placer_kwargs(args),
+                "retry_policy": RetryPolicy(args.max_attempts, seed=0),
+            },
+        ).run()
+        return
+
+    asyncio.run(
+        _start_app(
+            args.exec,
+            args.cancel_all,
+            args.workers,
+            account_metadata,
+            args.orders_fp,
+            {
+                **_placer_kwargs(args),
+                "journal_fp": args.journal
+                or (None if stdin else f"{args.orders_fp}.journal"),
+                "resume": args.resume,
+            },
+            args.latency_json,
+            args.latency_prom,
+            args.concurrency_json,
+        )
+    )
+
+
+def serve():
+    parser = argparse.ArgumentParser(
+        prog="order-placerd",
+        description="keep sessions, rate limits and exchange info warm and place batches of orders submitted with order-placer --daemon",
+    )
+    parser.add_argument("precision_fp", help="filepath for precision data", type=str)
+    parser.add_argument(
+        "--socket",
+        default=daemon.DEFAULT_SOCKET_PATH,
+        help="unix socket path to listen on",
+        type=str,
+    )
+    parser.add_argument(
+        "--port",
+        default=None,
+        help="listen on http://127.0.0.1:port instead of a unix socket",
+        type=int,
+    )
+    parser.add_argument(
+        "--spool-dir",
+        default="./spool",
+        help="directory submitted batches and their journals are kept in until every order is placed",
+        type=str,
+    )
+    _add_placer_arguments(parser)
+    _add_logging_arguments(parser)
+    args = parser.parse_args()
+    _setup_logging(args)
+
+    asyncio.run(
+        _start_daemon(
+            _load_account_metadata(args.precision_fp),
+            _placer_kwargs(args),
+            args.spool_dir,
+            None if args.port is not None else args.socket,
+            args.port or 0,
+        )
+    )
 
 
 if __name__ == "__main__":
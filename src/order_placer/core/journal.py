@@ -0,0 +1,113 @@
+from enum import IntEnum, unique
+import os
+import struct
+import threading
+
+_MAGIC = b"OPJ1"
+_KEY_LEN = struct.Struct("<H")
+_RECORD = struct.Struct("<QB")  # row index, state
+
+
+@unique
+class JournalState(IntEnum):
+    NONE = 0
+    INTENT = 1
+    ACKED = 2
+    FAILED = 3
+
+
+class OrderJournal:
+    """Append only journal of order states by row index.
+
+    File layout is a header (magic, key) followed by fixed size 9 byte records.
+    `record` only appends to an in memory buffer, a background thread group
+    commits the buffer with a single write and fsync every `flush_interval_s`,
+    so the event loop never blocks on disk. A torn record at the end of the file
+    (crash mid write) is ignored and truncated on resume.
+
+    `key` identifies the orders file, resuming from a journal of another file
+    raises `ValueError`.
+    """
+
+    def __init__(
+        self, fp: str, key: str, resume: bool = False, flush_interval_s: float = 0.05
+    ) -> None:
+        self._fp = fp
+        key_bytes = key.encode("utf-8")
+        self._header = _MAGIC + _KEY_LEN.pack(len(key_bytes)) + key_bytes
+        self._flush_interval_s = flush_interval_s
+        self._states = bytearray()
+
+        if resume and os.path.exists(fp):
+            self._states = self._load()
+            self._file = open(fp, "ab")
+        else:
+            self._file = open(fp, "wb")
+            self._file.write(self._header)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+        self._buf = bytearray()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._error: Exception | None = None
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+
+    def _load(self) -> bytearray:
+        """Read the journal in one pass, returns latest state by row index"""
+        with open(self._fp, "rb") as f:
+            data = f.read()
+        if not data.startswith(self._header):
+            raise ValueError(f"Journal {self._fp} does not belong to this orders file")
+
+        nrecords = (len(data) - len(self._header)) // _RECORD.size
+        end = len(self._header) + nrecords * _RECORD.size
+        states = bytearray()
+        for idx, state in _RECORD.iter_unpack(memoryview(data)[len(self._header) : end]):
+            if idx >= len(states):
+                states.extend(bytes(idx + 1 - len(states)))
+            states[idx] = state
+        if end != len(data):
+            os.truncate(self._fp, end)
+        return states
+
+    def state(self, idx: int) -> JournalState:
+        """State of row `idx` when the journal was opened"""
+        if idx < len(self._states):
+            return JournalState(self._states[idx])
+        return JournalState.NONE
+
+    def record(self, idx: int, state: JournalState):
+        if self._error is not None:
+            raise self._error
+        with self._cond:
+            self._buf += _RECORD.pack(idx, state)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(self._flush_interval_s)
+                buf, self._buf = self._buf, bytearray()
+                closed = self._closed
+            if buf:
+                try:
+                    self._file.write(buf)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                except OSError as e:
+                    self._error = e
+                    return
+            if closed:
+                return
+
+    def close(self):
+        """Commit remaining records, blocking. Run it off the event loop"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,129 @@
+import atexit
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+
+# pass as `extra` to per order success lines, the ones `--log-sample` thins out
+SAMPLED = {"sampled": True}
+
+# arguments of the last `setup_logging`, so worker processes log the same way
+_settings: dict = {}
+_listener: QueueListener | None = None
+
+# attributes of every LogRecord, anything else was passed as `extra`
+_RECORD_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "sampled"}
+
+
+class SamplingFilter(logging.Filter):
+    """Lets through `rate` (0 to 1) of the records logged with `SAMPLED`,
+    evenly spread. Other records, and any record above INFO, always pass"""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        if not 0 <= rate <= 1:
+            raise ValueError("sample rate must be between 0 and 1")
+        self._rate = rate
+        self._credit = 0.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not getattr(record, "sampled", False):
+            return True
+        self._credit += self._rate
+        if self._credit >= 1:
+            self._credit -= 1
+            return True
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One json object per record: time, level, logger, message and the
+    fields passed as `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name, value in record.__dict__.items():
+            if name not in _RECORD_ATTRS:
+                line[name] = value
+        if record.exc_info:
+            line["exc"] = self.formatException(record.exc_info)
+        return json.dumps(line, default=str)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """Enqueues records as they are, `QueueHandler.prepare` would format the
+    message on the logging thread. Arguments must not be mutated after logging,
+    which holds for the responses and orders logged here"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(
+    level: int | str = logging.DEBUG,
+    background: bool = False,
+    sample_rate: float = 1.0,
+    json_lines: bool = False,
+):
+    """Configure the root logger to write to stderr at `level`.
+
+    With `background`, records are put on a queue as is and formatted and
+    written by a listener thread, so the event loop neither formats nor
+    blocks on stderr. `sample_rate` of per order success lines are kept,
+    warnings and errors are never dropped. `json_lines` writes records as
+    json objects, one per line.
+
+    Whatever the mode, messages are built from lazy %-style arguments, so
+    records below `level` cost no formatting at all.
+    """
+    global _listener
+    _settings.update(
+        level=level,
+        background=background,
+        sample_rate=sample_rate,
+        json_lines=json_lines,
+    )
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    stream = logging.StreamHandler()
+    if json_lines:
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    handler = stream
+    if background:
+        records = queue.SimpleQueue()
+        _listener = QueueListener(records, stream)
+        _listener.start()
+        atexit.register(_stop_listener)
+        handler = _LazyQueueHandler(records)
+    if sample_rate < 1:
+        # dropped before they are queued
+        handler.addFilter(SamplingFilter(sample_rate))
+    root.addHandler(handler)
+
+
+def _stop_listener():
+    """Flush records still queued"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_settings() -> dict:
+    """Arguments of the last `setup_logging`"""
+    return dict(_settings)
@@ -0,0 +1,198 @@
+from array import array
+import json
+import types
+from typing import Callable
+
+import aiohttp
+
+_SUB_BUCKET_BITS = 7  # 64 sub buckets per power of two, < 1.6% error
+_MAX_VALUE_BITS = 40  # ~12 days in microseconds
+_NBUCKETS = (_MAX_VALUE_BITS - _SUB_BUCKET_BITS + 2) << (_SUB_BUCKET_BITS - 1)
+
+ALL_LABEL = "all"
+
+
+def _bucket_index(value: int) -> int:
+    if value < 1 << _SUB_BUCKET_BITS:
+        return value
+    exp = value.bit_length() - _SUB_BUCKET_BITS
+    return (exp << (_SUB_BUCKET_BITS - 1)) + (value >> exp)
+
+
+def _bucket_value(idx: int) -> int:
+    """Highest value counted in bucket `idx`"""
+    if idx < 1 << _SUB_BUCKET_BITS:
+        return idx
+    exp = (idx >> (_SUB_BUCKET_BITS - 1)) - 1
+    return ((idx - (exp << (_SUB_BUCKET_BITS - 1)) + 1) << exp) - 1
+
+
+class LatencyHistogram:
+    """HDR style log linear histogram of microsecond latencies.
+
+    Fixed size and array backed, recording is an index computation and an
+    increment. Values above the range are clamped into the last bucket.
+    """
+
+    __slots__ = ("_counts", "count", "sum_us", "max_us")
+
+    def __init__(self) -> None:
+        self._counts = array("Q", bytes(8 * _NBUCKETS))
+        self.count = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    def record(self, value_us: int):
+        self._counts[min(_bucket_index(value_us), _NBUCKETS - 1)] += 1
+        self.count += 1
+        self.sum_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def percentile(self, p: float) -> int:
+        """Value at percentile `p` (0 - 100) in microseconds"""
+        if not self.count:
+            return 0
+        target = max(1, round(self.count * p / 100))
+        seen = 0
+        for idx, count in enumerate(self._counts):
+            seen += count
+            if seen >= target:
+                return min(_bucket_value(idx), self.max_us)
+        return self.max_us
+
+    def merge(self, other: "LatencyHistogram"):
+        for idx, count in enumerate(other._counts):
+            if count:
+                self._counts[idx] += count
+        self.count += other.count
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50_us": self.percentile(50),
+            "p90_us": self.percentile(90),
+            "p99_us": self.percentile(99),
+            "max_us": self.max_us,
+        }
+
+
+class LatencyRecorder:
+    """Latency histograms by stage and label (eg. account id).
+
+    Every record is also counted under the `all` label.
+    """
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, dict[str, LatencyHistogram]] = {}
+
+    def scope(
+        self, label: str, listener: Callable[[str, int], None] | None = None
+    ) -> "LatencyScope":
+        return LatencyScope(self, label, listener)
+
+    def record(self, stage: str, label: str, value_ns: int):
+        by_label = self._histograms.get(stage)
+        if by_label is None:
+            by_label = self._histograms[stage] = {ALL_LABEL: LatencyHistogram()}
+        histogram = by_label.get(label)
+        if histogram is None:
+            histogram = by_label[label] = LatencyHistogram()
+        value_us = value_ns // 1000
+        histogram.record(value_us)
+        if label != ALL_LABEL:
+            by_label[ALL_LABEL].record(value_us)
+
+    def merge(self, other: "LatencyRecorder"):
+        for stage, by_label in other._histograms.items():
+            for label, histogram in by_label.items():
+                self._histograms.setdefault(stage, {}).setdefault(
+                    label, LatencyHistogram()
+                ).merge(histogram)
+
+    def summary(self) -> dict[str, dict[str, dict]]:
+        """p50/p90/p99/max by stage then label"""
+        return {
+            stage: {label: h.summary() for label, h in by_label.items()}
+            for stage, by_label in self._histograms.items()
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self, prefix: str = "order_placer") -> str:
+        """Prometheus text exposition format, one summary per stage"""
+        name = f"{prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Per order latency by stage.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, by_label in self._histograms.items():
+            for label, h in by_label.items():
+                labels = f'stage="{stage}",account="{label}"'
+                for quantile in (0.5, 0.9, 0.99):
+                    lines.append(
+                        f'{name}{{{labels},quantile="{quantile}"}} {h.percentile(quantile * 100) / 1e6}'
+                    )
+                lines.append(f"{name}_sum{{{labels}}} {h.sum_us / 1e6}")
+                lines.append(f"{name}_count{{{labels}}} {h.count}")
+        lines.append(f"# HELP {prefix}_stage_latency_max_seconds Max latency by stage.")
+        lines.append(f"# TYPE {prefix}_stage_latency_max_seconds gauge")
+        for stage, by_label in self._histograms.items():
+            for label, h in by_label.items():
+                lines.append(
+                    f'{prefix}_stage_latency_max_seconds{{stage="{stage}",account="{label}"}} {h.max_us / 1e6}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+class LatencyScope:
+    """Records into a `LatencyRecorder` under a fixed label, `listener` is also
+    called with every stage and value (eg. to feed an `AimdController`)"""
+
+    __slots__ = ("_recorder", "_label", "_listener")
+
+    def __init__(
+        self,
+        recorder: LatencyRecorder,
+        label: str,
+        listener: Callable[[str, int], None] | None = None,
+    ) -> None:
+        self._recorder = recorder
+        self._label = label
+        self._listener = listener
+
+    def record(self, stage: str, value_ns: int):
+        self._recorder.record(stage, self._label, value_ns)
+        if self._listener is not None:
+            self._listener(stage, value_ns)
+
+
+def make_trace_config() -> aiohttp.TraceConfig:
+    """Records dns, connect (tcp and tls) and connection pool wait times into the
+    `LatencyScope` passed as `trace_request_ctx` of a request"""
+    trace_config = aiohttp.TraceConfig()
+
+    def _start(attr: str):
+        async def on_start(session, ctx: types.SimpleNamespace, params):
+            setattr(ctx, attr, session.loop.time())
+
+        return on_start
+
+    def _end(attr: str, stage: str):
+        async def on_end(session, ctx: types.SimpleNamespace, params):
+            scope = ctx.trace_request_ctx
+            if isinstance(scope, LatencyScope) and hasattr(ctx, attr):
+                scope.record(stage, int((session.loop.time() - getattr(ctx, attr)) * 1e9))
+
+        return on_end
+
+    trace_config.on_dns_resolvehost_start.append(_start("dns_start"))
+    trace_config.on_dns_resolvehost_end.append(_end("dns_start", "dns"))
+    trace_config.on_connection_create_start.append(_start("connect_start"))
+    trace_config.on_connection_create_end.append(_end("connect_start", "connect"))
+    trace_config.on_connection_queued_start.append(_start("queued_start"))
+    trace_config.on_connection_queued_end.append(_end("queued_start", "pool_wait"))
+    return trace_config
@@ -1,4 +1,7 @@
+import json
+
 from aiohttp import ClientResponse, ClientResponseError
+from multidict import CIMultiDict, CIMultiDictProxy
 from yarl import URL
 
 
@@ -10,12 +13,16 @@ class MockClientResponse(ClientResponse):
         status: int,
         json: dict | None,
         reason: str | None = None,
+        headers: dict | None = None,
     ) -> None:
         self.method = method
         self._url = URL(url)
         self.status = status
         self._resp_json = json
         self.reason = reason
+        # `headers` is cached in `_cache` once read
+        self._cache = {}
+        self._headers = CIMultiDictProxy(CIMultiDict(headers or {}))
 
     @property
     def ok(self):
@@ -24,6 +31,14 @@ class MockClientResponse(ClientResponse):
     async def json(self) -> dict:
         return self._resp_json
 
+    async def read(self) -> bytes:
+        if self._resp_json is None:
+            return b""
+        return json.dumps(self._resp_json).encode("utf-8")
+
+    def release(self):
+        pass
+
     def raise_for_status(self) -> None:
         if self.reason:
             raise ClientResponseError(
@@ -0,0 +1,25 @@
+import random
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay_s: float = 0.1,
+        max_delay_s: float = 5,
+        seed: int | None = None,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("max attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self._base_delay_s = base_delay_s
+        self._max_delay_s = max_delay_s
+        self._random = random.Random(seed)
+
+    def backoff_s(self, attempt: int) -> float:
+        """Delay before retrying after failed `attempt` (0 indexed)"""
+        return self._random.uniform(
+            0, min(self._max_delay_s, self._base_delay_s * 2**attempt)
+        )
@@ -0,0 +1,137 @@
+import asyncio
+from collections import deque
+import heapq
+import itertools
+from typing import Callable, Hashable, Iterable
+
+
+class FairScheduler:
+    """Buffer between a producer and a pool of consumers shared by several keys
+    (eg. accounts), each key with at most `max_inflight` items in flight.
+
+    `get` hands out the next item of the key that can go first: keys ready
+    now according to `wait_s` (else the one ready soonest), then the key whose
+    next item has the highest priority, then weighted fair queuing, the key
+    served least relative to its weight. Within a key items come out by
+    priority, then in insertion order. `put` waits while `capacity` items are
+    buffered.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[Hashable],
+        capacity: int,
+        max_inflight: int,
+        weights: dict[Hashable, float] | None = None,
+        wait_s: Callable[[Hashable], float] | None = None,
+    ) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if max_inflight < 1:
+            raise ValueError("max inflight must be at least 1")
+        keys = list(keys)
+        weights = weights or {}
+        if any(weights.get(key, 1) <= 0 for key in keys):
+            raise ValueError("weights must be positive")
+        # (-priority, sequence, item) heaps
+        self._heaps: dict[Hashable, list] = {key: [] for key in keys}
+        self._inflight = dict.fromkeys(keys, 0)
+        self._weights = {key: weights.get(key, 1) for key in keys}
+        # start time fair queuing tags, a key idle for a while restarts at the
+        # virtual clock rather than with credit for the time it was idle
+        self._tags = dict.fromkeys(keys, 0.0)
+        self._vclock = 0.0
+        self._capacity = capacity
+        self._max_inflight = max_inflight
+        self._wait_s = wait_s
+        self._size = 0
+        self._closed = False
+        self._seq = itertools.count()
+        self._getters: deque[asyncio.Future] = deque()
+        self._putters: deque[asyncio.Future] = deque()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _wake(waiters: deque[asyncio.Future], all: bool = False):
+        """Wake the first (or every) waiter still waiting"""
+        while waiters:
+            fut = waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                if not all:
+                    return
+
+    async def _wait(self, waiters: deque[asyncio.Future]):
+        fut = asyncio.get_running_loop().create_future()
+        waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # woken right before cancellation, pass the wake up on
+                self._wake(waiters)
+            raise
+
+    async def put(self, key: Hashable, item, priority: float = 0):
+        """Buffer `item` of `key`, higher `priority` goes first"""
+        if self._closed:
+            raise RuntimeError("scheduler is closed")
+        while self._size >= self._capacity:
+            await self._wait(self._putters)
+        heapq.heappush(self._heaps[key], (-priority, next(self._seq), item))
+        self._size += 1
+        self._wake(self._getters)
+
+    def close(self):
+        """No more items, `get` returns None once the buffer is drained"""
+        self._closed = True
+        self._wake(self._getters, all=True)
+
+    def _pick(self) -> Hashable | None:
+        best_key = None
+        best_rank = None
+        for key, heap in self._heaps.items():
+            if not heap or self._inflight[key] >= self._max_inflight:
+                continue
+            wait_s = max(self._wait_s(key), 0) if self._wait_s is not None else 0
+            rank = (wait_s, heap[0][0], max(self._tags[key], self._vclock))
+            if best_rank is None or rank < best_rank:
+                best_key, best_rank = key, rank
+        return best_key
+
+    async def get(self) -> tuple[Hashable, object] | None:
+        """Next (key, item), None once closed and drained. Call `done` with the
+        key when the item is handled"""
+        while True:
+            key = self._pick()
+            if key is not None:
+                _, _, item = heapq.heappop(self._heaps[key])
+                self._size -= 1
+                self._inflight[key] += 1
+                start = max(self._tags[key], self._vclock)
+                self._vclock = start
+                self._tags[key] = start + 1 / self._weights[key]
+                self._wake(self._putters)
+                return key, item
+            if self._closed and not self._size:
+                # drained, let the next consumer see it too
+                self._wake(self._getters)
+                return None
+            await self._wait(self._getters)
+
+    def set_max_inflight(self, max_inflight: int):
+        """Change the in flight limit of every key, items already in flight
+        above a lowered limit are not recalled"""
+        if max_inflight < 1:
+            raise ValueError("max inflight must be at least 1")
+        raised = max_inflight > self._max_inflight
+        self._max_inflight = max_inflight
+        if raised:
+            self._wake(self._getters, all=True)
+
+    def done(self, key: Hashable):
+        """An item of `key` from `get` was handled, frees its in flight slot"""
+        self._inflight[key] -= 1
+        self._wake(self._getters)
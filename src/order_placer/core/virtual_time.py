@@ -0,0 +1,91 @@
+import asyncio
+import math
+import selectors
+import time
+from typing import Coroutine
+
+
+class _VirtualTimeSelector(selectors.BaseSelector):
+    """Polls real file descriptors without blocking, and instead of sleeping
+    until the next timer jumps the loop's clock forward to it"""
+
+    def __init__(self, loop: "VirtualTimeEventLoop") -> None:
+        self._selector = selectors.DefaultSelector()
+        self._loop = loop
+
+    def register(self, fileobj, events, data=None):
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        return self._selector.modify(fileobj, events, data)
+
+    def get_map(self):
+        return self._selector.get_map()
+
+    def close(self):
+        self._selector.close()
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if events:
+            return events
+        if timeout is None or (timeout and self._loop._executor_futures):
+            # only real io (eg. a thread) can wake the loop, work of executor
+            # threads takes real time and is waited for
+            return self._selector.select(None)
+        self._loop._advance(timeout)
+        return []
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Event loop on a virtual clock.
+
+    Sleeps, timeouts and `call_later` timers complete as soon as nothing else is
+    runnable, time is advanced to the next timer instead of waited for. Code
+    timing itself with `loop.time()` (eg. throttlers) sees the virtual clock,
+    so hours of rate limited work run in milliseconds. Real io still works but
+    is not waited for while timers are pending, keep network out of it.
+    Executor work (eg. `asyncio.to_thread`) is, time does not advance while
+    any is outstanding.
+    """
+
+    def __init__(self) -> None:
+        # start at the real monotonic time, objects created before the loop agree
+        self._virtual_time = time.monotonic()
+        self._executor_futures = 0
+        super().__init__(_VirtualTimeSelector(self))
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def run_in_executor(self, executor, func, *args):
+        future = super().run_in_executor(executor, func, *args)
+        self._executor_futures += 1
+        future.add_done_callback(self._executor_done)
+        return future
+
+    def _executor_done(self, future: asyncio.Future):
+        self._executor_futures -= 1
+
+    def _advance(self, seconds: float):
+        # always move, a timer closer than float precision would spin forever
+        self._virtual_time = max(
+            self._virtual_time + seconds, math.nextafter(self._virtual_time, math.inf)
+        )
+
+
+def run_virtual(main: Coroutine):
+    """`asyncio.run` on a `VirtualTimeEventLoop`"""
+    loop = VirtualTimeEventLoop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+from time import perf_counter_ns
+import uuid
+
+import aiohttp
+from aiohttp import web
+
+from order_placer.cex.binance.order import (
+    BnceOrder,
+    BnceSpotLimitOrderPlacer,
+    _client_order_id_prefix,
+)
+from order_placer.cex.binance.order_source import file_key
+from order_placer.cex.binance.order_store import BnceInvalidRow
+from order_placer.cex.binance.response import BnceOrderAck
+from order_placer.core.log import SAMPLED
+
+DEFAULT_SOCKET_PATH = "./order-placer.sock"
+# client order ids are at most 36 characters, with room for the row index
+_PREFIX_RE = re.compile(r"[A-Za-z0-9_-]{1,24}")
+# spooled orders keep the extension `open_order_source` picks their format by
+_EXTENSIONS = {
+    "application/x-ndjson": ".ndjson",
+    "application/octet-stream": ".opo",
+}
+_CONTENT_TYPES = {ext: content_type for content_type, ext in _EXTENSIONS.items()}
+# request bodies are spooled this many bytes at a time
+_SPOOL_CHUNK_BYTES = 1 << 20
+
+
+def _ack(
+    order: BnceOrder | BnceInvalidRow, data: BnceOrderAck | None, error: str | None
+) -> dict:
+    ack = {"row": order.idx, "account": order.account, "symbol": order.symbol}
+    if error is None:
+        ack["status"] = "placed"
+        ack["orderId"] = data.order_id if data is not None else None
+    else:
+        ack["status"] = "failed"
+        ack["error"] = error
+    return ack
+
+
+def _remove(*fps: str):
+    for fp in fps:
+        try:
+            os.unlink(fp)
+        except FileNotFoundError:
+            pass
+
+
+class OrderPlacerDaemon:
+    """Long running `BnceSpotLimitOrderPlacer` taking batches of orders over a
+    local http api, on a unix socket at `path` or on `host`:`port`.
+
+    Sessions and warm connections, endpoints, rate limiter state and exchange
+    info (until older than its ttl) are kept between batches, so a batch pays
+    neither for a cold start nor for a full rate limit budget it does not
+    have.
+
+    POST /orders takes orders (csv, ndjson or binary per the Content-Type, see
+    `open_order_source`) and streams one json line per order as it
+    is placed or failed ({"row", "account", "symbol", "status", "orderId" or
+    "error"}), then a summary line ({"done": true, "placed", ...}). Batches
+    are spooled to `spool_dir` and executed one at a time in the order they
+    were received. A `prefix` query parameter sets the client order id prefix,
+    resubmitting a batch with the same prefix resumes it from its journal.
+    Spooled orders and their journal are removed once every order of the
+    batch is placed, and kept for a resubmit otherwise.
+    POST /cancel-all cancels open orders of every account and symbol of an
+    orders csv, POST /abort aborts the running batch, GET /status reports
+    batches received and executed and the server clock estimate.
+    """
+
+    def __init__(
+        self,
+        placer: BnceSpotLimitOrderPlacer,
+        spool_dir: str,
+        path: str | None = DEFAULT_SOCKET_PATH,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self._placer = placer
+        self._spool_dir = spool_dir
+        self._path = path
+        self._host = host
+        self._port = port
+        self._runner: web.AppRunner | None = None
+        self._lock = asyncio.Lock()
+        self._start_ns = perf_counter_ns()
+        self._received = 0
+        self._executed = 0
+        self._running: str | None = None
+        self._batches: set[asyncio.Task] = set()
+        self._stopping = False
+
+        # bodies are streamed to the spool, never read whole
+        self._app = web.Application()
+        self._app.router.add_post("/orders", self._orders)
+        self._app.router.add_post("/cancel-all", self._cancel_all)
+        self._app.router.add_post("/abort", self._abort)
+        self._app.router.add_get("/status", self._status)
+
+    @property
+    def url(self) -> str:
+        if self._path is not None:
+            return f"unix:{self._path}"
+        return f"http://{self._host}:{self._port}"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def start(self):
+        os.makedirs(self._spool_dir, exist_ok=True)
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        if self._path is not None:
+            if os.path.exists(self._path):
+                # left over by a daemon that did not stop cleanly
+                os.unlink(self._path)
+            site = web.UnixSite(self._runner, self._path)
+            await site.start()
+        else:
+            site = web.TCPSite(self._runner, self._host, self._port)
+            await site.start()
+            # resolve port when bound to 0
+            self._port = site._server.sockets[0].getsockname()[1]
+        logging.info(f"Order placer daemon listening on {self.url}")
+
+    async def stop(self):
+        """Abort the running batch, batches waiting their turn are not executed"""
+        self._stopping = True
+        if self._running is not None:
+            self._placer.abort()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._path is not None and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    async def _spool(self, request: web.Request, prefix: str) -> str:
+        """Temporary file of the request body, with the extension of its
+        format. The body is streamed to disk, a new file is never one a batch
+        may have memory mapped"""
+        ext = _EXTENSIONS.get(request.content_type, ".csv")
+        fd, fp = tempfile.mkstemp(dir=self._spool_dir, prefix=f".{prefix}", suffix=ext)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for data in request.content.iter_chunked(_SPOOL_CHUNK_BYTES):
+                    await asyncio.to_thread(f.write, data)
+        except BaseException:
+            _remove(fp)
+            raise
+        return fp
+
+    async def _execute(self, spool_fp: str, prefix: str, acks: asyncio.Queue):
+        """Execute a spooled batch once the previous one is done, acks and a
+        summary go to `acks`"""
+        ext = os.path.splitext(spool_fp)[1]
+        orders_fp = os.path.join(self._spool_dir, f"{prefix}orders{ext}")
+        async with self._lock:
+            if self._stopping:
+                _remove(spool_fp)
+                acks.put_nowait({"done": True, "error": "Daemon stopped"})
+                return
+            # renamed under the lock, no batch is reading the file it replaces
+            os.replace(spool_fp, orders_fp)
+            self._running = prefix
+            try:
+                result = await self._placer.execute(
+                    orders_fp,
+                    prefix,
+                    f"{orders_fp}.journal",
+                    lambda order, data, error: acks.put_nowait(
+                        _ack(order, data, error)
+                    ),
+                )
+            except Exception as e:
+                logging.exception(f"Batch {prefix} failed")
+                acks.put_nowait({"done": True, "error": f"{type(e).__name__}: {e}"})
+                return
+            finally:
+                self._running = None
+            if not result.failed and result.cancelled is None:
+                _remove(orders_fp, f"{orders_fp}.journal")
+        self._executed += 1
+        summary = {
+            "done": True,
+            "prefix": prefix,
+            "placed": result.placed,
+            "failed": result.failed,
+            "skipped": result.skipped,
+            "orders": result.norders,
+            "elapsed_ms": result.elapsed_ns / 1000000,
+            "aborted": result.cancelled is not None,
+        }
+        if result.reconciliation is not None:
+            summary["reconciled"] = result.reconciliation.ok
+        acks.put_nowait(summary)
+
+    async def _orders(self, request: web.Request) -> web.StreamResponse:
+        prefix = request.query.get("prefix") or f"opd{uuid.uuid4().hex[:16]}-"
+        if not _PREFIX_RE.fullmatch(prefix):
+            raise web.HTTPBadRequest(reason="Invalid client order id prefix")
+        spool_fp = await self._spool(request, prefix)
+        self._received += 1
+        acks: asyncio.Queue[dict] = asyncio.Queue()
+        # a batch runs to the end even if its client goes away, acks are
+        # journaled either way
+        batch = asyncio.create_task(self._execute(spool_fp, prefix, acks))
+        self._batches.add(batch)
+        batch.add_done_callback(self._batches.discard)
+
+        res = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await res.prepare(request)
+        while True:
+            ack = await acks.get()
+            await res.write(json.dumps(ack).encode("utf-8") + b"\n")
+            if ack.get("done"):
+                break
+        await res.write_eof()
+        return res
+
+    async def _cancel_all(self, request: web.Request) -> web.Response:
+        orders_fp = await self._spool(request, "cancel-")
+        try:
+            result = await self._placer.cancel_all(orders_fp)
+        finally:
+            _remove(orders_fp)
+        return web.json_response(
+            {
+                "cancelled": result.cancelled,
+                "failed": result.failed,
+                "flat_ms": {
+                    acc_id: flat_ns / 1000000
+                    for acc_id, flat_ns in result.flat_ns.items()
+                },
+            }
+        )
+
+    async def _abort(self, request: web.Request) -> web.Response:
+        running = self._running
+        if running is not None:
+            self._placer.abort()
+        return web.json_response({"aborted": running})
+
+    async def _status(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "uptime_s": round((perf_counter_ns() - self._start_ns) / 1e9, 3),
+                "received": self._received,
+                "executed": self._executed,
+                "running": self._running,
+                "clock": self._placer.clock.summary(),
+            }
+        )
+
+
+def _session(daemon_url: str) -> tuple[aiohttp.ClientSession, str]:
+    """Session and base url of a daemon at "unix:{path}" or "http://host:port\" """
+    if daemon_url.startswith("unix:"):
+        connector = aiohttp.UnixConnector(path=daemon_url[len("unix:") :])
+        return aiohttp.ClientSession(connector=connector), "http://localhost"
+    return aiohttp.ClientSession(), daemon_url.rstrip("/")
+
+
+def _content_type(orders_fp: str) -> str:
+    ext = os.path.splitext(orders_fp)[1].lower()
+    if ext == ".jsonl":
+        ext = ".ndjson"
+    return _CONTENT_TYPES.get(ext, "text/csv")
+
+
+async def submit_orders(daemon_url: str, orders_fp: str) -> dict:
+    """Send `orders_fp` to the daemon at `daemon_url` and log acks as they
+    stream back, returns the summary. Client order ids derive from the file
+    like a run without daemon, resubmitting the file resumes it"""
+    sess, base_url = _session(daemon_url)
+    summary = {}
+    async with sess:
+        with open(orders_fp, "rb") as f:
+            body = f.read()
+        res = await sess.post(
+            f"{base_url}/orders",
+            params={"prefix": _client_order_id_prefix(file_key(orders_fp))},
+            data=body,
+            headers={"Content-Type": _content_type(orders_fp)},
+            timeout=aiohttp.ClientTimeout(total=None),
+        )
+        res.raise_for_status()
+        async for line in res.content:
+            ack = json.loads(line)
+            if ack.get("done"):
+                summary = ack
+            elif ack["status"] == "placed":
+                logging.info(
+                    "Placed order: row %d account %s %s order id %s",
+                    ack["row"] + 1,
+                    ack["account"],
+                    ack["symbol"],
+                    ack["orderId"],
+                    extra=SAMPLED,
+                )
+            else:
+                logging.error(
+                    "Failed to place order: row %d account %s %s. %s",
+                    ack["row"] + 1,
+                    ack["account"],
+                    ack["symbol"],
+                    ack["error"],
+                )
+    if "error" in summary:
+        logging.error(f"Execution failed. {summary['error']}")
+    elif summary:
+        logging.info(
+            f"Placed {summary['placed']}/{summary['orders']} orders in"
+            f" {summary['elapsed_ms']} ms."
+        )
+    return summary
+
+
+async def cancel_all(daemon_url: str, orders_fp: str) -> dict:
+    """Cancel open orders of every account and symbol of `orders_fp` through
+    the daemon at `daemon_url`"""
+    sess, base_url = _session(daemon_url)
+    async with sess:
+        with open(orders_fp, "rb") as f:
+            body = f.read()
+        res = await sess.post(
+            f"{base_url}/cancel-all",
+            data=body,
+            headers={"Content-Type": _content_type(orders_fp)},
+        )
+        res.raise_for_status()
+        result = await res.json()
+    for acc_id, flat_ms in result["flat_ms"].items():
+        if acc_id in result["failed"]:
+            logging.error(
+                f"Account {acc_id} not flat, failed to cancel open orders of"
+                f" {result['failed'][acc_id]}"
+            )
+        else:
+            logging.info(
+                f"Account {acc_id} flat in {flat_ms} ms, cancelled"
+                f" {result['cancelled'].get(acc_id, 0)} orders"
+            )
+    return result
+
+
+async def abort(daemon_url: str) -> dict:
+    """Abort the batch the daemon at `daemon_url` is executing"""
+    sess, base_url = _session(daemon_url)
+    async with sess:
+        res = await sess.post(f"{base_url}/abort")
+        res.raise_for_status()
+        return await res.json()
@@ -0,0 +1,97 @@
+import pytest
+
+from order_placer.cex.core.adaptive import AimdController, Outcome
+
+
+def _window(controller: AimdController, latency_ns: int, errors: int = 0):
+    """One window of outcomes (the first `errors` fail) at `latency_ns`"""
+    for i in range(controller._window()):
+        controller.record_latency(latency_ns)
+        controller.record_outcome(Outcome.ERROR if i < errors else Outcome.OK)
+
+
+def _controller(initial_limit: int, **kwargs) -> tuple[AimdController, list]:
+    changes = []
+    controller = AimdController(
+        initial_limit,
+        min_samples=10,
+        on_change=lambda limit, rate_scale: changes.append((limit, rate_scale)),
+        **kwargs,
+    )
+    return controller, changes
+
+
+def test_overload_cuts_at_once_and_once_per_window():
+    controller, changes = _controller(16, max_limit=32)
+    controller.record_outcome(Outcome.OVERLOADED)
+    assert (controller.limit, controller.rate_scale) == (8, 0.5)
+    # requests already in flight are rejected too
+    for _ in range(9):
+        controller.record_outcome(Outcome.OVERLOADED)
+    assert controller.limit == 8
+    controller.record_outcome(Outcome.OVERLOADED)
+    assert (controller.limit, controller.rate_scale) == (4, 0.25)
+    assert changes == [(8, 0.5), (4, 0.25)]
+    assert controller.summary()["decisions_by_reason"] == {"overloaded": 2}
+
+
+def test_healthy_windows_increase_additively_up_to_max():
+    controller, changes = _controller(4, max_limit=6)
+    controller.record_outcome(Outcome.OVERLOADED)
+    assert (controller.limit, controller.rate_scale) == (2, 0.5)
+    for _ in range(6):
+        _window(controller, 1000)
+    assert controller.limit == 6
+    assert controller.rate_scale == pytest.approx(0.8)
+    assert [limit for limit, _ in changes] == [2, 3, 4, 5, 6, 6, 6]
+    # the rate scale keeps growing at the max limit, up to 1
+    for _ in range(10):
+        _window(controller, 1000)
+    assert (controller.limit, controller.rate_scale) == (6, 1.0)
+    decisions = len(controller.decisions)
+    _window(controller, 1000)
+    assert len(controller.decisions) == decisions
+
+
+def test_cuts_are_clamped_to_min():
+    controller, changes = _controller(3, min_limit=2)
+    for _ in range(6):
+        controller.record_outcome(Outcome.OVERLOADED)
+        for _ in range(controller._window() - 1):
+            controller.record_outcome(Outcome.OK)
+    assert controller.limit == 2
+    assert controller.rate_scale == 0.05
+    assert [limit for limit, _ in changes] == [2] * 5
+
+
+def test_latency_above_tolerance_backs_off():
+    controller, changes = _controller(20, max_limit=40)
+    _window(controller, 1000)
+    assert controller.limit == 21
+    # within twice the baseline
+    _window(controller, 2000)
+    assert controller.limit == 22
+    _window(controller, 3000)
+    assert controller.limit == int(22 * 0.9)
+    assert controller.decisions[-1].reason == "latency"
+    assert controller.decisions[-1].p99_us == 3
+
+
+def test_errors_hold_limit():
+    controller, changes = _controller(10, max_limit=20)
+    _window(controller, 1000, errors=2)
+    assert (controller.limit, controller.rate_scale) == (10, 1.0)
+    assert changes == []
+    assert controller.decisions[-1].reason == "errors"
+    assert controller.decisions[-1].error_rate == 0.2
+    _window(controller, 1000)
+    assert controller.limit == 11
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"initial_limit": 4, "min_limit": 5}, {"initial_limit": 4, "max_limit": 3}],
+)
+def test_invalid_limits(kwargs):
+    with pytest.raises(ValueError):
+        AimdController(**kwargs)
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import pytest
+
+from order_placer.cex.binance.clock import BnceServerClock
+from order_placer.core.mock import MockClientResponse
+
+
+class _FlakyEndpoint:
+    """/api/v3/time raising on the calls of `failing`"""
+
+    def __init__(self, failing: set[int]) -> None:
+        self.calls = 0
+        self._failing = failing
+
+    async def get_server_time(self):
+        self.calls += 1
+        if self.calls in self._failing:
+            raise RuntimeError("boom")
+        return time.monotonic_ns(), MockClientResponse(
+            "GET", "/api/v3/time", 200, {"serverTime": int(time.time() * 1000)}
+        )
+
+
+def test_refresh_survives_unexpected_sync_errors(caplog):
+    async def main():
+        clock = BnceServerClock()
+        # the first sync takes calls 1 to 5, the first refresh fails
+        await clock.start(_FlakyEndpoint({6}))
+        for _ in range(2):
+            clock.resync()
+            await asyncio.sleep(0.01)
+        await clock.stop()
+        return clock.summary()["syncs"]
+
+    assert asyncio.run(main()) == 2
+    assert "Failed to sync server clock" in caplog.text
+
+
+def test_stop_raises_error_of_the_refresh_loop():
+    async def main():
+        clock = BnceServerClock()
+        await clock.start(_FlakyEndpoint(set()))
+        # fails the refresh task itself, outside of a sync
+        clock._stale = None
+        await asyncio.sleep(0)
+        with pytest.raises(AttributeError):
+            await clock.stop()
+        # stopped all the same
+        await clock.stop()
+
+    asyncio.run(main())
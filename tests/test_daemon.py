@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import aiohttp
+
+from order_placer.cex.binance import order
+from order_placer.cex.binance.order import BnceSpotLimitOrderPlacer
+from order_placer.daemon import OrderPlacerDaemon
+
+_ACCOUNTS = {
+    1: {"api_key": "1api", "secret_key": "1secret"},
+    2: {"api_key": "2api", "secret_key": "2secret"},
+}
+_ORDERS = (
+    "Pair,Direction,Price,Quantity,Account,Value\n"
+    + "JTOUSDT,BUY,2.0000,3.722,1,7.44\n" * 3
+    + "JTOUSDT,BUY,0.0001,3.722,2,7.44\n"
+    + "JTOUSDT,SELL,2.0000,3.722,2,7.44\n" * 2
+)
+
+
+async def _submit(url: str, body: str, prefix: str) -> list[dict]:
+    async with aiohttp.ClientSession() as sess:
+        res = await sess.post(
+            f"{url}/orders",
+            params={"prefix": prefix},
+            data=body.encode(),
+            headers={"Content-Type": "text/csv"},
+        )
+        res.raise_for_status()
+        return [json.loads(line) async for line in res.content]
+
+
+def test_batches_stream_acks_and_clean_up_the_spool(tmp_path, monkeypatch):
+    # against the loopback exchange
+    monkeypatch.setenv("APP_ENV", "local")
+    monkeypatch.setattr(order, "EXCHANGE_INFO_CACHE_DIR", str(tmp_path / "cache"))
+    spool_dir = tmp_path / "spool"
+
+    async def main():
+        async with BnceSpotLimitOrderPlacer(_ACCOUNTS, None, resume=True) as placer:
+            async with OrderPlacerDaemon(placer, str(spool_dir), None, port=0) as d:
+                return await asyncio.gather(
+                    _submit(d.url, _ORDERS, "opt1-"),
+                    _submit(d.url, _ORDERS.replace("0.0001", "2.0000"), "opt2-"),
+                )
+
+    first, second = asyncio.run(main())
+
+    acks, summary = first[:-1], first[-1]
+    assert sorted(ack["row"] for ack in acks) == list(range(6))
+    assert [ack["row"] for ack in acks if ack["status"] == "failed"] == [3]
+    assert all(ack["orderId"] is not None for ack in acks if ack["status"] == "placed")
+    assert summary["done"] and summary["prefix"] == "opt1-"
+    assert (summary["placed"], summary["failed"], summary["orders"]) == (5, 1, 6)
+    assert (second[-1]["placed"], second[-1]["failed"]) == (6, 0)
+    # a batch with failures is kept to be resumed, a placed one is removed
+    assert sorted(p.name for p in spool_dir.iterdir()) == [
+        "opt1-orders.csv",
+        "opt1-orders.csv.journal",
+    ]
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from order_placer.cex.binance.exchange_info import BnceExchangeInfoCache
+from order_placer.cex.binance.mock import mock_exchange_info
+from order_placer.core.mock import MockClientResponse
+
+
+class _Endpoint:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_symbols(self):
+        self.calls += 1
+        return MockClientResponse(
+            "GET", "/api/v3/exchangeInfo", 200, mock_exchange_info()
+        )
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+@pytest.mark.parametrize("ttl_s, calls", [(3600, 1), (-1, 3)])
+def test_filters_in_memory_expire_with_ttl(tmp_path, on_disk, ttl_s, calls):
+    cache = BnceExchangeInfoCache(
+        str(tmp_path / "exchange_info.json") if on_disk else None, ttl_s
+    )
+    endpoint = _Endpoint()
+
+    async def main():
+        for _ in range(3):
+            symbols = await cache.get_symbols(endpoint)
+            assert "JTOUSDT" in symbols
+
+    asyncio.run(main())
+    assert endpoint.calls == calls
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from order_placer.core.journal import JournalState, OrderJournal
+
+
+def _write(fp: str, records: list[tuple[int, JournalState]], key: str = "key"):
+    journal = OrderJournal(fp, key)
+    for idx, state in records:
+        journal.record(idx, state)
+    journal.close()
+
+
+def test_resume_reads_the_latest_state_of_every_row(tmp_path):
+    fp = str(tmp_path / "orders.journal")
+    _write(
+        fp,
+        [
+            (0, JournalState.INTENT),
+            (2, JournalState.INTENT),
+            (0, JournalState.ACKED),
+            (2, JournalState.FAILED),
+        ],
+    )
+    journal = OrderJournal(fp, "key", resume=True)
+    journal.close()
+    assert [journal.state(i) for i in range(4)] == [
+        JournalState.ACKED,
+        JournalState.NONE,
+        JournalState.FAILED,
+        JournalState.NONE,
+    ]
+
+
+def test_resume_drops_a_torn_record_and_appends_after_the_last_whole_one(tmp_path):
+    fp = str(tmp_path / "orders.journal")
+    _write(fp, [(0, JournalState.ACKED), (1, JournalState.INTENT)])
+    size = os.path.getsize(fp)
+    with open(fp, "ab") as f:
+        # crash in the middle of writing the ack of row 1
+        f.write(b"\x01\x00\x00")
+
+    journal = OrderJournal(fp, "key", resume=True)
+    assert os.path.getsize(fp) == size
+    journal.record(1, JournalState.ACKED)
+    journal.close()
+    assert journal.state(1) == JournalState.INTENT
+
+    journal = OrderJournal(fp, "key", resume=True)
+    journal.close()
+    assert (journal.state(0), journal.state(1)) == (
+        JournalState.ACKED,
+        JournalState.ACKED,
+    )
+
+
+def test_resume_from_the_journal_of_another_file_raises(tmp_path):
+    fp = str(tmp_path / "orders.journal")
+    _write(fp, [(0, JournalState.ACKED)])
+    with pytest.raises(ValueError):
+        OrderJournal(fp, "other", resume=True)
@@ -0,0 +1,143 @@
+import random
+import re
+
+import pytest
+
+from order_placer.core.metrics import (
+    ALL_LABEL,
+    LatencyHistogram,
+    LatencyRecorder,
+    _bucket_index,
+    _bucket_value,
+)
+
+
+def _histogram(values) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+def _exact(values: list[int], p: float) -> int:
+    values = sorted(values)
+    return values[max(1, round(len(values) * p / 100)) - 1]
+
+
+def test_buckets_cover_values():
+    rng = random.Random(0)
+    for value in [*range(1000), *(rng.getrandbits(39) for _ in range(1000))]:
+        idx = _bucket_index(value)
+        assert value <= _bucket_value(idx) <= value * 1.016
+        assert idx == 0 or _bucket_value(idx - 1) < value
+
+
+def test_small_values_are_exact():
+    histogram = _histogram(range(1, 101))
+    assert histogram.summary() == {
+        "count": 100,
+        "p50_us": 50,
+        "p90_us": 90,
+        "p99_us": 99,
+        "max_us": 100,
+    }
+    assert histogram.sum_us == 5050
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        list(range(1, 100001)),
+        [int(random.Random(1).lognormvariate(8, 1.5)) for _ in range(20000)],
+        [int(random.Random(2).expovariate(1 / 5000)) for _ in range(20000)],
+    ],
+)
+def test_percentiles_within_bucket_error(values):
+    histogram = _histogram(values)
+    for p in (1, 50, 90, 99, 99.9):
+        exact = _exact(values, p)
+        assert exact <= histogram.percentile(p) <= exact * 1.016
+    assert histogram.percentile(100) == max(values)
+
+
+def test_empty_and_out_of_range():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0
+    # clamped into the last bucket, the max is kept
+    histogram.record(1 << 45)
+    assert 1 << 39 < histogram.percentile(99) < 1 << 41
+    assert histogram.max_us == 1 << 45
+
+
+def test_merge_equals_recording_all():
+    values = [int(random.Random(3).paretovariate(1.2) * 100) for _ in range(10000)]
+    merged = _histogram(values[:3000])
+    merged.merge(_histogram(values[3000:]))
+    histogram = _histogram(values)
+    assert merged._counts == histogram._counts
+    assert merged.summary() == histogram.summary()
+    assert merged.sum_us == histogram.sum_us
+
+
+def test_recorders_merge_across_shards():
+    shards = []
+    for account in ("1", "2"):
+        recorder = LatencyRecorder()
+        for value_us in range(1, 101):
+            recorder.record("post", account, value_us * 1000)
+        recorder.record("sign", account, 5000000)
+        shards.append(recorder)
+    merged = LatencyRecorder()
+    for recorder in shards:
+        merged.merge(recorder)
+    summary = merged.summary()
+    assert set(summary["post"]) == {ALL_LABEL, "1", "2"}
+    assert summary["post"]["1"]["p90_us"] == 90
+    assert summary["post"][ALL_LABEL]["count"] == 200
+    assert summary["post"][ALL_LABEL]["p50_us"] == 50
+    assert summary["sign"][ALL_LABEL] == {
+        "count": 2,
+        "p50_us": 5000,
+        "p90_us": 5000,
+        "p99_us": 5000,
+        "max_us": 5000,
+    }
+
+
+# name{label="value",...} value
+_SAMPLE = re.compile(
+    r"^([a-zA-Z_:][a-zA-Z0-9_:]*)\{((?:[a-zA-Z_]\w*=\"[^\"]*\",?)*)\} (\S+)$"
+)
+
+
+def test_prometheus_exposition():
+    recorder = LatencyRecorder()
+    for value_us in range(1, 101):
+        recorder.record("post", "1", value_us * 1000)
+    text = recorder.to_prometheus()
+    assert text.endswith("\n")
+    samples = {}
+    types = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            types[name] = kind
+            continue
+        if line.startswith("# HELP "):
+            continue
+        match = _SAMPLE.match(line)
+        assert match, line
+        name, labels, value = match.groups()
+        samples[name, labels] = float(value)
+    assert types == {
+        "order_placer_stage_latency_seconds": "summary",
+        "order_placer_stage_latency_max_seconds": "gauge",
+    }
+    name = "order_placer_stage_latency_seconds"
+    for label in ("1", ALL_LABEL):
+        labels = f'stage="post",account="{label}"'
+        assert samples[name, f'{labels},quantile="0.5"'] == 50e-6
+        assert samples[name, f'{labels},quantile="0.99"'] == 99e-6
+        assert samples[f"{name}_sum", labels] == 5050e-6
+        assert samples[f"{name}_count", labels] == 100
+        assert samples["order_placer_stage_latency_max_seconds", labels] == 100e-6
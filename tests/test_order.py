@@ -0,0 +1,258 @@
+import random
+
+import pytest
+
+from order_placer.cex.binance.clock import BnceServerClock
+from order_placer.cex.binance.mock import mock_exchange_info
+from order_placer.cex.binance.order import (
+    _FATAL,
+    _PLACED,
+    _RETRY,
+    _UNKNOWN,
+    BnceOrderError,
+    BnceSpotLimitOrderPlacer,
+    _classify,
+)
+from order_placer.cex.binance.order_source import CsvOrderSource
+from order_placer.cex.binance.response import BnceOrderAck
+from order_placer.cex.binance.simulator import (
+    _loop_time_ns,
+    _SimulatedBnceEndpoint,
+    _SimulatedBnceExchange,
+)
+from order_placer.core.mock import MockClientResponse
+from order_placer.core.retry import RetryPolicy
+from order_placer.core.virtual_time import run_virtual
+
+_ACK = {"symbol": "ETHBTC", "orderId": 7, "clientOrderId": "op-1"}
+
+
+@pytest.mark.parametrize(
+    "status, data, outcome",
+    [
+        (200, BnceOrderAck(7, "op-1"), _PLACED),
+        (400, {"code": -2010, "msg": "Duplicate order sent."}, _UNKNOWN),
+        (400, {"code": -2010, "msg": "Account has insufficient balance."}, _FATAL),
+        (503, None, _UNKNOWN),
+        (400, {"code": -1007, "msg": "Timeout waiting for response."}, _UNKNOWN),
+        (429, {"code": -1003, "msg": "Too many requests."}, _RETRY),
+        (400, {"code": -1021, "msg": "Timestamp outside of recvWindow."}, _RETRY),
+        (400, {"code": -1013, "msg": "Filter failure: LOT_SIZE"}, _FATAL),
+        (418, {"code": -1003, "msg": "Way too many requests."}, _RETRY),
+    ],
+)
+def test_classify(status, data, outcome):
+    assert _classify(status, data) == outcome
+
+
+def _response(status: int, data: dict | None) -> MockClientResponse:
+    return MockClientResponse("POST", "/api/v3/order", status, data)
+
+
+class _ScriptedEndpoint:
+    """Answers order posts with `responses` in turn (exceptions are raised),
+    the order is known to the exchange once `known_after` posts were sent"""
+
+    def __init__(self, responses: list, known_after: int | None = None) -> None:
+        self._responses = list(responses)
+        self._known_after = known_after
+        self.posts = 0
+        self.queries = 0
+
+    async def post_prepared_order(self, prepared):
+        self.posts += 1
+        response = self._responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def get_order(self, symbol: str, client_order_id: str):
+        self.queries += 1
+        if self._known_after is not None and self.posts >= self._known_after:
+            return MockClientResponse("GET", "/api/v3/order", 200, _ACK)
+        return MockClientResponse(
+            "GET", "/api/v3/order", 400, {"code": -2013, "msg": "Order does not exist."}
+        )
+
+
+def _place(endpoint: _ScriptedEndpoint, max_attempts: int = 5):
+    async def main():
+        placer = BnceSpotLimitOrderPlacer(
+            {}, None, retry_policy=RetryPolicy(max_attempts, seed=0)
+        )
+        return await placer._place_order(endpoint, "ETHBTC", "op-1", None)
+
+    return run_virtual(main())
+
+
+@pytest.fixture(autouse=True)
+def _no_session(monkeypatch):
+    # the local env only opens a session when entered
+    monkeypatch.setenv("APP_ENV", "local")
+
+
+def test_retries_after_429():
+    endpoint = _ScriptedEndpoint(
+        [_response(429, {"code": -1003, "msg": "Too many requests."}), _response(200, _ACK)]
+    )
+    data = _place(endpoint)
+    assert (data.order_id, endpoint.posts, endpoint.queries) == (7, 2, 0)
+
+
+def test_unknown_outcome_resolved_by_query():
+    endpoint = _ScriptedEndpoint([_response(503, None)], known_after=1)
+    data = _place(endpoint)
+    assert (data.order_id, endpoint.posts, endpoint.queries) == (7, 1, 1)
+
+
+def test_unknown_outcome_not_placed_is_sent_again():
+    endpoint = _ScriptedEndpoint([ConnectionResetError(), _response(200, _ACK)])
+    data = _place(endpoint)
+    assert (data.order_id, endpoint.posts, endpoint.queries) == (7, 2, 1)
+
+
+def test_fatal_error_is_not_retried():
+    endpoint = _ScriptedEndpoint(
+        [_response(400, {"code": -1013, "msg": "Filter failure: LOT_SIZE"})]
+    )
+    with pytest.raises(BnceOrderError, match="-1013"):
+        _place(endpoint)
+    assert endpoint.posts == 1
+
+
+def test_gives_up_after_max_attempts():
+    endpoint = _ScriptedEndpoint([_response(429, None)] * 3)
+    with pytest.raises(BnceOrderError, match="Gave up after 3 attempts"):
+        _place(endpoint, max_attempts=3)
+    assert (endpoint.posts, endpoint.queries) == (3, 0)
+
+
+_ACCOUNTS = {
+    1: {"api_key": "1api", "secret_key": "1secret"},
+    2: {"api_key": "2api", "secret_key": "2secret"},
+}
+_HEADER = "Pair,Direction,Price,Quantity,Account,Value\n"
+
+
+class _CancelRecordingEndpoint(_SimulatedBnceEndpoint):
+    def __init__(self, cancels: list, *args) -> None:
+        super().__init__(*args)
+        self._cancels = cancels
+
+    async def cancel_open_orders(self, symbol: str):
+        self._cancels.append((self._api_key, symbol))
+        return await super().cancel_open_orders(symbol)
+
+
+def _run(action, **placer_kwargs) -> tuple[object, list[tuple[str, str]]]:
+    """Outcome of `action(placer)` against a simulated exchange (the
+    exception if it raised) and the DELETE /api/v3/openOrders it sent"""
+    cancels = []
+
+    async def main():
+        exchange = _SimulatedBnceExchange(
+            None, mock_exchange_info(), 0.01, 0.0, 0.0, random.Random(0)
+        )
+        async with BnceSpotLimitOrderPlacer(
+            _ACCOUNTS,
+            None,
+            clock=BnceServerClock(
+                monotonic_ns=_loop_time_ns, time_ns=lambda: int(exchange.now_s() * 1e9)
+            ),
+            endpoint_factory=lambda api_key, secret_key, rate_limiter, latency: (
+                _CancelRecordingEndpoint(
+                    cancels, exchange, api_key, rate_limiter, latency, {}
+                )
+            ),
+            reconcile=False,
+            **placer_kwargs,
+        ) as placer:
+            try:
+                return await action(placer)
+            except Exception as e:
+                return e
+
+    return run_virtual(main()), cancels
+
+
+def test_invalid_priority_fails_only_its_row(tmp_path):
+    orders_fp = tmp_path / "orders.csv"
+    orders_fp.write_text(
+        _HEADER
+        + "JTOUSDT,BUY,2.0000,3.722,1,7.44\n" * 5
+        + "JTOUSDT,BUY,2.0000,3.722,1,abc\n"
+        + "JTOUSDT,BUY,2.0000,3.722,2,7.44\n" * 5
+    )
+    failed = []
+    result, cancels = _run(
+        lambda placer: placer.execute(
+            str(orders_fp),
+            on_order=lambda order, data, error: error and failed.append(
+                (order.idx, error)
+            ),
+        ),
+        priority_column="Value",
+    )
+    assert (result.placed, result.failed, result.norders) == (10, 1, 11)
+    assert failed == [(5, "Invalid priority: abc")]
+    assert result.cancelled is None and cancels == []
+
+
+class _BrokenSource(CsvOrderSource):
+    def chunks(self):
+        yield from super().chunks()
+        raise OSError("disk gone")
+
+
+def test_reader_error_stops_without_cancelling(tmp_path):
+    orders_fp = tmp_path / "orders.csv"
+    orders_fp.write_text(_HEADER + "JTOUSDT,BUY,2.0000,3.722,1,7.44\n" * 5)
+    error, cancels = _run(lambda placer: placer.execute(_BrokenSource(str(orders_fp))))
+    assert isinstance(error, OSError)
+    assert cancels == []
+
+
+def test_unreadable_ndjson_line_fails_only_its_row(tmp_path):
+    orders_fp = tmp_path / "orders.ndjson"
+    line = (
+        '{"Pair": "JTOUSDT", "Direction": "BUY", "Price": "2.0000",'
+        ' "Quantity": "3.722", "Account": 1}\n'
+    )
+    orders_fp.write_text(line * 3 + "{not json\n" + line * 3)
+    failed = []
+    result, cancels = _run(
+        lambda placer: placer.execute(
+            str(orders_fp),
+            on_order=lambda order, data, error: error and failed.append(order.idx),
+        )
+    )
+    assert (result.placed, result.failed, result.norders) == (6, 1, 7)
+    assert failed == [3]
+    assert cancels == []
+
+
+@pytest.mark.parametrize(
+    "account_filter, expected",
+    [
+        (None, {("1api", "JTOUSDT"), ("1api", "ETHBTC"), ("2api", "JTOUSDT")}),
+        (frozenset({2}), {("2api", "JTOUSDT")}),
+    ],
+)
+def test_cancel_all_cancels_each_account_and_symbol_once(
+    tmp_path, account_filter, expected
+):
+    orders_fp = tmp_path / "orders.csv"
+    orders_fp.write_text(
+        _HEADER
+        + "JTOUSDT,BUY,2.0000,3.722,1,1\n" * 3
+        + "ETHBTC,SELL,0.05,0.01,1,1\n"
+        + "JTOUSDT,BUY,2.0000,3.722,2,1\n"
+        + "JTOUSDT,BUY,2.0000,3.722,9,1\n"
+        + "XRPUSDT,BUY,2.0000,3.722,x,1\n"
+        + "XRPUSDT,BUY,2.0000,3.722,,1\n"
+    )
+    result, cancels = _run(
+        lambda placer: placer.cancel_all(str(orders_fp)), account_filter=account_filter
+    )
+    assert not isinstance(result, Exception)
+    assert sorted(cancels) == sorted(expected)
@@ -0,0 +1,115 @@
+import csv
+
+import pytest
+
+from order_placer.cex.binance import order_source
+from order_placer.cex.binance.order_source import (
+    CsvOrderSource,
+    NdjsonOrderSource,
+    OrderSource,
+)
+from order_placer.cex.binance.validation import ORDER_COLUMNS
+
+_HEADER = "Pair,Direction,Price,Quantity,Account,Value"
+
+
+def _expected(fp) -> list[tuple]:
+    with open(fp, newline="") as f:
+        rows = [row for row in csv.DictReader(f) if any(row.values())]
+    # short rows have empty values
+    return [
+        (
+            i,
+            *(row[name] or "" for name in ORDER_COLUMNS + ("Value",)),
+        )
+        for i, row in enumerate(rows)
+    ]
+
+
+def _read(fp) -> list[tuple]:
+    return [row for chunk in CsvOrderSource(str(fp), "Value").chunks() for row in chunk]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(order_source, "_CHUNK_BYTES", 64)
+
+
+def test_plain_csv_rows(tmp_path):
+    fp = tmp_path / "orders.csv"
+    lines = [f"JTOUSDT,BUY,2.{i:04d},3.5,{i % 3 + 1},{i}.5" for i in range(40)]
+    lines.insert(10, "")
+    lines.insert(20, "JTOUSDT,SELL,2.0,3")
+    fp.write_text("\r\n".join([_HEADER, *lines]))
+    assert _read(fp) == _expected(fp)
+
+
+def test_quotes_after_plain_chunks(tmp_path):
+    fp = tmp_path / "orders.csv"
+    lines = [f"JTOUSDT,BUY,2.{i:04d},3.5,1,{i}" for i in range(20)]
+    lines += [
+        '"JTOUSDT","SELL","2.5","1,5","2","1"',
+        'JTOUSDT,"BUY\nNOW",2.5,1.5,2,',
+        *(f"JTOUSDT,BUY,2.{i:04d},3.5,3,{i}" for i in range(20)),
+    ]
+    fp.write_text("\n".join([_HEADER, *lines]) + "\n")
+    rows = _read(fp)
+    assert rows == _expected(fp)
+    assert rows[21][2] == "BUY\nNOW"
+
+
+def test_quoted_header(tmp_path):
+    fp = tmp_path / "orders.csv"
+    fp.write_text(
+        '"Pair","Direction","Price","Quantity","Account","Value"\n'
+        "JTOUSDT,BUY,2.0,3.5,1,1\n"
+    )
+    assert _read(fp) == [(0, "JTOUSDT", "BUY", "2.0", "3.5", "1", "1")]
+
+
+def test_order_source_is_abstract():
+    with pytest.raises(TypeError):
+        OrderSource(None)
+
+
+def test_bad_csv_cells_are_handed_out_as_read(tmp_path):
+    fp = tmp_path / "orders.csv"
+    fp.write_text(
+        _HEADER
+        + "\nJTOUSDT,BUY,2.0,3.5,1,abc"
+        + "\nJTOUSDT,BUY,x,3.5,one,1"
+        + "\nJTOUSDT,BUY"
+    )
+    assert _read(fp) == [
+        (0, "JTOUSDT", "BUY", "2.0", "3.5", "1", "abc"),
+        (1, "JTOUSDT", "BUY", "x", "3.5", "one", "1"),
+        (2, "JTOUSDT", "BUY", "", "", "", ""),
+    ]
+
+
+def test_bad_ndjson_lines_are_unreadable_rows(tmp_path):
+    fp = tmp_path / "orders.ndjson"
+    fp.write_text(
+        '{"Pair": "JTOUSDT", "Direction": "BUY", "Price": "2.0", "Quantity": "3.5",'
+        ' "Account": 1, "Value": 2}\n'
+        '{"Pair": "JTOUSDT", "Direction": "BUY", "Price": \n'
+        '{"Pair": "JTOUSDT", "Direction": "BUY", "Price": "2.0", "Account": 2}\n'
+        "[1, 2]\n"
+        "\n"
+        '{"Pair": "JTOUSDT", "Direction": "SELL", "Price": 2.5, "Quantity": 1,'
+        ' "Account": 3}\n'
+    )
+    rows = [
+        row
+        for chunk in NdjsonOrderSource(str(fp), priority_column="Value").chunks()
+        for row in chunk
+    ]
+    assert [row[0] for row in rows] == [0, 1, 2, 3, 4]
+    assert rows[0] == (0, "JTOUSDT", "BUY", "2.0", "3.5", 1, 2)
+    assert rows[4] == (4, "JTOUSDT", "SELL", "2.5", "1", 3, None)
+    for row in rows[1:4]:
+        assert isinstance(row[6], ValueError)
+        assert str(row[6]).startswith("Unreadable row.")
+    # values read before the error are kept, the account routes the row
+    assert rows[2][1:6] == ("JTOUSDT", "BUY", "2.0", "", "2")
+    assert "KeyError" in str(rows[2][6])
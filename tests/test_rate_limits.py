@@ -0,0 +1,89 @@
+import asyncio
+
+from order_placer.cex.binance.rate_limits import (
+    BNCE_DEFAULT_RATE_LIMITS,
+    BnceRateLimiter,
+    RateLimitScope,
+    make_buckets,
+)
+from order_placer.cex.core.throttler import SUSPENDED, _now
+from order_placer.core.virtual_time import run_virtual
+
+
+async def _order_times(rate_limiter: BnceRateLimiter, n: int) -> list[float]:
+    start = _now()
+    times = []
+
+    async def _acquire():
+        await rate_limiter.acquire("POST /api/v3/order")
+        times.append(round(_now() - start, 6))
+
+    await asyncio.gather(*(_acquire() for _ in range(n)))
+    return times
+
+
+def test_default_limits_admit_at_most_100_orders_per_10s_window():
+    async def main():
+        rate_limiter = BnceRateLimiter.from_rate_limits()
+        rate_limiter.align(0.0)
+        return await _order_times(rate_limiter, 350)
+
+    times = run_virtual(main())
+    per_window = [sum(1 for t in times if w * 10 <= t < (w + 1) * 10) for w in range(4)]
+    assert per_window == [100, 100, 100, 50]
+
+
+def _sharing_ip() -> tuple[BnceRateLimiter, BnceRateLimiter]:
+    ip_buckets = make_buckets(BNCE_DEFAULT_RATE_LIMITS, RateLimitScope.IP)
+    return (
+        BnceRateLimiter.from_rate_limits(None, ip_buckets),
+        BnceRateLimiter.from_rate_limits(None, ip_buckets),
+    )
+
+
+def test_429_suspends_every_account():
+    async def main():
+        first, other = _sharing_ip()
+        first.update(429, {"Retry-After": "7"})
+        times = await _order_times(other, 1)
+        return times, other.throttler.binding
+
+    assert run_virtual(main()) == ([7.0], SUSPENDED)
+
+
+def test_418_suspends_every_account():
+    async def main():
+        first, other = _sharing_ip()
+        first.update(418, {"Retry-After": "120"})
+        return await _order_times(other, 1)
+
+    assert run_virtual(main()) == [120.0]
+
+
+def test_429_on_order_count_only_suspends_the_account():
+    async def main():
+        first, other = _sharing_ip()
+        first.align(1.0)
+        first.update(
+            429,
+            {
+                "Retry-After": "3",
+                "X-MBX-USED-WEIGHT-1M": "10",
+                "X-MBX-ORDER-COUNT-10S": "101",
+            },
+        )
+        return await _order_times(other, 1), await _order_times(first, 1)
+
+    # the account's order count is spent until its window ends
+    assert run_virtual(main()) == ([0], [9.0])
+
+
+def test_used_weight_over_the_limit_holds_requests_until_the_window_ends():
+    async def main():
+        first, other = _sharing_ip()
+        first.align(30.0)
+        other.align(30.0)
+        first.update(200, {"X-MBX-USED-WEIGHT-1M": "6000"})
+        return await _order_times(other, 1)
+
+    assert run_virtual(main()) == [30.0]
@@ -0,0 +1,100 @@
+from order_placer.cex.binance.exchange_info import BnceSymbolFilters
+from order_placer.cex.binance.mock import mock_exchange_info
+from order_placer.cex.binance.order_store import BnceOrderParser
+from order_placer.cex.binance.reconcile import BnceOrderReconciler
+
+_PARSER = BnceOrderParser(
+    {
+        info["symbol"]: BnceSymbolFilters(info)
+        for info in mock_exchange_info()["symbols"]
+    }
+)
+
+
+def _order(idx: int, account: int = 1, symbol: str = "JTOUSDT"):
+    return _PARSER.parse(idx, symbol, "BUY", "1.1", "10", account)
+
+
+def _data(idx: int, order_id: int, symbol: str = "JTOUSDT", **fields) -> dict:
+    return {
+        "symbol": symbol,
+        "orderId": order_id,
+        "clientOrderId": f"op-{idx}",
+        "side": "BUY",
+        "price": "1.10000000",
+        "origQty": "10.00000000",
+        "status": "NEW",
+        **fields,
+    }
+
+
+def test_clean_execution_matches():
+    reconciler = BnceOrderReconciler("op-")
+    for idx in range(3):
+        reconciler.placed(_order(idx), 100 + idx)
+    exchange_orders = {(1, "JTOUSDT"): [_data(idx, 100 + idx) for idx in range(3)]}
+    # the order of the exchange without the trailing zeros of the file
+    exchange_orders[(1, "JTOUSDT")][0]["price"] = "1.10"
+    report = reconciler.reconcile(
+        exchange_orders, {(1, "JTOUSDT"): exchange_orders[(1, "JTOUSDT")][:2]}
+    )
+    assert (report.checked, report.matched, report.open) == (3, 3, 2)
+    assert report.ok
+
+
+def test_discrepancies():
+    reconciler = BnceOrderReconciler("op-")
+    for idx in range(5):
+        reconciler.placed(_order(idx), 100 + idx)
+    # order id of the ack unknown, any id matches
+    reconciler.placed(_order(5), None)
+    reconciler.placed(_order(6, account=2, symbol="ETHBTC"), 106)
+    reconciler.placed(_order(7), 107)
+    reconciler.skipped(9)
+    exchange_orders = {
+        (1, "JTOUSDT"): [
+            _data(0, 100),
+            # 1 is missing
+            _data(2, 102),
+            _data(2, 202),
+            _data(3, 103, price="1.2"),
+            _data(4, 999),
+            _data(5, 105),
+            _data(8, 108),
+            _data(9, 109),
+            _data(10, 110),
+            _data(10, 210),
+            # of other clients
+            {"symbol": "JTOUSDT", "orderId": 1, "clientOrderId": "web_1"},
+            {"symbol": "JTOUSDT", "orderId": 2, "clientOrderId": "op-x"},
+            {"symbol": "JTOUSDT", "orderId": 3},
+        ],
+        # listed for another account than it was placed for
+        (2, "JTOUSDT"): [_data(7, 107)],
+    }
+    report = reconciler.reconcile(
+        exchange_orders,
+        {(1, "JTOUSDT"): [_data(5, 105)]},
+        unchecked={(2, "ETHBTC")},
+    )
+    assert report.checked == 11
+    assert (report.matched, report.open) == (2, 1)
+    assert report.missing == ["op-1"]
+    assert report.duplicates == ["op-2", "op-10"]
+    assert report.mismatched == ["op-3", "op-4", "op-7"]
+    assert report.unexpected == ["op-8", "op-10"]
+    assert report.unchecked == 1
+    assert not report.ok
+
+
+def test_merge():
+    reconciler = BnceOrderReconciler("op-")
+    reconciler.placed(_order(0), 100)
+    reconciler.placed(_order(1), 101)
+    report = reconciler.reconcile({(1, "JTOUSDT"): [_data(0, 100)]}, {})
+    other = BnceOrderReconciler("op-").reconcile(
+        {(1, "JTOUSDT"): [_data(5, 105)]}, {}, set()
+    )
+    report.merge(other)
+    assert (report.checked, report.matched) == (2, 1)
+    assert (report.missing, report.unexpected) == (["op-1"], ["op-5"])
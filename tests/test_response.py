@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+
+from order_placer.cex.binance.response import BnceOrderAck, read_order_response
+from order_placer.core.mock import MockClientResponse
+
+# newOrderRespType ACK and RESULT bodies as documented for POST /api/v3/order
+_ACK = {
+    "symbol": "BTCUSDT",
+    "orderId": 28,
+    "orderListId": -1,
+    "clientOrderId": "6gCrw2kRUAF9CvJDGP16IP",
+    "transactTime": 1507725176595,
+}
+_RESULT = {
+    **_ACK,
+    "price": "0.00000000",
+    "origQty": "10.00000000",
+    "executedQty": "10.00000000",
+    "origQuoteOrderQty": "0.000000",
+    "cummulativeQuoteQty": "10.00000000",
+    "status": "FILLED",
+    "timeInForce": "GTC",
+    "type": "MARKET",
+    "side": "SELL",
+    "workingTime": 1507725176595,
+    "selfTradePreventionMode": "NONE",
+}
+_ERROR = {
+    "code": -2010,
+    "msg": "Account has insufficient balance for requested action.",
+}
+
+
+class _Response(MockClientResponse):
+    """Rest response with a raw body, counts releases"""
+
+    def __init__(self, status: int, body: bytes | Exception) -> None:
+        super().__init__("POST", "/api/v3/order", status, None)
+        self._body = body
+        self.released = 0
+
+    async def read(self) -> bytes:
+        if isinstance(self._body, Exception):
+            raise self._body
+        return self._body
+
+    def release(self):
+        self.released += 1
+
+
+class _WsResponse:
+    def __init__(self, status: int, data) -> None:
+        self.status = status
+        self._data = data
+
+    async def json(self):
+        return self._data
+
+
+def _read(res):
+    return asyncio.run(read_order_response(res))
+
+
+@pytest.mark.parametrize(
+    "body, status",
+    [(_ACK, None), (_RESULT, "FILLED"), ({**_RESULT, "status": "NEW"}, "NEW")],
+)
+def test_acks(body, status):
+    for res in (_Response(200, json.dumps(body).encode()), _WsResponse(200, body)):
+        ack = _read(res)
+        assert isinstance(ack, BnceOrderAck)
+        assert (ack.order_id, ack.client_order_id, ack.status) == (
+            28,
+            "6gCrw2kRUAF9CvJDGP16IP",
+            status,
+        )
+        if isinstance(res, _Response):
+            assert res.released == 1
+
+
+@pytest.mark.parametrize("status", [400, 200])
+def test_error_bodies(status):
+    # an error code is never an ack, whatever the status
+    res = _Response(status, json.dumps(_ERROR).encode())
+    assert _read(res) == _ERROR
+    assert res.released == 1
+    assert _read(_WsResponse(status, _ERROR)) == _ERROR
+
+
+def test_non_ack_bodies_are_returned_as_read():
+    res = _Response(503, json.dumps(_ACK).encode())
+    assert _read(res) == _ACK
+    assert _read(_Response(200, b"[]")) == []
+
+
+@pytest.mark.parametrize(
+    "body", [b"", b"<html><body>502 Bad Gateway</body></html>", b'{"orderId": 2']
+)
+def test_unparsable_body_is_released(body):
+    res = _Response(502, body)
+    assert _read(res) is None
+    assert res.released == 1
+
+
+def test_failed_read_is_released():
+    res = _Response(200, aiohttp.ClientPayloadError("connection lost"))
+    with pytest.raises(aiohttp.ClientPayloadError):
+        _read(res)
+    assert res.released == 1
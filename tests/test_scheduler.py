@@ -0,0 +1,106 @@
+import asyncio
+
+from order_placer.core.scheduler import FairScheduler
+from order_placer.core.virtual_time import run_virtual
+
+
+async def _drain(scheduler: FairScheduler, n: int) -> list[tuple]:
+    """First `n` (key, item) handed out, each done right away"""
+    served = []
+    for _ in range(n):
+        key, item = await scheduler.get()
+        scheduler.done(key)
+        served.append((key, item))
+    return served
+
+
+def test_keys_are_served_in_proportion_to_their_weights():
+    async def main():
+        scheduler = FairScheduler(["a", "b"], 100, 1, weights={"a": 2})
+        for i in range(30):
+            await scheduler.put("a", i)
+            await scheduler.put("b", i)
+        return [key for key, _ in await _drain(scheduler, 30)]
+
+    served = run_virtual(main())
+    assert (served.count("a"), served.count("b")) == (20, 10)
+
+
+def test_highest_priority_goes_first_then_insertion_order():
+    async def main():
+        scheduler = FairScheduler(["a", "b"], 100, 1)
+        await scheduler.put("a", "a0")
+        await scheduler.put("a", "a1", priority=5)
+        await scheduler.put("a", "a2")
+        await scheduler.put("b", "b0", priority=3)
+        return [item for _, item in await _drain(scheduler, 4)]
+
+    assert run_virtual(main()) == ["a1", "b0", "a0", "a2"]
+
+
+def test_key_ready_soonest_goes_first():
+    async def main():
+        wait_s = {"a": 2.0, "b": 0.5}
+        scheduler = FairScheduler(["a", "b"], 100, 1, wait_s=wait_s.get)
+        await scheduler.put("a", "a0", priority=10)
+        await scheduler.put("b", "b0")
+        return [item for _, item in await _drain(scheduler, 2)]
+
+    assert run_virtual(main()) == ["b0", "a0"]
+
+
+def test_key_at_max_inflight_waits_for_done():
+    async def main():
+        scheduler = FairScheduler(["a", "b"], 100, 1)
+        await scheduler.put("a", "a0")
+        await scheduler.put("a", "a1")
+        await scheduler.put("b", "b0")
+        first = await scheduler.get()
+        second = await scheduler.get()
+        blocked = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(1)
+        was_blocked = not blocked.done()
+        scheduler.done("a")
+        return first, second, was_blocked, await blocked
+
+    assert run_virtual(main()) == (("a", "a0"), ("b", "b0"), True, ("a", "a1"))
+
+
+def test_raising_max_inflight_wakes_waiting_consumers():
+    async def main():
+        scheduler = FairScheduler(["a"], 100, 1)
+        await scheduler.put("a", "a0")
+        await scheduler.put("a", "a1")
+        await scheduler.get()
+        blocked = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(0)
+        scheduler.set_max_inflight(2)
+        return await blocked
+
+    assert run_virtual(main()) == ("a", "a1")
+
+
+def test_put_waits_while_full():
+    async def main():
+        scheduler = FairScheduler(["a"], 2, 10)
+        await scheduler.put("a", 0)
+        await scheduler.put("a", 1)
+        put = asyncio.create_task(scheduler.put("a", 2))
+        await asyncio.sleep(1)
+        was_blocked = not put.done()
+        await scheduler.get()
+        await put
+        return was_blocked, len(scheduler)
+
+    assert run_virtual(main()) == (True, 2)
+
+
+def test_close_ends_every_consumer_once_drained():
+    async def main():
+        scheduler = FairScheduler(["a"], 10, 10)
+        consumers = [asyncio.create_task(scheduler.get()) for _ in range(3)]
+        await scheduler.put("a", "a0")
+        scheduler.close()
+        return await asyncio.gather(*consumers)
+
+    assert run_virtual(main()) == [("a", "a0"), None, None]
@@ -0,0 +1,16 @@
+from order_placer.cex.binance.simulator import BnceSimulator
+
+_ACCOUNTS = {1: {"api_key": "1api", "secret_key": "1secret"}}
+
+
+def test_projects_the_order_count_limit(tmp_path):
+    orders_fp = tmp_path / "orders.csv"
+    orders_fp.write_text(
+        "Pair,Direction,Price,Quantity,Account,Value\n"
+        + "JTOUSDT,BUY,2.0000,3.722,1,7.44\n" * 250
+    )
+    result = BnceSimulator(_ACCOUNTS, str(orders_fp), inflight_window=300).run()
+    assert (result.placed, result.norders) == (250, 250)
+    # 100 orders per 10 s window, the first one partly gone
+    assert 10 < result.makespan_s < 30
+    assert "ORDERS_10S" in result.bottlenecks
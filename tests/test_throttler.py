@@ -0,0 +1,238 @@
+import asyncio
+
+import pytest
+
+from order_placer.cex.core.throttler import (
+    SUSPENDED,
+    AsyncThrottler,
+    CompositeThrottler,
+    FixedWindowThrottler,
+    SharedFixedWindowThrottler,
+    _now,
+)
+from order_placer.core.virtual_time import run_virtual
+
+
+async def _timed(start: float, aw) -> float:
+    """Seconds from `start` until `aw` is done"""
+    await aw
+    return round(_now() - start, 6)
+
+
+def test_waiters_are_served_in_arrival_order():
+    async def main():
+        throttler = AsyncThrottler(10, 10)
+        await throttler.acquire(10)
+        start = _now()
+        served = []
+
+        async def acquire(i: int, weight: int):
+            await throttler.acquire(weight)
+            served.append((i, round(_now() - start, 6)))
+
+        # the 1 behind the 10 does not get ahead of it
+        await asyncio.gather(*(acquire(i, w) for i, w in enumerate([5, 1, 10, 1])))
+        return served
+
+    assert run_virtual(main()) == [(0, 0.5), (1, 0.6), (2, 1.6), (3, 1.7)]
+
+
+def test_cancelled_head_waiter_does_not_block_the_queue():
+    async def main():
+        throttler = AsyncThrottler(1, 1)
+        await throttler.acquire()
+        start = _now()
+        head = asyncio.create_task(throttler.acquire())
+        behind = asyncio.create_task(_timed(start, throttler.acquire()))
+        await asyncio.sleep(0.5)
+        head.cancel()
+        return await behind, throttler.waiters
+
+    assert run_virtual(main()) == (1.0, 0)
+
+
+def test_weight_above_bucket_size_raises():
+    async def main():
+        await AsyncThrottler(5, 1).acquire(6)
+
+    with pytest.raises(ValueError):
+        run_virtual(main())
+
+
+def test_reserved_tokens_are_left_to_priority_acquisitions():
+    async def main():
+        bucket = AsyncThrottler(10, 1)
+        bucket.reserve(4)
+        throttler = CompositeThrottler({"ip": bucket})
+        start = _now()
+        await throttler.acquire({"ip": 6})
+        # 4 tokens left, all reserved
+        priority = await _timed(start, throttler.acquire_priority({"ip": 4}))
+        normal = await _timed(start, throttler.acquire({"ip": 1}))
+        return priority, normal
+
+    # 1 token plus the 4 reserved ones take 5 s to refill
+    assert run_virtual(main()) == (0, 5.0)
+
+
+def test_priority_acquisition_goes_ahead_of_queued_waiters():
+    async def main():
+        throttler = CompositeThrottler({"ip": AsyncThrottler(10, 10)})
+        await throttler.acquire({"ip": 10})
+        start = _now()
+        queued = asyncio.create_task(_timed(start, throttler.acquire({"ip": 10})))
+        await asyncio.sleep(0)
+        priority = await _timed(start, throttler.acquire_priority({"ip": 1}))
+        return priority, await queued
+
+    assert run_virtual(main()) == (0.1, 1.1)
+
+
+def test_set_refill_rate_keeps_tokens_refilled_so_far():
+    async def main():
+        throttler = AsyncThrottler(10, 10)
+        await throttler.acquire(10)
+        start = _now()
+        await asyncio.sleep(0.5)
+        throttler.set_refill_rate(1)
+        return await _timed(start, throttler.acquire(10))
+
+    # 5 tokens at 10/s, the other 5 at 1/s
+    assert run_virtual(main()) == 5.5
+
+
+def test_composite_never_holds_tokens_while_waiting_on_another_bucket():
+    async def main():
+        a, b = AsyncThrottler(1, 1), AsyncThrottler(1, 1)
+        first = CompositeThrottler({"a": a, "b": b})
+        other = CompositeThrottler({"b": b})
+        await first.acquire({"a": 1})
+        start = _now()
+        waiting = asyncio.create_task(_timed(start, first.acquire({"a": 1, "b": 1})))
+        await asyncio.sleep(0)
+        # the token of b is still there while `first` waits on a
+        other_s = await _timed(start, other.acquire({"b": 1}))
+        return other_s, await waiting, first.binding
+
+    assert run_virtual(main()) == (0, 1.0, "b")
+
+
+def test_suspending_a_shared_bucket_holds_back_every_composite():
+    async def main():
+        ip = AsyncThrottler(100, 100)
+        first = CompositeThrottler({"ip": ip, "acc": AsyncThrottler(10, 1)})
+        other = CompositeThrottler({"ip": ip, "acc": AsyncThrottler(10, 1)})
+        start = _now()
+        first.suspend(5, ["ip"])
+        other_s = await _timed(start, other.acquire({"ip": 1, "acc": 1}))
+        return other_s, other.binding
+
+    assert run_virtual(main()) == (5.0, SUSPENDED)
+
+
+def test_suspending_account_buckets_leaves_other_composites_alone():
+    async def main():
+        ip = AsyncThrottler(100, 100)
+        first = CompositeThrottler({"ip": ip, "acc": AsyncThrottler(10, 1)})
+        other = CompositeThrottler({"ip": ip, "acc": AsyncThrottler(10, 1)})
+        start = _now()
+        first.suspend(5, ["acc"])
+        other_s = await _timed(start, other.acquire({"ip": 1, "acc": 1}))
+        first_s = await _timed(start, first.acquire({"ip": 1, "acc": 1}))
+        return other_s, first_s
+
+    assert run_virtual(main()) == (0, 5.0)
+
+
+def _fixed_window(limit: int, interval: int, elapsed_s: float = 0.0):
+    """Throttler whose current window started `elapsed_s` ago"""
+    throttler = FixedWindowThrottler(limit, interval)
+    throttler.align(elapsed_s)
+    return throttler
+
+
+def test_fixed_window_admits_at_most_the_limit_per_window():
+    async def main():
+        throttler = _fixed_window(3, 10)
+        start = _now()
+        return await asyncio.gather(*(_timed(start, throttler.acquire()) for _ in range(7)))
+
+    assert run_virtual(main()) == [0, 0, 0, 10.0, 10.0, 10.0, 20.0]
+
+
+def test_fixed_window_ends_at_the_aligned_boundary():
+    async def main():
+        throttler = _fixed_window(1, 10, elapsed_s=7.5)
+        start = _now()
+        await throttler.acquire()
+        return await _timed(start, throttler.acquire())
+
+    assert run_virtual(main()) == 2.5
+
+
+def test_fixed_window_starts_at_the_used_count_reported():
+    async def main():
+        throttler = _fixed_window(3, 10, elapsed_s=2)
+        throttler.sync_used(2)
+        start = _now()
+        return [await _timed(start, throttler.acquire()) for _ in range(2)]
+
+    assert run_virtual(main()) == [0, 8.0]
+
+
+def test_fixed_window_ignores_counts_reported_right_after_it_started():
+    async def main():
+        throttler = _fixed_window(3, 10, elapsed_s=0.5)
+        # may be the count of the previous window
+        throttler.sync_used(3)
+        start = _now()
+        return await _timed(start, throttler.acquire())
+
+    assert run_virtual(main()) == 0
+
+
+def test_fixed_window_scaled_limit():
+    async def main():
+        throttler = _fixed_window(10, 10)
+        await throttler.acquire(5)
+        # 2 per window, the 5 used already exceed it
+        throttler.set_refill_rate(0.2)
+        start = _now()
+        return [await _timed(start, throttler.acquire()) for _ in range(3)]
+
+    assert run_virtual(main()) == [10.0, 10.0, 20.0]
+
+
+def test_fixed_window_weight_above_scaled_limit_goes_in_an_unused_window():
+    async def main():
+        throttler = _fixed_window(10, 10, elapsed_s=5)
+        throttler.set_refill_rate(0.2)
+        start = _now()
+        await throttler.acquire()
+        return await _timed(start, throttler.acquire(5))
+
+    assert run_virtual(main()) == 5.0
+
+
+def test_shared_fixed_window_counts_every_instance():
+    async def main():
+        first = SharedFixedWindowThrottler(3, 10)
+        other = SharedFixedWindowThrottler(3, 10, state=first.state)
+        first.align(0.0)
+        other.align(0.0)
+        start = _now()
+        await first.acquire(2)
+        return await _timed(start, other.acquire(2))
+
+    assert run_virtual(main()) == 10.0
+
+
+def test_shared_fixed_window_suspension_holds_back_every_instance():
+    async def main():
+        first = SharedFixedWindowThrottler(3, 10)
+        other = SharedFixedWindowThrottler(3, 10, state=first.state)
+        start = _now()
+        first.suspend(4)
+        return await _timed(start, other.acquire()), other.suspended_s()
+
+    assert run_virtual(main()) == (4.0, 0)
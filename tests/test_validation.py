@@ -0,0 +1,202 @@
+import csv
+import random
+
+import numpy as np
+import pytest
+
+from order_placer.cex.binance.exchange_info import BnceSymbolFilters
+from order_placer.cex.binance.mock import mock_exchange_info
+from order_placer.cex.binance.validation import (
+    BnceOrderColumns,
+    _encode,
+    _parse_numpy,
+    split_decimal,
+    _validate_numpy,
+    _validate_python,
+    validate_order_columns,
+)
+
+_SYMBOLS = {
+    info["symbol"]: BnceSymbolFilters(info) for info in mock_exchange_info()["symbols"]
+}
+_ACCOUNTS = {1, 2, 3}
+_HEADER = "Pair,Direction,Price,Quantity,Account,Value"
+
+# decimals the numpy parser handles on its own or hands to `split_decimal`, few
+# enough decimals for prices and quantities to stay in 64 bits once scaled
+_EDGE_NUMBERS = [
+    "2.0000",
+    "0002.5",
+    "000.00010",
+    "0.00001000",
+    ".5",
+    "5.",
+    "0",
+    "0.000",
+    "",
+    ".",
+    "-1.5",
+    "+1.5",
+    " 1.5",
+    "1e-3",
+    "1E2",
+    "1.2.3",
+    "abc",
+    "inf",
+    "NaN",
+    "2.0000000000",
+    "0.0000000001",
+    "00000000000000002.5",
+    "922327.00000001",
+    "92141578.001",
+]
+# over-long decimals, their scale or mantissa does not fit in 64 bits
+_LONG_NUMBERS = [
+    "0.123456789012345678",
+    "0.1234567890123456789",
+    "2.00000000000000000001",
+    "1234567890123456789",
+    "99999999999999999999",
+]
+_EDGE_ROWS = [
+    ("JTOUSDT", "BUY", "2.0000", "3.722", "1"),
+    ("JTOUSDT", "buy", "0002.0010", "003.067", "01"),
+    ("JTOUSDT", "Sell", "2.00005", "2.5005", "2"),
+    ("JTOUSDT", "SELLL", "2.0", "3", "3"),
+    ("JTOUSDT", "", "2.0", "3", "3"),
+    ("JTOUSDT", "BUY", "", "3", "1"),
+    ("JTOUSDT", "BUY", "2.0", "", "1"),
+    ("", "BUY", "2.0", "3", "1"),
+    ("JTOUSDT", "BUY", "2.0", "3", ""),
+    ("JTOUSDT", "BUY", "2.0", "3", "9"),
+    ("JTOUSDT", "BUY", "2.0", "3", "x1"),
+    ("BTCUSDT", "BUY", "2.0", "3", "1"),
+    ("JTOUSDT", "BUY", "0.0001", "0.001", "1"),
+    ("JTOUSDT", "BUY", "1000.0001", "1", "1"),
+    ("JTOUSDT", "BUY", "2.0", "92141578.001", "1"),
+    ("ETHBTC", "SELL", "0.051234567890", "0.00011", "2"),
+    ("ETHBTC", "SELL", "0.05", "0.0001999999", "2"),
+    ("ETHBTC", "BUY", "0.000015", "0.0001", "3"),
+    ("ETHBTC", "BUY", "1e-1", "1E-3", "3"),
+]
+
+
+def _random_rows(n: int, seed: int) -> list[tuple[str, ...]]:
+    rng = random.Random(seed)
+
+    def _number() -> str:
+        if rng.random() < 0.2:
+            return rng.choice(_EDGE_NUMBERS)
+        # below 1e8 with up to 10 decimals, scaled values stay in 64 bits
+        decimals = rng.randint(0, 10)
+        digits = str(rng.randrange(1, 10 ** rng.randint(1, 8 + decimals)))
+        digits = digits.rjust(decimals + 1, "0")
+        zeros = "0" * rng.choice([0, 0, 0, 1, 3])
+        if not decimals:
+            return zeros + digits
+        return f"{zeros}{digits[:-decimals]}.{digits[-decimals:]}"
+
+    return [
+        (
+            rng.choice(["JTOUSDT", "ETHBTC", "ETHBTC", "XRPUSDT"]),
+            rng.choice(["BUY", "SELL", "buy", "Sell", "HOLD"]),
+            _number(),
+            _number(),
+            rng.choice(["1", "2", "3", "4", "02"]),
+        )
+        for _ in range(n)
+    ]
+
+
+def _write(fp, rows: list[tuple[str, ...]], quote: bool = False, final_newline: bool = True):
+    lines = [_HEADER]
+    for row in rows:
+        fields = [*row, "1.0"]
+        if quote:
+            fields = [f'"{v}"' for v in fields]
+        lines.append(",".join(fields))
+    fp.write_text("\n".join(lines) + ("\n" if final_newline else ""))
+
+
+def _csv_columns(fp) -> dict[str, list[str]]:
+    with open(fp, newline="") as f:
+        rows = list(csv.DictReader(f))
+    return {name: [row[name] for row in rows] for name in ("Pair", "Price", "Account")}
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        pytest.param(_EDGE_ROWS, id="edge"),
+        *(pytest.param(_random_rows(500, seed), id=f"random-{seed}") for seed in range(5)),
+    ],
+)
+@pytest.mark.parametrize("quote", [False, True])
+@pytest.mark.parametrize("final_newline", [True, False])
+def test_numpy_and_python_validation_agree(tmp_path, rows, quote, final_newline):
+    fp = tmp_path / "orders.csv"
+    _write(fp, rows, quote, final_newline)
+    columns = BnceOrderColumns.read(str(fp))
+    for name, values in _csv_columns(fp).items():
+        assert columns.column(name) == values
+
+    # read again, `column` caches the strings the numpy path would not use
+    columns = BnceOrderColumns.read(str(fp))
+    vectorized = _validate_numpy(columns, _SYMBOLS, _ACCOUNTS)
+    assert vectorized is not None
+    assert vectorized == _validate_python(columns, _SYMBOLS, _ACCOUNTS)
+
+
+def test_over_long_decimals_fall_back_to_python(tmp_path):
+    fp = tmp_path / "orders.csv"
+    _write(
+        fp,
+        [("ETHBTC", "BUY", "0.05", "0.01", "1")]
+        + [("ETHBTC", "BUY", price, "0.01", "1") for price in _LONG_NUMBERS],
+    )
+    columns = BnceOrderColumns.read(str(fp))
+    assert _validate_numpy(columns, _SYMBOLS, _ACCOUNTS) is None
+    assert validate_order_columns(columns, _SYMBOLS, _ACCOUNTS) == {
+        4: ["Price outside PRICE_FILTER"],
+        5: ["Price outside PRICE_FILTER"],
+    }
+
+
+def _fields(values: list[str]) -> tuple:
+    data = ",".join(values).encode("utf-8")
+    lengths = np.array([len(v.encode("utf-8")) for v in values], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])).astype(np.int64)
+    return data, np.frombuffer(data, dtype=np.uint8), starts, starts + lengths
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        pytest.param(_EDGE_NUMBERS + _LONG_NUMBERS, id="edge"),
+        *(
+            pytest.param([row[i] for row in _random_rows(500, seed)], id=f"random-{seed}")
+            for seed in range(5)
+            for i in (2, 3)
+        ),
+    ],
+)
+def test_parse_numpy_matches_split(values):
+    # values past 64 bits leave the whole column to python
+    values = [v for v in values if (split_decimal(v) or (0, 0))[0] < 2**63]
+    mantissa, decimals = _parse_numpy(*_fields(values))
+    parsed = [
+        (m, d) if m > 0 else None
+        for m, d in zip(mantissa.tolist(), decimals.tolist())
+    ]
+    assert parsed == [split_decimal(v) for v in values]
+
+
+def test_parse_numpy_gives_up_past_64_bits():
+    assert _parse_numpy(*_fields(["1.5", "99999999999999999999"])) is None
+
+
+def test_encode_numbers_distinct_strings():
+    values = ["JTOUSDT", "ETHBTC", "", "JTOUSDT", "x" * 40, "ETHBTC", "x" * 40, "é"]
+    strings, codes = _encode(*_fields(values))
+    assert [strings[c] for c in codes.tolist()] == values
+    assert len(strings) == len(set(values))
@@ -0,0 +1,22 @@
+import asyncio
+import time
+
+from order_placer.core.virtual_time import run_virtual
+
+
+def test_time_does_not_advance_while_threads_run():
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        fired = []
+        loop.call_later(1, fired.append, "timer")
+        await asyncio.gather(
+            asyncio.to_thread(time.sleep, 0.05), asyncio.to_thread(time.sleep, 0.1)
+        )
+        fired.append("threads")
+        await asyncio.sleep(2)
+        return fired, loop.time() - start
+
+    fired, elapsed_s = run_virtual(main())
+    assert fired == ["threads", "timer"]
+    assert 2 <= elapsed_s < 2.5
@@ -0,0 +1,21 @@
+import asyncio
+import logging
+
+from order_placer.cex.binance.ws_endpoint import BnceWsEndpointV3
+
+
+def test_close_logs_reader_errors_and_resets_the_connection(caplog):
+    async def main():
+        endpoint = BnceWsEndpointV3(None, "ws://127.0.0.1:1")
+
+        async def _read():
+            raise ValueError("undecodable message")
+
+        endpoint._reader = asyncio.create_task(_read())
+        await asyncio.sleep(0)
+        await endpoint.close()
+        return endpoint._ws, endpoint._reader
+
+    with caplog.at_level(logging.ERROR):
+        assert asyncio.run(main()) == (None, None)
+    assert "undecodable message" in caplog.text